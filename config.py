@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +8,10 @@ class Settings(BaseSettings):
     PGS_USER: str
     PGS_PASSWORD: str
     PGS_DB: str
+    PGS_POOL_MIN_SIZE: int = 10
+    PGS_POOL_MAX_SIZE: int = 10
+    PGS_STATEMENT_CACHE_SIZE: int = 100
+    PGS_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
     SECRET_KEY: str
 
     YEAR: int
@@ -14,6 +19,51 @@ class Settings(BaseSettings):
     MAX_SQUAD_BUDGET: int
     SELECTION_SIZE: int
 
+    PCS_HTTP2: bool = True
+    PCS_MAX_CONNECTIONS: int = 10
+    PCS_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    PCS_KEEPALIVE_EXPIRY: float = 30.0
+    PCS_TIMEOUT: float = 30.0
+    PCS_CONNECT_TIMEOUT: float = 10.0
+    PCS_REQUESTS_PER_SECOND: float = 2.0
+    PCS_REQUEST_BURST: int = 4
+    PCS_HTML_PARSER: str = "lxml"
+    PCS_PARSER_EXECUTOR: Literal["thread", "process"] = "thread"
+    PCS_PARSER_WORKERS: int = 4
+
+    PCS_CACHE_ENABLED: bool = True
+    PCS_CACHE_DIR: str = ".cache/pcs"
+    PCS_CACHE_FRESH_SECONDS: int = 600
+    PCS_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    PCS_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    PCS_OFFLINE: bool = False
+
+    SYNC_CONCURRENCY: int = 4
+    SYNC_MAX_RETRIES: int = 3
+    SYNC_RETRY_BACKOFF: float = 1.0
+    SYNC_RESULTS_RETRY_MINUTES: int = 60
+    SYNC_CANCEL_AFTER_DAYS: int = 7
+    JOB_WORKERS: int = 2
+    LEADER_POINTS_MULTIPLIER: int = 2
+    SELECTION_DEADLINE_POLL_SECONDS: float = 60.0
+    TRANSFERS_PER_WINDOW: int = 3
+    RECOMMENDATION_CACHE_MAX_SIZE: int = 256
+    RECOMMENDATION_CACHE_SECONDS: float = 60.0
+    REFERENCE_CACHE_SECONDS: float = 60.0
+
+    SIMULATION_RUNS: int = 1000
+    SIMULATION_CACHE_SECONDS: float = 600.0
+    SIMULATION_SEED: int | None = 0
+    SQUAD_OPTIMIZER_TIME_BUDGET: float = 0.5
+
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_USER_CLAIMS_IN_TOKEN: bool = False
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
     model_config = SettingsConfigDict(env_file=".env")
 
     @property
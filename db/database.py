@@ -1,34 +1,161 @@
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
 from typing import AsyncGenerator
 from asyncpg import Pool, create_pool, Connection
+from fastapi import Depends
 from loguru import logger
 from config import settings
 
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        avg = self.total_wait_ms / self.checkouts if self.checkouts else 0.0
+        return {**asdict(self), "avg_wait_ms": avg}
+
+
+class LazyConnection:
+    """Request-scoped handle that checks out a pool connection on first use.
+
+    aiosql treats it like a pool (it has acquire/release), so every
+    repository in a request shares the one connection, and requests that
+    never query, e.g. served from a cache, never touch the pool.
+    """
+
+    def __init__(self, database: "Database"):
+        self.database = database
+        self.conn: Connection | None = None
+        self.transactional = False
+        self.tx = None
+
+    async def acquire(self) -> Connection:
+        if self.conn is None:
+            self.conn = await self.database.checkout()
+            if self.transactional:
+                await self._begin()
+        return self.conn
+
+    async def release(self, conn: Connection):
+        # Held until the request ends
+        pass
+
+    async def begin(self):
+        self.transactional = True
+        if self.conn is not None and self.tx is None:
+            await self._begin()
+
+    async def _begin(self):
+        self.tx = self.conn.transaction()
+        await self.tx.start()
+
+    @asynccontextmanager
+    async def transaction(self):
+        conn = await self.acquire()
+        async with conn.transaction():
+            yield conn
+
+    async def copy_records_to_table(self, *args, **kwargs):
+        conn = await self.acquire()
+        return await conn.copy_records_to_table(*args, **kwargs)
+
+    async def close(self, commit: bool):
+        if self.conn is None:
+            return
+        try:
+            if self.tx is not None:
+                if commit:
+                    await self.tx.commit()
+                else:
+                    await self.tx.rollback()
+        finally:
+            await self.database.release(self.conn)
+            self.conn = None
+            self.tx = None
+
+
 class Database:
     def __init__(self, dsn: str):
         self.pool: Pool | None = None
         self.dsn: str = dsn
-        
+        self.stats = PoolStats()
+
     async def connect(self):
         try:
-            self.pool = await create_pool(self.dsn)
+            self.pool = await create_pool(
+                self.dsn,
+                min_size=settings.PGS_POOL_MIN_SIZE,
+                max_size=settings.PGS_POOL_MAX_SIZE,
+                statement_cache_size=settings.PGS_STATEMENT_CACHE_SIZE,
+                max_inactive_connection_lifetime=settings.PGS_MAX_INACTIVE_CONNECTION_LIFETIME,
+            )
             logger.info("Database connection pool created successfully.")
-            
+
         except Exception as e:
             logger.error(f"Error connecting to the database: {e}")
             raise e
-        
+
     async def disconnect(self):
         if self.pool:
             await self.pool.close()
-            logger.info("Database connection pool closed successfully.")
-            
-            
-    async def get_connection(self) -> AsyncGenerator[Connection, None]:
+            logger.info(f"Database connection pool closed successfully. Stats: {self.stats.to_dict()}")
+
+    async def checkout(self) -> Connection:
         if not self.pool:
             raise Exception("Database connection pool is not initialized.")
-        async with self.pool.acquire() as conn:
-            async with conn.transaction():
-                yield conn
-                     
+        start = time.perf_counter()
+        conn = await self.pool.acquire()
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.stats.checkouts += 1
+        self.stats.total_wait_ms += wait_ms
+        self.stats.max_wait_ms = max(self.stats.max_wait_ms, wait_ms)
+        return conn
+
+    async def release(self, conn: Connection):
+        await self.pool.release(conn)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[Connection, None]:
+        conn = await self.checkout()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    def pool_stats(self) -> dict:
+        stats = self.stats.to_dict()
+        if self.pool:
+            stats.update(
+                size=self.pool.get_size(),
+                idle=self.pool.get_idle_size(),
+                min_size=self.pool.get_min_size(),
+                max_size=self.pool.get_max_size(),
+            )
+        return stats
+
+    async def get_connection(self) -> AsyncGenerator[LazyConnection, None]:
+        # No transaction unless a route asks for one through get_transaction
+        conn = LazyConnection(self)
+        try:
+            yield conn
+        except Exception:
+            await conn.close(commit=False)
+            raise
+        else:
+            await conn.close(commit=True)
+
 dsn = settings.PGS_DSN
-db = Database(dsn)
\ No newline at end of file
+db = Database(dsn)
+
+
+async def get_transaction(
+    conn: LazyConnection = Depends(db.get_connection, scope="function"),
+) -> LazyConnection:
+    """Route dependency for endpoints that write: the request's shared
+    connection runs in one transaction, committed when the handler returns."""
+    await conn.begin()
+    return conn
@@ -0,0 +1,10 @@
+-- Persisted map from PCS rider names to cyclists, filled by the sync matcher.
+-- A NULL cyclist_id records a low-confidence miss; misses are only trusted
+-- for the cyclists_version they were scored against.
+CREATE TABLE cyclist_aliases (
+    alias VARCHAR(255) PRIMARY KEY,
+    cyclist_id INTEGER REFERENCES cyclists(id) ON DELETE CASCADE,
+    score FLOAT NOT NULL,
+    cyclists_version VARCHAR(32) NOT NULL,
+    updated_on TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
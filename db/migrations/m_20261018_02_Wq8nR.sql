@@ -0,0 +1,16 @@
+-- Per-race sync bookkeeping for incremental result syncs
+ALTER TABLE races 
+ADD COLUMN results_synced_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE races 
+ADD COLUMN last_sync_attempt_at TIMESTAMP WITH TIME ZONE;
+
+-- Races that already have results are finished
+UPDATE races r
+SET status = 'finished', results_synced_at = CURRENT_TIMESTAMP
+WHERE EXISTS (SELECT 1 FROM race_results rr WHERE rr.race_id = r.id);
+
+-- Future races were wrongly canceled when their (empty) result page was synced
+UPDATE races
+SET status = 'planned'
+WHERE status = 'canceled' AND start_timestamp > CURRENT_TIMESTAMP;
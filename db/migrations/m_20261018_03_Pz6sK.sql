@@ -0,0 +1,30 @@
+-- Materialized scores, filled race by race when results come in
+CREATE TABLE cyclist_race_points (
+    race_id INTEGER NOT NULL REFERENCES races(id) ON DELETE CASCADE,
+    cyclist_id INTEGER NOT NULL REFERENCES cyclists(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (race_id, cyclist_id)
+);
+
+CREATE TABLE squad_race_scores (
+    squad_id INTEGER NOT NULL REFERENCES squads(id) ON DELETE CASCADE,
+    race_id INTEGER NOT NULL REFERENCES races(id) ON DELETE CASCADE,
+    points INTEGER NOT NULL,
+    leader_bonus INTEGER NOT NULL DEFAULT 0,
+    scored_on TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (squad_id, race_id)
+);
+
+CREATE INDEX ix_squad_race_scores_race ON squad_race_scores (race_id);
+
+-- Running season total per squad, kept in step with squad_race_scores
+CREATE TABLE squad_scores (
+    squad_id INTEGER PRIMARY KEY REFERENCES squads(id) ON DELETE CASCADE,
+    points INTEGER NOT NULL DEFAULT 0,
+    races_scored INTEGER NOT NULL DEFAULT 0,
+    updated_on TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE races
+ADD COLUMN scored_at TIMESTAMP WITH TIME ZONE;
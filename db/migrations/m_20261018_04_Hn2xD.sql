@@ -0,0 +1,26 @@
+-- Ranked standings per competition, refreshed whenever a race is scored
+CREATE TABLE competition_standings (
+    competition_id INTEGER NOT NULL REFERENCES competitions(id) ON DELETE CASCADE,
+    squad_id INTEGER NOT NULL REFERENCES squads(id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    previous_rank INTEGER,
+    race_id INTEGER REFERENCES races(id) ON DELETE SET NULL,
+    race_points INTEGER NOT NULL DEFAULT 0,
+    refreshed_on TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (competition_id, squad_id)
+);
+
+-- Not unique: positions are rewritten row by row during a refresh
+CREATE INDEX ix_competition_standings_position ON competition_standings (competition_id, position);
+
+INSERT INTO competition_standings (competition_id, squad_id, rank, position, points)
+SELECT
+    cs.competition_id,
+    cs.squad_id,
+    DENSE_RANK() OVER (PARTITION BY cs.competition_id ORDER BY COALESCE(ss.points, 0) DESC),
+    ROW_NUMBER() OVER (PARTITION BY cs.competition_id ORDER BY COALESCE(ss.points, 0) DESC, cs.squad_id),
+    COALESCE(ss.points, 0)
+FROM competition_squads cs
+LEFT JOIN squad_scores ss ON ss.squad_id = cs.squad_id;
@@ -0,0 +1,28 @@
+-- Secondary indexes for the hot filters and joins in db/queries.
+-- scripts/check_query_plans.py fails when a query falls back to a
+-- sequential scan over a large table.
+
+-- get_races, get_upcoming_races, get_races_due_for_scoring: one season in start order
+CREATE INDEX IF NOT EXISTS ix_races_year_start ON races (year, start_timestamp);
+
+-- get_next_race
+CREATE INDEX IF NOT EXISTS ix_races_start ON races (start_timestamp);
+
+-- get_pcs_races, get_races_due_for_results: only races still waiting for PCS data
+CREATE INDEX IF NOT EXISTS ix_races_pcs_planned ON races (year, start_timestamp)
+WHERE pcs_path IS NOT NULL AND status = 'planned';
+
+-- get_squads_by_user, get_competition_user_position; covers the squad listing
+CREATE INDEX IF NOT EXISTS ix_squads_user ON squads (user_id) INCLUDE (id, name);
+
+-- Startlists by rider; the primary key leads with race_id
+CREATE INDEX IF NOT EXISTS ix_race_cyclists_cyclist ON race_cyclists (cyclist_id, race_id);
+
+-- Competitions of a squad; the primary key leads with competition_id
+CREATE INDEX IF NOT EXISTS ix_competition_squads_squad ON competition_squads (squad_id, competition_id);
+
+-- get_cyclist_season_points: index-only per race
+CREATE INDEX IF NOT EXISTS ix_cyclist_race_points_race ON cyclist_race_points (race_id) INCLUDE (cyclist_id, points);
+
+-- Frozen selections of a race, read by score_race_squads
+CREATE INDEX IF NOT EXISTS ix_squad_race_selections_race ON squad_race_selections (race_id, squad_id) INCLUDE (cyclist_id, is_leader);
@@ -0,0 +1,91 @@
+-- Validate and replace a squad's riders in one call. The squad row is locked
+-- first, so concurrent saves of the same squad run one after the other and
+-- each one validates against the riders the previous save left behind.
+-- Returns one row; error is NULL when the squad was written.
+CREATE OR REPLACE FUNCTION replace_squad_cyclists(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_ids INTEGER[],
+    p_squad_size INTEGER,
+    p_budget FLOAT
+)
+RETURNS TABLE (
+    error VARCHAR,
+    price FLOAT,
+    cyclist_ids INTEGER[],
+    added INTEGER,
+    removed INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_wanted INTEGER[];
+    v_unknown INTEGER[];
+    v_price FLOAT;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    v_wanted := ARRAY(SELECT DISTINCT unnest(p_cyclist_ids));
+    IF cardinality(v_wanted) <> cardinality(p_cyclist_ids) THEN
+        RETURN QUERY SELECT 'duplicate_cyclists'::VARCHAR, NULL::FLOAT,
+            ARRAY(SELECT id FROM unnest(p_cyclist_ids) id GROUP BY id HAVING COUNT(*) > 1), 0, 0;
+        RETURN;
+    END IF;
+    IF cardinality(v_wanted) > p_squad_size THEN
+        RETURN QUERY SELECT 'too_many_cyclists'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    v_unknown := ARRAY(
+        SELECT w.id FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (SELECT 1 FROM cyclists c WHERE c.id = w.id)
+    );
+    IF cardinality(v_unknown) > 0 THEN
+        RETURN QUERY SELECT 'unknown_cyclists'::VARCHAR, NULL::FLOAT, v_unknown, 0, 0;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(SUM(c.price), 0) INTO v_price
+    FROM cyclists c
+    WHERE c.id = ANY(v_wanted);
+    IF v_price > p_budget THEN
+        RETURN QUERY SELECT 'over_budget'::VARCHAR, v_price, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id;
+
+    -- Only the difference is written; riders kept in the squad are untouched
+    DELETE FROM squad_selections ss
+    WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted);
+
+    RETURN QUERY
+    WITH removed_rows AS (
+        DELETE FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id <> ALL(v_wanted)
+        RETURNING 1
+    ),
+    added_rows AS (
+        INSERT INTO squad_cyclists (squad_id, cyclist_id)
+        SELECT p_squad_id, w.id FROM unnest(v_wanted) w(id)
+        ON CONFLICT (squad_id, cyclist_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT NULL::VARCHAR, v_price, v_wanted,
+        (SELECT COUNT(*) FROM added_rows)::INTEGER,
+        (SELECT COUNT(*) FROM removed_rows)::INTEGER;
+END;
+$$;
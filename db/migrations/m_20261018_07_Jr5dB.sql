@@ -0,0 +1,109 @@
+-- Validate and save a squad's selection in one call. Like replace_squad_cyclists
+-- the squad row is locked first, so a selection is always checked against the
+-- riders the squad holds when it is written.
+-- Only rows that differ from the stored selection are written: an unchanged
+-- selection reads a dozen rows and writes nothing.
+-- Returns one row; error is NULL when the selection was saved.
+CREATE OR REPLACE FUNCTION save_squad_selection(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_ids INTEGER[],
+    p_is_leader BOOLEAN[],
+    p_selection_size INTEGER
+)
+RETURNS TABLE (
+    error VARCHAR,
+    cyclist_ids INTEGER[],
+    added INTEGER,
+    removed INTEGER,
+    updated INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_leader INTEGER;
+    v_outside INTEGER[];
+    v_demoted INTEGER;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    IF cardinality(ARRAY(SELECT DISTINCT unnest(p_cyclist_ids))) <> cardinality(p_cyclist_ids) THEN
+        RETURN QUERY SELECT 'duplicate_cyclists'::VARCHAR,
+            ARRAY(SELECT id FROM unnest(p_cyclist_ids) id GROUP BY id HAVING COUNT(*) > 1), 0, 0, 0;
+        RETURN;
+    END IF;
+    IF cardinality(p_cyclist_ids) <> p_selection_size THEN
+        RETURN QUERY SELECT 'wrong_selection_size'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+    IF (SELECT COUNT(*) FROM unnest(p_is_leader) l WHERE l) <> 1 THEN
+        RETURN QUERY SELECT 'leader_count'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    v_outside := ARRAY(
+        SELECT w.id FROM unnest(p_cyclist_ids) w(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = w.id
+        )
+    );
+    IF cardinality(v_outside) > 0 THEN
+        RETURN QUERY SELECT 'not_in_squad'::VARCHAR, v_outside, 0, 0, 0;
+        RETURN;
+    END IF;
+
+    SELECT w.id INTO v_leader
+    FROM unnest(p_cyclist_ids, p_is_leader) w(id, is_leader)
+    WHERE w.is_leader;
+
+    -- uq_squad_selections_leader is checked row by row, so the old leader
+    -- steps down before the new one is written
+    WITH demoted AS (
+        UPDATE squad_selections ss SET is_leader = FALSE
+        WHERE ss.squad_id = p_squad_id AND ss.is_leader AND ss.cyclist_id <> v_leader
+        RETURNING ss.cyclist_id
+    )
+    SELECT COUNT(*) FILTER (WHERE d.cyclist_id = ANY(p_cyclist_ids)) INTO v_demoted
+    FROM demoted d;
+
+    RETURN QUERY
+    WITH wanted AS (
+        SELECT w.id, w.is_leader
+        FROM unnest(p_cyclist_ids, p_is_leader) w(id, is_leader)
+    ),
+    changes AS (
+        SELECT w.id, w.is_leader, ss.cyclist_id IS NULL AS is_new
+        FROM wanted w
+        LEFT JOIN squad_selections ss ON ss.squad_id = p_squad_id AND ss.cyclist_id = w.id
+        WHERE ss.cyclist_id IS NULL OR ss.is_leader <> w.is_leader
+    ),
+    removed_rows AS (
+        DELETE FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(p_cyclist_ids)
+        RETURNING 1
+    ),
+    written AS (
+        INSERT INTO squad_selections (squad_id, cyclist_id, is_leader)
+        SELECT p_squad_id, c.id, c.is_leader FROM changes c
+        ON CONFLICT (squad_id, cyclist_id) DO UPDATE SET is_leader = EXCLUDED.is_leader
+    )
+    SELECT NULL::VARCHAR, p_cyclist_ids,
+        (SELECT COUNT(*) FROM changes WHERE is_new)::INTEGER,
+        (SELECT COUNT(*) FROM removed_rows)::INTEGER,
+        (SELECT COUNT(*) FROM changes WHERE NOT is_new)::INTEGER + v_demoted;
+END;
+$$;
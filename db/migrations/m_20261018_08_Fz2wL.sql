@@ -0,0 +1,231 @@
+-- Selections are frozen into squad_race_selections when a race starts
+ALTER TABLE races
+ADD COLUMN selections_frozen_at TIMESTAMP WITH TIME ZONE;
+
+-- Races that already started have nothing left to freeze
+UPDATE races
+SET selections_frozen_at = CURRENT_TIMESTAMP
+WHERE start_timestamp <= CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_races_selections_pending ON races (start_timestamp) WHERE selections_frozen_at IS NULL;
+
+-- The race whose deadline has passed but whose selections are not frozen yet.
+-- Selection edits are refused while there is one, so the snapshot holds the
+-- selections as they were at the start of the race.
+CREATE OR REPLACE FUNCTION selection_locked_race()
+RETURNS INTEGER
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT r.id
+    FROM races r
+    WHERE r.selections_frozen_at IS NULL AND r.start_timestamp <= CURRENT_TIMESTAMP
+    ORDER BY r.start_timestamp
+    LIMIT 1;
+$$;
+
+-- Both write paths refuse to touch selections between a deadline and its freeze
+CREATE OR REPLACE FUNCTION replace_squad_cyclists(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_ids INTEGER[],
+    p_squad_size INTEGER,
+    p_budget FLOAT
+)
+RETURNS TABLE (
+    error VARCHAR,
+    price FLOAT,
+    cyclist_ids INTEGER[],
+    added INTEGER,
+    removed INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_wanted INTEGER[];
+    v_unknown INTEGER[];
+    v_price FLOAT;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    v_wanted := ARRAY(SELECT DISTINCT unnest(p_cyclist_ids));
+    IF cardinality(v_wanted) <> cardinality(p_cyclist_ids) THEN
+        RETURN QUERY SELECT 'duplicate_cyclists'::VARCHAR, NULL::FLOAT,
+            ARRAY(SELECT id FROM unnest(p_cyclist_ids) id GROUP BY id HAVING COUNT(*) > 1), 0, 0;
+        RETURN;
+    END IF;
+    IF cardinality(v_wanted) > p_squad_size THEN
+        RETURN QUERY SELECT 'too_many_cyclists'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted)
+    ) AND selection_locked_race() IS NOT NULL THEN
+        RETURN QUERY SELECT 'selection_locked'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    v_unknown := ARRAY(
+        SELECT w.id FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (SELECT 1 FROM cyclists c WHERE c.id = w.id)
+    );
+    IF cardinality(v_unknown) > 0 THEN
+        RETURN QUERY SELECT 'unknown_cyclists'::VARCHAR, NULL::FLOAT, v_unknown, 0, 0;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(SUM(c.price), 0) INTO v_price
+    FROM cyclists c
+    WHERE c.id = ANY(v_wanted);
+    IF v_price > p_budget THEN
+        RETURN QUERY SELECT 'over_budget'::VARCHAR, v_price, NULL::INTEGER[], 0, 0;
+        RETURN;
+    END IF;
+
+    UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id;
+
+    -- Only the difference is written; riders kept in the squad are untouched
+    DELETE FROM squad_selections ss
+    WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted);
+
+    RETURN QUERY
+    WITH removed_rows AS (
+        DELETE FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id <> ALL(v_wanted)
+        RETURNING 1
+    ),
+    added_rows AS (
+        INSERT INTO squad_cyclists (squad_id, cyclist_id)
+        SELECT p_squad_id, w.id FROM unnest(v_wanted) w(id)
+        ON CONFLICT (squad_id, cyclist_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT NULL::VARCHAR, v_price, v_wanted,
+        (SELECT COUNT(*) FROM added_rows)::INTEGER,
+        (SELECT COUNT(*) FROM removed_rows)::INTEGER;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION save_squad_selection(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_ids INTEGER[],
+    p_is_leader BOOLEAN[],
+    p_selection_size INTEGER
+)
+RETURNS TABLE (
+    error VARCHAR,
+    cyclist_ids INTEGER[],
+    added INTEGER,
+    removed INTEGER,
+    updated INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_leader INTEGER;
+    v_outside INTEGER[];
+    v_demoted INTEGER;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    IF selection_locked_race() IS NOT NULL THEN
+        RETURN QUERY SELECT 'selection_locked'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    IF cardinality(ARRAY(SELECT DISTINCT unnest(p_cyclist_ids))) <> cardinality(p_cyclist_ids) THEN
+        RETURN QUERY SELECT 'duplicate_cyclists'::VARCHAR,
+            ARRAY(SELECT id FROM unnest(p_cyclist_ids) id GROUP BY id HAVING COUNT(*) > 1), 0, 0, 0;
+        RETURN;
+    END IF;
+    IF cardinality(p_cyclist_ids) <> p_selection_size THEN
+        RETURN QUERY SELECT 'wrong_selection_size'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+    IF (SELECT COUNT(*) FROM unnest(p_is_leader) l WHERE l) <> 1 THEN
+        RETURN QUERY SELECT 'leader_count'::VARCHAR, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    v_outside := ARRAY(
+        SELECT w.id FROM unnest(p_cyclist_ids) w(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = w.id
+        )
+    );
+    IF cardinality(v_outside) > 0 THEN
+        RETURN QUERY SELECT 'not_in_squad'::VARCHAR, v_outside, 0, 0, 0;
+        RETURN;
+    END IF;
+
+    SELECT w.id INTO v_leader
+    FROM unnest(p_cyclist_ids, p_is_leader) w(id, is_leader)
+    WHERE w.is_leader;
+
+    -- uq_squad_selections_leader is checked row by row, so the old leader
+    -- steps down before the new one is written
+    WITH demoted AS (
+        UPDATE squad_selections ss SET is_leader = FALSE
+        WHERE ss.squad_id = p_squad_id AND ss.is_leader AND ss.cyclist_id <> v_leader
+        RETURNING ss.cyclist_id
+    )
+    SELECT COUNT(*) FILTER (WHERE d.cyclist_id = ANY(p_cyclist_ids)) INTO v_demoted
+    FROM demoted d;
+
+    RETURN QUERY
+    WITH wanted AS (
+        SELECT w.id, w.is_leader
+        FROM unnest(p_cyclist_ids, p_is_leader) w(id, is_leader)
+    ),
+    changes AS (
+        SELECT w.id, w.is_leader, ss.cyclist_id IS NULL AS is_new
+        FROM wanted w
+        LEFT JOIN squad_selections ss ON ss.squad_id = p_squad_id AND ss.cyclist_id = w.id
+        WHERE ss.cyclist_id IS NULL OR ss.is_leader <> w.is_leader
+    ),
+    removed_rows AS (
+        DELETE FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(p_cyclist_ids)
+        RETURNING 1
+    ),
+    written AS (
+        INSERT INTO squad_selections (squad_id, cyclist_id, is_leader)
+        SELECT p_squad_id, c.id, c.is_leader FROM changes c
+        ON CONFLICT (squad_id, cyclist_id) DO UPDATE SET is_leader = EXCLUDED.is_leader
+    )
+    SELECT NULL::VARCHAR, p_cyclist_ids,
+        (SELECT COUNT(*) FROM changes WHERE is_new)::INTEGER,
+        (SELECT COUNT(*) FROM removed_rows)::INTEGER,
+        (SELECT COUNT(*) FROM changes WHERE NOT is_new)::INTEGER + v_demoted;
+END;
+$$;
@@ -0,0 +1,333 @@
+-- Transfers per squad since a point in time, for the per-window quota
+CREATE INDEX IF NOT EXISTS ix_squad_transfers_squad_time ON squad_transfers (squad_id, transfer_timestamp);
+
+-- A rider added into an empty slot is a transfer without an outgoing rider
+ALTER TABLE squad_transfers
+ALTER COLUMN out_cyclist_id DROP NOT NULL;
+
+-- Replacing the roster goes through the same per-window quota as a transfer,
+-- so it cannot be used to swap riders without limit once racing has begun.
+-- A transfer window runs from the latest race start to the next one.
+-- A squad created in the current window builds its roster freely; after that
+-- every rider it adds is recorded in squad_transfers and counted.
+DROP FUNCTION IF EXISTS replace_squad_cyclists(INTEGER, INTEGER, INTEGER[], INTEGER, FLOAT);
+
+CREATE OR REPLACE FUNCTION replace_squad_cyclists(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_ids INTEGER[],
+    p_squad_size INTEGER,
+    p_budget FLOAT,
+    p_window_quota INTEGER
+)
+RETURNS TABLE (
+    error VARCHAR,
+    price FLOAT,
+    cyclist_ids INTEGER[],
+    added INTEGER,
+    removed INTEGER,
+    transfers_used INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_created_on TIMESTAMP WITH TIME ZONE;
+    v_wanted INTEGER[];
+    v_unknown INTEGER[];
+    v_price FLOAT;
+    v_window_start TIMESTAMP WITH TIME ZONE;
+    v_counted BOOLEAN;
+    v_used INTEGER := 0;
+    v_added INTEGER;
+BEGIN
+    SELECT s.user_id, s.created_on INTO v_owner, v_created_on
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    v_wanted := ARRAY(SELECT DISTINCT unnest(p_cyclist_ids));
+    IF cardinality(v_wanted) <> cardinality(p_cyclist_ids) THEN
+        RETURN QUERY SELECT 'duplicate_cyclists'::VARCHAR, NULL::FLOAT,
+            ARRAY(SELECT id FROM unnest(p_cyclist_ids) id GROUP BY id HAVING COUNT(*) > 1), 0, 0, 0;
+        RETURN;
+    END IF;
+    IF cardinality(v_wanted) > p_squad_size THEN
+        RETURN QUERY SELECT 'too_many_cyclists'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted)
+    ) AND selection_locked_race() IS NOT NULL THEN
+        RETURN QUERY SELECT 'selection_locked'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0, 0;
+        RETURN;
+    END IF;
+
+    v_unknown := ARRAY(
+        SELECT w.id FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (SELECT 1 FROM cyclists c WHERE c.id = w.id)
+    );
+    IF cardinality(v_unknown) > 0 THEN
+        RETURN QUERY SELECT 'unknown_cyclists'::VARCHAR, NULL::FLOAT, v_unknown, 0, 0, 0;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(MAX(r.start_timestamp), '-infinity') INTO v_window_start
+    FROM races r
+    WHERE r.start_timestamp <= CURRENT_TIMESTAMP;
+
+    v_counted := v_created_on < v_window_start;
+    IF v_counted THEN
+        SELECT COUNT(*) INTO v_used
+        FROM squad_transfers st
+        WHERE st.squad_id = p_squad_id AND st.transfer_timestamp >= v_window_start;
+
+        SELECT COUNT(*) INTO v_added
+        FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = w.id
+        );
+        IF v_used + v_added > p_window_quota THEN
+            RETURN QUERY SELECT 'transfer_limit'::VARCHAR, NULL::FLOAT, NULL::INTEGER[], 0, 0, v_used;
+            RETURN;
+        END IF;
+    END IF;
+
+    SELECT COALESCE(SUM(c.price), 0) INTO v_price
+    FROM cyclists c
+    WHERE c.id = ANY(v_wanted);
+    IF v_price > p_budget THEN
+        RETURN QUERY SELECT 'over_budget'::VARCHAR, v_price, NULL::INTEGER[], 0, 0, v_used;
+        RETURN;
+    END IF;
+
+    UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id;
+
+    -- Only the difference is written; riders kept in the squad are untouched
+    DELETE FROM squad_selections ss
+    WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted);
+
+    -- Counted additions are paired with the removed riders in id order; any
+    -- addition left over filled an empty slot
+    RETURN QUERY
+    WITH removed_rows AS (
+        DELETE FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id <> ALL(v_wanted)
+        RETURNING sc.cyclist_id
+    ),
+    added_rows AS (
+        INSERT INTO squad_cyclists (squad_id, cyclist_id)
+        SELECT p_squad_id, w.id FROM unnest(v_wanted) w(id)
+        ON CONFLICT (squad_id, cyclist_id) DO NOTHING
+        RETURNING squad_cyclists.cyclist_id
+    ),
+    transfers AS (
+        INSERT INTO squad_transfers (squad_id, out_cyclist_id, in_cyclist_id)
+        SELECT p_squad_id, o.cyclist_id, i.cyclist_id
+        FROM (SELECT a.cyclist_id, ROW_NUMBER() OVER (ORDER BY a.cyclist_id) AS n FROM added_rows a) i
+        LEFT JOIN (SELECT r.cyclist_id, ROW_NUMBER() OVER (ORDER BY r.cyclist_id) AS n FROM removed_rows r) o
+            ON o.n = i.n
+        WHERE v_counted
+        RETURNING 1
+    )
+    SELECT NULL::VARCHAR, v_price, v_wanted,
+        (SELECT COUNT(*) FROM added_rows)::INTEGER,
+        (SELECT COUNT(*) FROM removed_rows)::INTEGER,
+        v_used + (SELECT COUNT(*) FROM transfers)::INTEGER;
+END;
+$$;
+
+-- Swap one rider out of a squad for another in one call. The squad row is
+-- locked first, like replace_squad_cyclists, so the quota count and the
+-- budget check cannot be raced by a second transfer of the same squad.
+-- The budget check sums the roster's current cyclist prices under that lock.
+-- Every lookup is by key or by an index, so the cost does not grow with the
+-- squad's history.
+-- Returns one row; error is NULL when the transfer was made.
+CREATE OR REPLACE FUNCTION transfer_squad_cyclist(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_out_cyclist_id INTEGER,
+    p_in_cyclist_id INTEGER,
+    p_budget FLOAT,
+    p_window_quota INTEGER
+)
+RETURNS TABLE (
+    error VARCHAR,
+    price FLOAT,
+    transfer_id INTEGER,
+    transfers_used INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+    v_in_price FLOAT;
+    v_out_price FLOAT;
+    v_price FLOAT;
+    v_window_start TIMESTAMP WITH TIME ZONE;
+    v_used INTEGER;
+    v_transfer_id INTEGER;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+    IF p_out_cyclist_id = p_in_cyclist_id THEN
+        RETURN QUERY SELECT 'same_cyclist'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+
+    SELECT c.price INTO v_out_price
+    FROM squad_cyclists sc
+    JOIN cyclists c ON c.id = sc.cyclist_id
+    WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_out_cyclist_id;
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_in_squad'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+
+    SELECT c.price INTO v_in_price
+    FROM cyclists c
+    WHERE c.id = p_in_cyclist_id;
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'unknown_cyclists'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+    IF EXISTS (
+        SELECT 1 FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_in_cyclist_id
+    ) THEN
+        RETURN QUERY SELECT 'already_in_squad'::VARCHAR, NULL::FLOAT, NULL::INTEGER, 0;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(MAX(r.start_timestamp), '-infinity') INTO v_window_start
+    FROM races r
+    WHERE r.start_timestamp <= CURRENT_TIMESTAMP;
+
+    SELECT COUNT(*) INTO v_used
+    FROM squad_transfers st
+    WHERE st.squad_id = p_squad_id AND st.transfer_timestamp >= v_window_start;
+    IF v_used >= p_window_quota THEN
+        RETURN QUERY SELECT 'transfer_limit'::VARCHAR, NULL::FLOAT, NULL::INTEGER, v_used;
+        RETURN;
+    END IF;
+
+    -- Priced from the roster at today's cyclist prices, read under the squad lock
+    SELECT COALESCE(SUM(c.price), 0) + v_in_price - v_out_price INTO v_price
+    FROM squad_cyclists sc
+    JOIN cyclists c ON c.id = sc.cyclist_id
+    WHERE sc.squad_id = p_squad_id;
+    IF v_price > p_budget THEN
+        RETURN QUERY SELECT 'over_budget'::VARCHAR, v_price, NULL::INTEGER, v_used;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_out_cyclist_id
+    ) AND selection_locked_race() IS NOT NULL THEN
+        RETURN QUERY SELECT 'selection_locked'::VARCHAR, NULL::FLOAT, NULL::INTEGER, v_used;
+        RETURN;
+    END IF;
+
+    UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id;
+
+    -- The incoming rider takes the outgoing rider's place, leader flags included
+    UPDATE squad_cyclists sc SET cyclist_id = p_in_cyclist_id
+    WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_out_cyclist_id;
+    UPDATE squad_selections ss SET cyclist_id = p_in_cyclist_id
+    WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_out_cyclist_id;
+
+    INSERT INTO squad_transfers (squad_id, out_cyclist_id, in_cyclist_id)
+    VALUES (p_squad_id, p_out_cyclist_id, p_in_cyclist_id)
+    RETURNING id INTO v_transfer_id;
+
+    RETURN QUERY SELECT NULL::VARCHAR, v_price, v_transfer_id, v_used + 1;
+END;
+$$;
+
+-- Take one rider out of a squad. Same squad lock and selection lock as the
+-- other roster writes; the rider's selection row goes with it, so a selection
+-- never names a rider outside the squad. Removing a rider is not a transfer.
+-- Returns one row; error is NULL when the rider was removed.
+CREATE OR REPLACE FUNCTION remove_squad_cyclist(
+    p_squad_id INTEGER,
+    p_user_id INTEGER,
+    p_cyclist_id INTEGER
+)
+RETURNS TABLE (
+    error VARCHAR,
+    removed INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_owner INTEGER;
+BEGIN
+    SELECT s.user_id INTO v_owner
+    FROM squads s
+    WHERE s.id = p_squad_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'squad_not_found'::VARCHAR, 0;
+        RETURN;
+    END IF;
+    IF v_owner <> p_user_id THEN
+        RETURN QUERY SELECT 'forbidden'::VARCHAR, 0;
+        RETURN;
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_cyclist_id
+    ) THEN
+        RETURN QUERY SELECT 'not_in_squad'::VARCHAR, 0;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_cyclist_id
+    ) AND selection_locked_race() IS NOT NULL THEN
+        RETURN QUERY SELECT 'selection_locked'::VARCHAR, 0;
+        RETURN;
+    END IF;
+
+    UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id;
+
+    RETURN QUERY
+    WITH unselected AS (
+        DELETE FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_cyclist_id
+    ),
+    removed_rows AS (
+        DELETE FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_cyclist_id
+        RETURNING 1
+    )
+    SELECT NULL::VARCHAR, (SELECT COUNT(*) FROM removed_rows)::INTEGER;
+END;
+$$;
@@ -23,6 +23,28 @@ SELECT
 FROM cyclists c
 JOIN teams t ON c.team_id = t.id;
 
+-- name: get_cyclists_version()$
+SELECT md5(COALESCE(
+    string_agg(id || ':' || first_name || ':' || last_name, ',' ORDER BY id), 
+    ''
+))
+FROM cyclists;
+
+-- name: get_cyclist_aliases(cyclists_version)
+SELECT alias, cyclist_id, score
+FROM cyclist_aliases
+WHERE cyclist_id IS NOT NULL 
+    OR cyclists_version = :cyclists_version;
+
+-- name: upsert_cyclist_alias(alias, cyclist_id, score, cyclists_version)*!
+INSERT INTO cyclist_aliases (alias, cyclist_id, score, cyclists_version)
+VALUES (:alias, :cyclist_id, :score, :cyclists_version)
+ON CONFLICT (alias) DO UPDATE 
+SET cyclist_id = EXCLUDED.cyclist_id, 
+    score = EXCLUDED.score,
+    cyclists_version = EXCLUDED.cyclists_version,
+    updated_on = CURRENT_TIMESTAMP;
+
 -- name: get_teams()
 SELECT id, name, code, image_url 
 FROM teams; 
@@ -38,10 +60,12 @@ JOIN teams t ON c.team_id = t.id
 WHERE c.id = :id;
 
 -- name: insert_race(name, year, start_timestamp, category, pcs_path, status)!
+-- A race that already started has no selections to freeze
 INSERT INTO races (
-    name, year, start_timestamp, category, pcs_path, status
+    name, year, start_timestamp, category, pcs_path, status, selections_frozen_at
 ) VALUES (
-    :name, :year, :start_timestamp, :category, :pcs_path, :status
+    :name, :year, :start_timestamp, :category, :pcs_path, :status,
+    CASE WHEN :start_timestamp <= CURRENT_TIMESTAMP THEN CURRENT_TIMESTAMP END
 )
 ON CONFLICT (name, year) DO NOTHING;
 
@@ -76,6 +100,34 @@ WHERE pcs_path IS NOT NULL
     AND status = 'planned' 
     AND year = :year 
 
+-- name: get_races_due_for_results(year, retry_after_minutes)
+-- Started races without stored results whose last attempt is old enough
+SELECT id, name, year, start_timestamp, category, pcs_path, status,
+    results_synced_at, last_sync_attempt_at
+FROM races r
+WHERE r.pcs_path IS NOT NULL 
+    AND r.status = 'planned' 
+    AND r.year = :year 
+    AND r.start_timestamp <= NOW()
+    AND (
+        r.last_sync_attempt_at IS NULL 
+        OR r.last_sync_attempt_at < NOW() - make_interval(mins => :retry_after_minutes)
+    )
+    AND NOT EXISTS (SELECT 1 FROM race_results rr WHERE rr.race_id = r.id)
+ORDER BY r.start_timestamp;
+
+-- name: mark_race_results_synced(id)!
+UPDATE races
+SET status = 'finished', 
+    results_synced_at = NOW(), 
+    last_sync_attempt_at = NOW()
+WHERE id = :id;
+
+-- name: record_race_sync_attempt(id)!
+UPDATE races
+SET last_sync_attempt_at = NOW()
+WHERE id = :id;
+
 -- name: insert_race_cyclist(race_id, cyclist_id)!
 INSERT INTO race_cyclists (race_id, cyclist_id)
 VALUES (:race_id, :cyclist_id)
@@ -91,6 +143,29 @@ JOIN cyclists c ON rc.cyclist_id = c.id
 JOIN teams t ON c.team_id = t.id
 WHERE rc.race_id = :race_id;
 
+-- name: replace_race_cyclists(race_id, cyclist_ids)^
+-- Diff the stored startlist against the new one: only riders who left are
+-- deleted and only new riders are inserted.
+WITH wanted AS (
+    SELECT DISTINCT unnest(CAST(:cyclist_ids AS INTEGER[])) AS cyclist_id
+),
+removed AS (
+    DELETE FROM race_cyclists rc
+    WHERE rc.race_id = :race_id
+        AND rc.cyclist_id NOT IN (SELECT cyclist_id FROM wanted)
+    RETURNING 1
+),
+added AS (
+    INSERT INTO race_cyclists (race_id, cyclist_id)
+    SELECT :race_id, cyclist_id 
+    FROM wanted
+    ON CONFLICT (race_id, cyclist_id) DO NOTHING
+    RETURNING 1
+)
+SELECT 
+    (SELECT COUNT(*) FROM added) AS added, 
+    (SELECT COUNT(*) FROM removed) AS removed;
+
 -- name: delete_race_cyclists(race_id)!
 DELETE FROM race_cyclists WHERE race_id = :race_id;
 
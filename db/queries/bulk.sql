@@ -0,0 +1,90 @@
+-- Staging tables for bulk ingestion. Rows are COPY'd into these and merged
+-- into the real tables with a single INSERT ... SELECT per entity.
+
+-- name: create_teams_stage#
+DROP TABLE IF EXISTS teams_stage;
+CREATE TEMP TABLE teams_stage (
+    code VARCHAR(10) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    image_url VARCHAR(255) NOT NULL
+) ON COMMIT DROP;
+
+-- name: merge_teams_stage()$
+WITH inserted AS (
+    INSERT INTO teams (code, name, image_url)
+    SELECT code, name, image_url 
+    FROM teams_stage
+    ON CONFLICT (code) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
+
+-- name: create_cyclists_stage#
+DROP TABLE IF EXISTS cyclists_stage;
+CREATE TEMP TABLE cyclists_stage (
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    price FLOAT NOT NULL,
+    birth_date DATE NOT NULL,
+    nationality VARCHAR(255) NOT NULL,
+    team_id INTEGER NOT NULL,
+    image_url VARCHAR(255) NOT NULL,
+    pcs_path VARCHAR(255)
+) ON COMMIT DROP;
+
+-- name: merge_cyclists_stage()$
+WITH inserted AS (
+    INSERT INTO cyclists (
+        first_name, last_name, team_id, price, 
+        birth_date, nationality, image_url, pcs_path
+    )
+    SELECT 
+        first_name, last_name, team_id, price, 
+        birth_date, nationality, image_url, pcs_path
+    FROM cyclists_stage
+    ON CONFLICT (first_name, last_name, team_id) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
+
+-- name: create_races_stage#
+DROP TABLE IF EXISTS races_stage;
+CREATE TEMP TABLE races_stage (
+    name VARCHAR(255) NOT NULL,
+    year INTEGER NOT NULL,
+    start_timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    pcs_path VARCHAR(255)
+) ON COMMIT DROP;
+
+-- name: merge_races_stage()$
+WITH inserted AS (
+    INSERT INTO races (
+        name, year, start_timestamp, category, pcs_path, status, selections_frozen_at
+    )
+    SELECT name, year, start_timestamp, category, pcs_path, status,
+        CASE WHEN start_timestamp <= CURRENT_TIMESTAMP THEN CURRENT_TIMESTAMP END
+    FROM races_stage
+    ON CONFLICT (name, year) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
+
+-- name: create_race_category_points_stage#
+DROP TABLE IF EXISTS race_category_points_stage;
+CREATE TEMP TABLE race_category_points_stage (
+    category VARCHAR(20) NOT NULL,
+    position INTEGER NOT NULL,
+    points INTEGER NOT NULL
+) ON COMMIT DROP;
+
+-- name: merge_race_category_points_stage()$
+WITH inserted AS (
+    INSERT INTO race_category_points (category, position, points)
+    SELECT category, position, points 
+    FROM race_category_points_stage
+    ON CONFLICT (category, position) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
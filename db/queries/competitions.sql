@@ -18,3 +18,95 @@ SELECT s.id, s.name, s.user_id
 FROM squads s
 JOIN competition_squads cs ON s.id = cs.squad_id
 WHERE cs.competition_id = :competition_id;
+
+-- name: refresh_competition_standings(race_id)$
+-- Re-rank every competition with a squad scored in the race. previous_rank keeps
+-- the rank from before this race, so re-scoring the same race keeps its movement.
+WITH affected AS (
+    SELECT DISTINCT cs.competition_id
+    FROM competition_squads cs
+    JOIN squad_race_scores srs ON srs.squad_id = cs.squad_id
+    WHERE srs.race_id = :race_id
+),
+ranked AS (
+    SELECT
+        cs.competition_id,
+        cs.squad_id,
+        COALESCE(ss.points, 0) AS points,
+        DENSE_RANK() OVER w_points AS rank,
+        ROW_NUMBER() OVER (PARTITION BY cs.competition_id ORDER BY COALESCE(ss.points, 0) DESC, cs.squad_id) AS position,
+        COALESCE(srs.points, 0) AS race_points
+    FROM competition_squads cs
+    JOIN affected a ON a.competition_id = cs.competition_id
+    LEFT JOIN squad_scores ss ON ss.squad_id = cs.squad_id
+    LEFT JOIN squad_race_scores srs ON srs.squad_id = cs.squad_id AND srs.race_id = :race_id
+    WINDOW w_points AS (PARTITION BY cs.competition_id ORDER BY COALESCE(ss.points, 0) DESC)
+),
+removed AS (
+    DELETE FROM competition_standings st
+    USING affected a
+    WHERE st.competition_id = a.competition_id
+        AND NOT EXISTS (
+            SELECT 1 FROM competition_squads cs
+            WHERE cs.competition_id = st.competition_id AND cs.squad_id = st.squad_id
+        )
+),
+upserted AS (
+    INSERT INTO competition_standings (
+        competition_id, squad_id, rank, position, points, previous_rank, race_id, race_points
+    )
+    SELECT competition_id, squad_id, rank, position, points, NULL, :race_id, race_points
+    FROM ranked
+    ON CONFLICT (competition_id, squad_id) DO UPDATE
+    SET previous_rank = CASE
+            WHEN competition_standings.race_id IS NOT DISTINCT FROM EXCLUDED.race_id
+            THEN competition_standings.previous_rank
+            ELSE competition_standings.rank
+        END,
+        rank = EXCLUDED.rank,
+        position = EXCLUDED.position,
+        points = EXCLUDED.points,
+        race_id = EXCLUDED.race_id,
+        race_points = EXCLUDED.race_points,
+        refreshed_on = CURRENT_TIMESTAMP
+    RETURNING 1
+)
+SELECT COUNT(*) FROM upserted;
+
+-- name: get_competition_standings_json(competition_id, first_position, last_position)$
+-- One page of the leaderboard, serialized by Postgres in the shape of models.competition.Leaderboard
+SELECT json_build_object(
+    'competition_id', CAST(:competition_id AS INTEGER),
+    'total', (
+        SELECT COALESCE(MAX(position), 0)
+        FROM competition_standings
+        WHERE competition_id = :competition_id
+    ),
+    'entries', COALESCE((
+        SELECT json_agg(json_build_object(
+            'rank', st.rank, 'position', st.position, 'squad_id', st.squad_id,
+            'squad_name', s.name, 'user_id', s.user_id, 'points', st.points,
+            'previous_rank', st.previous_rank, 'race_id', st.race_id, 'race_points', st.race_points,
+            'movement', COALESCE(st.previous_rank - st.rank, 0)
+        ) ORDER BY st.position)
+        FROM competition_standings st
+        JOIN squads s ON s.id = st.squad_id
+        WHERE st.competition_id = :competition_id
+            AND st.position BETWEEN :first_position AND :last_position
+    ), '[]')
+);
+
+-- name: get_competition_user_position(competition_id, user_id)$
+-- Best placed squad of the user in the competition
+SELECT MIN(st.position)
+FROM competition_standings st
+JOIN squads s ON s.id = st.squad_id
+WHERE st.competition_id = :competition_id AND s.user_id = :user_id;
+
+-- name: is_competition_member(competition_id, user_id)$
+SELECT EXISTS (
+    SELECT 1
+    FROM competition_squads cs
+    JOIN squads s ON s.id = cs.squad_id
+    WHERE cs.competition_id = :competition_id AND s.user_id = :user_id
+);
@@ -1,4 +1,19 @@
 -- name: insert_race_result(race_id, cyclist_id, position, info, cyclist_full_name)!
 INSERT INTO race_results ( race_id, cyclist_id, position, info, cyclist_full_name)
 VALUES ( :race_id, :cyclist_id, :position, :info, :cyclist_full_name )
-ON CONFLICT (race_id, position) DO NOTHING;
\ No newline at end of file
+ON CONFLICT (race_id, position) DO NOTHING;
+
+-- name: insert_race_results(race_id, cyclist_ids, positions, infos, cyclist_full_names)$
+WITH inserted AS (
+    INSERT INTO race_results (race_id, cyclist_id, position, info, cyclist_full_name)
+    SELECT :race_id, r.cyclist_id, r.position, r.info, r.cyclist_full_name
+    FROM unnest(
+        CAST(:cyclist_ids AS INTEGER[]), 
+        CAST(:positions AS INTEGER[]), 
+        CAST(:infos AS VARCHAR[]), 
+        CAST(:cyclist_full_names AS VARCHAR[])
+    ) AS r(cyclist_id, position, info, cyclist_full_name)
+    ON CONFLICT (race_id, position) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
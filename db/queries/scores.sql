@@ -0,0 +1,119 @@
+-- name: clear_race_cyclist_points(race_id)!
+DELETE FROM cyclist_race_points
+WHERE race_id = :race_id;
+
+-- name: score_race_cyclists(race_id)$
+-- Points per classified rider from the race category's points table
+WITH inserted AS (
+    INSERT INTO cyclist_race_points (race_id, cyclist_id, position, points)
+    SELECT DISTINCT ON (rr.cyclist_id) rr.race_id, rr.cyclist_id, rr.position, rcp.points
+    FROM race_results rr
+    JOIN races r ON r.id = rr.race_id
+    JOIN race_category_points rcp ON rcp.category = r.category AND rcp.position = rr.position
+    WHERE rr.race_id = :race_id AND rr.cyclist_id IS NOT NULL
+    ORDER BY rr.cyclist_id, rr.position
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted;
+
+-- name: score_race_squads(race_id, leader_multiplier)$
+-- Per-squad totals for the race, and the delta applied to each squad's season total.
+-- The frozen race selection is used where one exists, otherwise the current selection.
+WITH frozen AS (
+    SELECT squad_id, cyclist_id, is_leader
+    FROM squad_race_selections
+    WHERE race_id = :race_id
+),
+selection AS (
+    SELECT squad_id, cyclist_id, is_leader FROM frozen
+    UNION ALL
+    SELECT ss.squad_id, ss.cyclist_id, ss.is_leader
+    FROM squad_selections ss
+    WHERE NOT EXISTS (SELECT 1 FROM frozen f WHERE f.squad_id = ss.squad_id)
+),
+totals AS (
+    SELECT
+        s.squad_id,
+        COALESCE(SUM(p.points), 0) AS base_points,
+        COALESCE(SUM(p.points) FILTER (WHERE s.is_leader), 0) * (:leader_multiplier - 1) AS leader_bonus
+    FROM selection s
+    LEFT JOIN cyclist_race_points p ON p.race_id = :race_id AND p.cyclist_id = s.cyclist_id
+    GROUP BY s.squad_id
+),
+previous AS (
+    SELECT squad_id, points
+    FROM squad_race_scores
+    WHERE race_id = :race_id
+),
+upserted AS (
+    INSERT INTO squad_race_scores (squad_id, race_id, points, leader_bonus)
+    SELECT squad_id, :race_id, base_points + leader_bonus, leader_bonus
+    FROM totals
+    ON CONFLICT (squad_id, race_id) DO UPDATE
+    SET points = EXCLUDED.points,
+        leader_bonus = EXCLUDED.leader_bonus,
+        scored_on = CURRENT_TIMESTAMP
+    RETURNING squad_id, points
+),
+removed AS (
+    DELETE FROM squad_race_scores
+    WHERE race_id = :race_id AND squad_id NOT IN (SELECT squad_id FROM totals)
+    RETURNING squad_id, points
+),
+deltas AS (
+    SELECT squad_id, SUM(points) AS points, SUM(races) AS races
+    FROM (
+        SELECT u.squad_id, u.points - COALESCE(p.points, 0) AS points,
+            CASE WHEN p.squad_id IS NULL THEN 1 ELSE 0 END AS races
+        FROM upserted u
+        LEFT JOIN previous p ON p.squad_id = u.squad_id
+        UNION ALL
+        SELECT squad_id, -points, -1
+        FROM removed
+    ) d
+    GROUP BY squad_id
+),
+applied AS (
+    INSERT INTO squad_scores (squad_id, points, races_scored)
+    SELECT squad_id, points, races
+    FROM deltas
+    ON CONFLICT (squad_id) DO UPDATE
+    SET points = squad_scores.points + EXCLUDED.points,
+        races_scored = squad_scores.races_scored + EXCLUDED.races_scored,
+        updated_on = CURRENT_TIMESTAMP
+    RETURNING 1
+)
+SELECT COUNT(*) FROM upserted;
+
+-- name: mark_race_scored(id)!
+UPDATE races
+SET scored_at = NOW()
+WHERE id = :id;
+
+-- name: get_races_due_for_scoring(year)
+-- Finished races never scored, or whose results were re-synced since
+SELECT id, name
+FROM races
+WHERE year = :year
+    AND status = 'finished'
+    AND (scored_at IS NULL OR scored_at < results_synced_at)
+ORDER BY start_timestamp;
+
+-- name: get_squad_score(squad_id)^
+SELECT squad_id, points, races_scored, updated_on
+FROM squad_scores
+WHERE squad_id = :squad_id;
+
+-- name: get_squad_race_scores(squad_id)
+SELECT s.race_id, r.name AS race_name, r.start_timestamp, s.points, s.leader_bonus
+FROM squad_race_scores s
+JOIN races r ON r.id = s.race_id
+WHERE s.squad_id = :squad_id
+ORDER BY r.start_timestamp;
+
+-- name: get_cyclist_season_points(year)
+SELECT p.cyclist_id, SUM(p.points) AS points
+FROM cyclist_race_points p
+JOIN races r ON r.id = p.race_id
+WHERE r.year = :year
+GROUP BY p.cyclist_id;
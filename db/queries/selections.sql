@@ -1,18 +1,24 @@
--- name: get_squad_selection(squad_id)
-SELECT c.id, c.first_name, c.last_name, c.team_id, c.price, 
-    c.birth_date, c.nationality, c.image_url,
-    t.name AS team_name, t.code AS team_code, 
-    t.image_url AS team_image_url, ss.is_leader
+-- name: get_squad_selection_json(squad_id)$
+-- Serialized by Postgres in the shape of models.selection.SelectionCyclist
+SELECT COALESCE(json_agg(json_build_object(
+    'id', c.id, 'first_name', c.first_name, 'last_name', c.last_name, 'price', c.price,
+    'birth_date', c.birth_date, 'nationality', c.nationality, 'team_id', c.team_id,
+    'team_name', t.name, 'team_code', t.code, 'team_image_url', t.image_url,
+    'image_url', c.image_url, 'is_participating', NULL, 'is_leader', ss.is_leader,
+    'age', date_part('year', age(CURRENT_DATE, c.birth_date))::INTEGER,
+    'full_name', c.last_name || ' ' || c.first_name
+)), '[]')
 FROM squad_selections ss
 JOIN cyclists c ON ss.cyclist_id = c.id
 JOIN teams t ON c.team_id = t.id
 WHERE ss.squad_id = :squad_id;
 
--- name: insert_squad_selection(squad_id, cyclist_id, is_leader)!
-INSERT INTO squad_selections (squad_id, cyclist_id, is_leader)
-VALUES (:squad_id, :cyclist_id, :is_leader)
-ON CONFLICT (squad_id, cyclist_id) DO 
-UPDATE SET is_leader = EXCLUDED.is_leader;
+-- name: save_squad_selection(squad_id, user_id, cyclist_ids, leaders, selection_size)^
+-- Ownership, membership and the diffed write in one call, see the migration
+SELECT error, cyclist_ids, added, removed, updated
+FROM save_squad_selection(
+    :squad_id, :user_id, CAST(:cyclist_ids AS INTEGER[]), CAST(:leaders AS BOOLEAN[]), :selection_size
+);
 
 -- name: delete_squad_selection_cyclist(squad_id, cyclist_id)!
 DELETE FROM squad_selections
@@ -20,4 +26,42 @@ WHERE squad_id = :squad_id AND cyclist_id = :cyclist_id;
 
 -- name: delete_squad_selection(squad_id)!
 DELETE FROM squad_selections
-WHERE squad_id = :squad_id;
\ No newline at end of file
+WHERE squad_id = :squad_id;
+
+-- name: get_due_selection_deadlines()
+-- Races that started and still hold the live selections, oldest first
+SELECT id
+FROM races
+WHERE selections_frozen_at IS NULL AND start_timestamp <= CURRENT_TIMESTAMP
+ORDER BY start_timestamp;
+
+-- name: freeze_race_selections(race_id)$
+-- Snapshot every squad's selection for the race in one statement. Only the
+-- caller that marks the race frozen inserts, so a second freeze is a no-op.
+WITH race AS (
+    UPDATE races
+    SET selections_frozen_at = CURRENT_TIMESTAMP
+    WHERE id = :race_id AND selections_frozen_at IS NULL
+    RETURNING id
+),
+frozen AS (
+    INSERT INTO squad_race_selections (squad_id, race_id, cyclist_id, is_leader)
+    SELECT ss.squad_id, race.id, ss.cyclist_id, ss.is_leader
+    FROM race
+    CROSS JOIN squad_selections ss
+    ON CONFLICT (squad_id, race_id, cyclist_id) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM frozen;
+
+-- name: get_selection_locked_race()$
+SELECT selection_locked_race();
+
+-- name: get_competition_rosters(competition_id)
+-- One row per squad keeps a 3000-squad competition to 3000 rows
+SELECT sc.squad_id, ARRAY_AGG(sc.cyclist_id) AS cyclist_ids
+FROM competition_squads cs
+JOIN squad_cyclists sc ON sc.squad_id = cs.squad_id
+WHERE cs.competition_id = :competition_id
+GROUP BY sc.squad_id
+ORDER BY sc.squad_id;
@@ -0,0 +1,39 @@
+-- name: get_result_history()
+-- Every finish we know of per rider; 0 for unclassified (DNF, DNS, ...)
+SELECT cyclist_id, COALESCE(position, 0) AS position
+FROM race_results
+WHERE cyclist_id IS NOT NULL;
+
+-- name: get_result_race_count()$
+SELECT COUNT(DISTINCT race_id)
+FROM race_results;
+
+-- name: get_upcoming_races(year)
+SELECT id, name, category, start_timestamp
+FROM races
+WHERE year = :year
+    AND status = 'planned'
+    AND start_timestamp > NOW()
+ORDER BY start_timestamp;
+
+-- name: get_startlists(race_ids)
+SELECT race_id, cyclist_id
+FROM race_cyclists
+WHERE race_id = ANY(CAST(:race_ids AS INTEGER[]));
+
+-- name: get_category_points()
+SELECT category, position, points
+FROM race_category_points;
+
+-- name: get_squad_projection_cyclists(squad_id)
+-- The squad's selection when it has one, otherwise its whole roster
+WITH selection AS (
+    SELECT cyclist_id, is_leader
+    FROM squad_selections
+    WHERE squad_id = :squad_id
+)
+SELECT cyclist_id, is_leader FROM selection
+UNION ALL
+SELECT cyclist_id, FALSE
+FROM squad_cyclists
+WHERE squad_id = :squad_id AND NOT EXISTS (SELECT 1 FROM selection);
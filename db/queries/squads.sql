@@ -27,13 +27,31 @@ JOIN teams t ON c.team_id = t.id
 LEFT JOIN race_cyclists rc ON c.id = rc.cyclist_id AND rc.race_id = :race_id
 WHERE s.id = :squad_id;
 
+-- name: get_squad_cyclists_json(squad_id, race_id)$
+-- Same rows as get_squad_cyclists, serialized by Postgres for the GET endpoint.
+-- age and full_name mirror the computed fields of models.cyclist.Cyclist
+SELECT COALESCE(json_agg(json_build_object(
+    'id', c.id, 'first_name', c.first_name, 'last_name', c.last_name, 'price', c.price,
+    'birth_date', c.birth_date, 'nationality', c.nationality, 'team_id', c.team_id,
+    'team_name', t.name, 'team_code', t.code, 'team_image_url', t.image_url,
+    'image_url', c.image_url, 'is_participating', rc.cyclist_id IS NOT NULL,
+    'age', date_part('year', age(CURRENT_DATE, c.birth_date))::INTEGER,
+    'full_name', c.last_name || ' ' || c.first_name
+)), '[]')
+FROM squad_cyclists sc
+JOIN cyclists c ON sc.cyclist_id = c.id
+JOIN teams t ON c.team_id = t.id
+LEFT JOIN race_cyclists rc ON c.id = rc.cyclist_id AND rc.race_id = :race_id
+WHERE sc.squad_id = :squad_id;
+
 -- name: add_cyclist(squad_id, cyclist_id)!
 INSERT INTO squad_cyclists (squad_id, cyclist_id)
 VALUES (:squad_id, :cyclist_id);
 
--- name: remove_cyclist(squad_id, cyclist_id)!
-DELETE FROM squad_cyclists
-WHERE squad_id = :squad_id AND cyclist_id = :cyclist_id;
+-- name: remove_squad_cyclist(squad_id, user_id, cyclist_id)^
+-- Ownership and selection lock checks and the delete in one call, see the migration
+SELECT error, removed
+FROM remove_squad_cyclist(:squad_id, :user_id, :cyclist_id);
 
 -- name: remove_cyclists(squad_id)!
 DELETE FROM squad_cyclists
@@ -48,8 +66,12 @@ WHERE c.id = ANY(:squad_ids);
 DELETE FROM squads
 WHERE id = :squad_id;
 
+-- name: replace_squad_cyclists(squad_id, user_id, cyclist_ids, squad_size, budget, window_quota)^
+-- Ownership, size, quota and budget checks and the write in one call, see the migration
+SELECT error, price, cyclist_ids, added, removed, transfers_used
+FROM replace_squad_cyclists(:squad_id, :user_id, CAST(:cyclist_ids AS INTEGER[]), :squad_size, :budget, :window_quota);
 
-
-
-
-
+-- name: transfer_squad_cyclist(squad_id, user_id, out_cyclist_id, in_cyclist_id, budget, window_quota)^
+-- One-for-one swap with quota and budget checks, see the migration
+SELECT error, price, transfer_id, transfers_used
+FROM transfer_squad_cyclist(:squad_id, :user_id, :out_cyclist_id, :in_cyclist_id, :budget, :window_quota);
@@ -7,3 +7,8 @@ RETURNING id;
 SELECT id, username, first_name, last_name, email, password_hash
 FROM users
 WHERE email = :email;
+
+-- name: update_user_password_hash(id, password_hash)!
+UPDATE users
+SET password_hash = :password_hash
+WHERE id = :id;
@@ -1,18 +1,42 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from db.database import db
+from repositories.base_repository import BaseRepository
+from services.http_client import http_client
+from services.pcs_parser import parser_pool
+from services.job_runner import job_runner
+from services.password_hasher import password_hasher
+from services.reference_cache import reference_cache
+from services.selection_deadline import selection_deadline
 from routers.sync_router import router as sync_router
 from routers.base_router import router as base_router
 from routers.competition_router import router as competition_router
 from routers.auth_router import router as auth_router
 from routers.squad_router import router as squad_router
 from routers.selection_router import router as selection_router
+from routers.simulation_router import router as simulation_router
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.connect()
+    try:
+        async with db.acquire() as conn:
+            await reference_cache.warm(BaseRepository(conn))
+    except Exception as e:
+        logger.warning(f"Could not warm reference data cache: {e}")
+    await http_client.connect()
+    parser_pool.start()
+    password_hasher.start()
+    await job_runner.start()
+    await selection_deadline.start()
     yield
+    await selection_deadline.stop()
+    await job_runner.stop()
+    password_hasher.shutdown()
+    parser_pool.shutdown()
+    await http_client.disconnect()
     await db.disconnect()
 
 
@@ -23,6 +47,7 @@ app.include_router(competition_router)
 app.include_router(auth_router)
 app.include_router(squad_router)
 app.include_router(selection_router)
+app.include_router(simulation_router)
 #Add cors middleware
 
 app.add_middleware(
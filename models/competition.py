@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 class Competition(BaseModel):
     id: int
@@ -8,4 +8,29 @@ class Competition(BaseModel):
 
 class CompetitionRequest(BaseModel):
     name: str
-    created_by: int | None = None
\ No newline at end of file
+    created_by: int | None = None
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    position: int
+    squad_id: int
+    squad_name: str
+    user_id: int
+    points: int
+    previous_rank: int | None = None
+    race_id: int | None = None
+    race_points: int = 0
+
+    @computed_field
+    @property
+    def movement(self) -> int:
+        # Places gained (positive) or lost (negative) with the last scored race
+        if self.previous_rank is None:
+            return 0
+        return self.previous_rank - self.rank
+
+
+class Leaderboard(BaseModel):
+    competition_id: int
+    total: int
+    entries: list[LeaderboardEntry]
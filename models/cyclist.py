@@ -11,6 +11,12 @@ class CyclistCreate(BaseModel):
     image_url: str
     pcs_path: str | None = None
 
+class CyclistAlias(BaseModel):
+    alias: str
+    cyclist_id: int | None = None
+    score: float
+    cyclists_version: str | None = None
+
 class Cyclist(BaseModel):
     id: int
     first_name: str
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Any
+from pydantic import BaseModel, computed_field
+
+class JobKind(StrEnum):
+    SYNC = "sync"
+    RACES = "races"
+    RESULTS = "results"
+    STARTLIST = "startlist"
+    SCORES = "scores"
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(BaseModel):
+    id: str
+    kind: JobKind
+    status: JobStatus = JobStatus.QUEUED
+    params: dict[str, Any] = {}
+    progress_done: int = 0
+    progress_total: int | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    result: Any = None
+    error: str | None = None
+    
+    @computed_field
+    @property
+    def duration_seconds(self) -> float | None:
+        if not self.started_at:
+            return None
+        end = self.finished_at or datetime.now(self.started_at.tzinfo)
+        return (end - self.started_at).total_seconds()
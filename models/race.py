@@ -27,7 +27,12 @@ class Race(BaseModel):
     start_timestamp: datetime
     category: RaceCategory
     status: RaceStatus
-    pcs_path: str | None = None    
+    pcs_path: str | None = None
+
+class SyncRace(Race):
+    # Result sync bookkeeping, only selected by get_races_due_for_results
+    results_synced_at: datetime | None = None
+    last_sync_attempt_at: datetime | None = None
     
 class RaceCategoryPointsCreate(BaseModel):
     category: RaceCategory
@@ -0,0 +1,22 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class RaceScoring(BaseModel):
+    race_id: int
+    cyclists_scored: int
+    squads_scored: int
+    standings_refreshed: int = 0
+
+class SquadRaceScore(BaseModel):
+    race_id: int
+    race_name: str
+    start_timestamp: datetime
+    points: int
+    leader_bonus: int
+
+class SquadScore(BaseModel):
+    squad_id: int
+    points: int = 0
+    races_scored: int = 0
+    updated_on: datetime | None = None
+    races: list[SquadRaceScore] = []
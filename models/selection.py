@@ -1,3 +1,4 @@
+from enum import StrEnum
 from pydantic import BaseModel
 from models.cyclist import Cyclist
 
@@ -7,4 +8,34 @@ class CreateSquadSelection(BaseModel):
     is_leader: bool
     
 class SelectionCyclist(Cyclist):
-    is_leader: bool
\ No newline at end of file
+    is_leader: bool
+
+class SelectionUpdateError(StrEnum):
+    SQUAD_NOT_FOUND = "squad_not_found"
+    FORBIDDEN = "forbidden"
+    DUPLICATE_CYCLISTS = "duplicate_cyclists"
+    WRONG_SELECTION_SIZE = "wrong_selection_size"
+    LEADER_COUNT = "leader_count"
+    NOT_IN_SQUAD = "not_in_squad"
+    SELECTION_LOCKED = "selection_locked"
+
+class SelectionUpdate(BaseModel):
+    error: SelectionUpdateError | None = None
+    cyclist_ids: list[int] | None = None
+    added: int = 0
+    removed: int = 0
+    updated: int = 0
+
+class RecommendedCyclist(BaseModel):
+    cyclist_id: int
+    expected_points: float
+    is_participating: bool
+    is_leader: bool
+
+class SelectionRecommendation(BaseModel):
+    squad_id: int
+    race_id: int
+    race_name: str
+    startlist: bool
+    expected_points: float
+    cyclists: list[RecommendedCyclist]
@@ -0,0 +1,36 @@
+import math
+from pydantic import BaseModel, computed_field
+
+class CyclistProjection(BaseModel):
+    cyclist_id: int
+    full_name: str
+    team_name: str
+    price: float
+    expected_points: float
+    variance: float
+    is_leader: bool = False
+
+    @computed_field
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
+
+class SeasonProjection(BaseModel):
+    year: int
+    races: int
+    simulations: int
+    cyclists: list[CyclistProjection]
+
+class SquadProjection(BaseModel):
+    squad_id: int
+    year: int
+    races: int
+    simulations: int
+    expected_points: float
+    variance: float
+    cyclists: list[CyclistProjection]
+
+    @computed_field
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
@@ -1,3 +1,4 @@
+from enum import StrEnum
 from pydantic import BaseModel
 
 class SquadBase(BaseModel):
@@ -12,3 +13,60 @@ class Squad(BaseModel):
 class CreateSquadRequest(SquadBase):
     pass
 
+class SquadUpdateError(StrEnum):
+    SQUAD_NOT_FOUND = "squad_not_found"
+    FORBIDDEN = "forbidden"
+    DUPLICATE_CYCLISTS = "duplicate_cyclists"
+    TOO_MANY_CYCLISTS = "too_many_cyclists"
+    UNKNOWN_CYCLISTS = "unknown_cyclists"
+    OVER_BUDGET = "over_budget"
+    SELECTION_LOCKED = "selection_locked"
+    SAME_CYCLIST = "same_cyclist"
+    NOT_IN_SQUAD = "not_in_squad"
+    ALREADY_IN_SQUAD = "already_in_squad"
+    TRANSFER_LIMIT = "transfer_limit"
+
+class SquadUpdate(BaseModel):
+    error: SquadUpdateError | None = None
+    price: float | None = None
+    cyclist_ids: list[int] | None = None
+    added: int = 0
+    removed: int = 0
+    transfers_used: int = 0
+
+class SquadTransferRequest(BaseModel):
+    out_cyclist_id: int
+    in_cyclist_id: int
+
+class SquadTransfer(BaseModel):
+    error: SquadUpdateError | None = None
+    price: float | None = None
+    transfer_id: int | None = None
+    transfers_used: int = 0
+
+class SquadValueMetric(StrEnum):
+    HISTORICAL = "historical"
+    EXPECTED = "expected"
+
+class SquadSuggestionRequest(BaseModel):
+    metric: SquadValueMetric = SquadValueMetric.EXPECTED
+    locked: list[int] = []
+    excluded: list[int] = []
+
+class SuggestedCyclist(BaseModel):
+    cyclist_id: int
+    full_name: str
+    team_name: str
+    price: float
+    value: float
+    locked: bool = False
+
+class SquadSuggestion(BaseModel):
+    metric: SquadValueMetric
+    value: float
+    price: float
+    budget: float
+    optimal: bool
+    candidates: int
+    elapsed_ms: float
+    cyclists: list[SuggestedCyclist]
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class IngestResult(BaseModel):
+    entity: str
+    inserted: int
+    skipped: int
@@ -17,8 +17,12 @@ class UserLogin(BaseModel):
     password: str
 
 
-class User(UserBase):
+class CurrentUser(UserBase):
+    # What get_current_user resolves and caches, without the password hash
     id: int
+
+
+class User(CurrentUser):
     password_hash: str
 
     class Config:
@@ -4,14 +4,56 @@ from datetime import datetime, timezone
 from asyncpg import Connection
 from fastapi import Depends
 from db.loader import queries
-from models.cyclist import Cyclist, CyclistCreate
-from models.race import Race, RaceCategoryPointsCreate, RaceCreate
+from models.cyclist import Cyclist, CyclistAlias, CyclistCreate
+from models.race import Race, RaceCategoryPointsCreate, RaceCreate, SyncRace
+from models.sync import IngestResult
 from models.team import Team, TeamCreate
-from db.database import db
+from db.database import db, LazyConnection
+
+def _localize_start(row) -> dict:
+    data = dict(row)
+    ts = data.get("start_timestamp")
+    if ts is not None:
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        data["start_timestamp"] = ts.astimezone()
+    return data
 
 @dataclass
 class BaseRepository:
-    conn: Connection
+    conn: Connection | LazyConnection
+    
+    def transaction(self):
+        return self.conn.transaction()
+    
+    async def _bulk_insert(self, entity: str, items: list, create_stage, merge_stage) -> IngestResult:
+        # COPY the rows into a temp staging table, then merge them with one INSERT ... SELECT
+        if not items:
+            return IngestResult(entity=entity, inserted=0, skipped=0)
+        columns = list(type(items[0]).model_fields)
+        records = [tuple(item.model_dump().values()) for item in items]
+        async with self.conn.transaction():
+            await create_stage(self.conn)
+            await self.conn.copy_records_to_table(f"{entity}_stage", records=records, columns=columns)
+            inserted = await merge_stage(self.conn)
+        return IngestResult(entity=entity, inserted=inserted, skipped=len(items) - inserted)
+    
+    async def bulk_insert_teams(self, teams: list[TeamCreate]) -> IngestResult:
+        return await self._bulk_insert("teams", teams, queries.create_teams_stage, queries.merge_teams_stage)
+    
+    async def bulk_insert_cyclists(self, cyclists: list[CyclistCreate]) -> IngestResult:
+        return await self._bulk_insert("cyclists", cyclists, queries.create_cyclists_stage, queries.merge_cyclists_stage)
+    
+    async def bulk_insert_races(self, races: list[RaceCreate]) -> IngestResult:
+        return await self._bulk_insert("races", races, queries.create_races_stage, queries.merge_races_stage)
+    
+    async def bulk_insert_race_category_points(self, points: list[RaceCategoryPointsCreate]) -> IngestResult:
+        return await self._bulk_insert(
+            "race_category_points",
+            points,
+            queries.create_race_category_points_stage,
+            queries.merge_race_category_points_stage,
+        )
     
     async def insert_team(self, team: TeamCreate):
         team_dict = team.model_dump()
@@ -29,6 +71,16 @@ class BaseRepository:
         rows = queries.get_cyclists(self.conn)
         return [Cyclist.model_validate(dict(row)) async for row in rows]
     
+    async def get_cyclists_version(self) -> str:
+        return await queries.get_cyclists_version(self.conn)
+    
+    async def get_cyclist_aliases(self, cyclists_version: str) -> list[CyclistAlias]:
+        rows = queries.get_cyclist_aliases(self.conn, cyclists_version=cyclists_version)
+        return [CyclistAlias.model_validate(dict(row)) async for row in rows]
+    
+    async def upsert_cyclist_aliases(self, aliases: list[CyclistAlias]):
+        await queries.upsert_cyclist_alias(self.conn, [alias.model_dump() for alias in aliases])
+    
     async def insert_race(self, race: RaceCreate):
         race_dict = race.model_dump()
         await queries.insert_race(self.conn, **race_dict)
@@ -36,17 +88,7 @@ class BaseRepository:
     async def get_races(self) -> list[Race]:
         year = settings.YEAR
         rows = queries.get_races(self.conn, year=year)
-        races: list[Race] = []
-        async for row in rows:
-            data = dict(row)
-            ts = data.get("start_timestamp")
-            if ts is not None:
-                if ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-                data["start_timestamp"] = ts.astimezone()
-            races.append(Race.model_validate(data))
-
-        return races
+        return [Race.model_validate(_localize_start(row)) async for row in rows]
         
     async def insert_race_category_points(self, race_category_points: RaceCategoryPointsCreate):
         race_category_points_dict = race_category_points.model_dump()
@@ -54,21 +96,21 @@ class BaseRepository:
         
     async def get_pcs_races(self, year: int) -> list[Race]:
         rows = queries.get_pcs_races(self.conn, year=year)
-        races: list[Race] = []
-        async for row in rows:
-            data = dict(row)
-            ts = data.get("start_timestamp")
-            if ts is not None:
-                if ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-                data["start_timestamp"] = ts.astimezone()
-            races.append(Race.model_validate(data))
-
-        return races
+        return [Race.model_validate(_localize_start(row)) async for row in rows]
     
     async def update_race_status(self, race_id: int, status: str):
         await queries.update_race_status(self.conn, id=race_id, status=status)
 
+    async def get_races_due_for_results(self, year: int, retry_after_minutes: int) -> list[SyncRace]:
+        rows = queries.get_races_due_for_results(self.conn, year=year, retry_after_minutes=retry_after_minutes)
+        return [SyncRace.model_validate(_localize_start(row)) async for row in rows]
+
+    async def mark_race_results_synced(self, race_id: int):
+        await queries.mark_race_results_synced(self.conn, id=race_id)
+
+    async def record_race_sync_attempt(self, race_id: int):
+        await queries.record_race_sync_attempt(self.conn, id=race_id)
+
     async def insert_race_cyclist(self, race_id: int, cyclist_id: int):
         await queries.insert_race_cyclist(self.conn, race_id=race_id, cyclist_id=cyclist_id)
 
@@ -76,20 +118,17 @@ class BaseRepository:
         rows = queries.get_race_cyclists(self.conn, race_id=race_id)
         return [Cyclist.model_validate(dict(row)) async for row in rows]
 
+    async def replace_race_cyclists(self, race_id: int, cyclist_ids: list[int]) -> tuple[int, int]:
+        row = await queries.replace_race_cyclists(self.conn, race_id=race_id, cyclist_ids=cyclist_ids)
+        return row["added"], row["removed"]
+
     async def delete_race_cyclists(self, race_id: int):
         await queries.delete_race_cyclists(self.conn, race_id=race_id)
 
-    async def get_next_race(self) -> Race:
+    async def get_next_race(self) -> Race | None:
         row = await queries.get_next_race(self.conn)
-        data = dict(row)
-        ts = data.get("start_timestamp")
-        if ts is not None:
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            data["start_timestamp"] = ts.astimezone()
-
-        return Race.model_validate(data)   
+        return Race.model_validate(_localize_start(row)) if row else None
 
 
-def get_base_repository(conn: Connection = Depends(db.get_connection)) -> BaseRepository:
+def get_base_repository(conn: LazyConnection = Depends(db.get_connection, scope="function")) -> BaseRepository:
     return BaseRepository(conn)
\ No newline at end of file
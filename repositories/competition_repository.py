@@ -3,11 +3,11 @@ from models.competition import Competition
 from db.loader import queries
 from asyncpg import Connection
 from fastapi import Depends
-from db.database import db
+from db.database import db, LazyConnection
 
 @dataclass
 class CompetitionRepository:
-    conn: Connection | None = None
+    conn: Connection | LazyConnection | None = None
 
     async def insert_competition(self, competition: Competition):
         await queries.insert_competition(
@@ -24,8 +24,37 @@ class CompetitionRepository:
         row = await queries.get_competition_by_name(self.conn, name=name)
         return Competition.model_validate(row)
 
+    async def _get_leaderboard_json(self, competition_id: int, first_position: int, last_position: int) -> str:
+        try:
+            return await queries.get_competition_standings_json(
+                self.conn,
+                competition_id=competition_id,
+                first_position=first_position,
+                last_position=last_position,
+            )
+        except Exception as e:
+            raise Exception(f"Failed to get leaderboard: {str(e)}")
+
+    async def get_leaderboard_json(self, competition_id: int, page: int, page_size: int) -> str:
+        first_position = (page - 1) * page_size + 1
+        return await self._get_leaderboard_json(competition_id, first_position, first_position + page_size - 1)
+
+    async def get_leaderboard_around_user_json(self, competition_id: int, user_id: int, radius: int) -> str | None:
+        position = await queries.get_competition_user_position(
+            self.conn, competition_id=competition_id, user_id=user_id
+        )
+        if position is None:
+            return None
+        return await self._get_leaderboard_json(competition_id, max(position - radius, 1), position + radius)
+
+    async def is_competition_member(self, competition_id: int, user_id: int) -> bool:
+        try:
+            return await queries.is_competition_member(self.conn, competition_id=competition_id, user_id=user_id)
+        except Exception as e:
+            raise Exception(f"Failed to check competition membership: {str(e)}")
+
 def get_competition_repository(
-    conn: Connection=Depends(db.get_connection)
+    conn: LazyConnection = Depends(db.get_connection, scope="function")
 ) -> CompetitionRepository:
     return CompetitionRepository(conn)
 
@@ -4,19 +4,29 @@ from asyncpg import Connection
 from fastapi import Depends
 from models.result import RaceResultCreate
 from db.loader import queries
-from db.database import db
+from db.database import db, LazyConnection
 
 @dataclass
 class ResultRepository:
-    conn: Connection
+    conn: Connection | LazyConnection
     
     async def insert_race_result(self, race_result: RaceResultCreate):
         race_result_dict = race_result.model_dump()
         await queries.insert_race_result(self.conn, **race_result_dict)
 
+    async def insert_race_results(self, race_id: int, race_results: list[RaceResultCreate]) -> int:
+        return await queries.insert_race_results(
+            self.conn,
+            race_id=race_id,
+            cyclist_ids=[r.cyclist_id for r in race_results],
+            positions=[r.position for r in race_results],
+            infos=[r.info for r in race_results],
+            cyclist_full_names=[r.cyclist_full_name for r in race_results],
+        )
+
     async def get_race_results(self, race_id: int) -> list[RaceResult]:
         rows = queries.get_race_results(self.conn, race_id=race_id)
         return [RaceResult.model_validate(dict(row)) async for row in rows]
         
-def get_result_repository(conn: Connection=Depends(db.get_connection)) -> ResultRepository:
+def get_result_repository(conn: LazyConnection = Depends(db.get_connection, scope="function")) -> ResultRepository:
     return ResultRepository(conn)
\ No newline at end of file
@@ -0,0 +1,52 @@
+from asyncpg import Connection
+from dataclasses import dataclass
+from fastapi import Depends
+from config import settings
+from db.database import db, LazyConnection
+from db.loader import queries
+from models.score import RaceScoring, SquadRaceScore, SquadScore
+
+
+@dataclass
+class ScoreRepository:
+    conn: Connection | LazyConnection
+
+    async def score_race(self, race_id: int) -> RaceScoring:
+        # Re-scoring a race replaces its rows and moves each squad total by the difference
+        async with self.conn.transaction():
+            await queries.clear_race_cyclist_points(self.conn, race_id=race_id)
+            cyclists = await queries.score_race_cyclists(self.conn, race_id=race_id)
+            squads = await queries.score_race_squads(
+                self.conn, race_id=race_id, leader_multiplier=settings.LEADER_POINTS_MULTIPLIER
+            )
+            standings = await queries.refresh_competition_standings(self.conn, race_id=race_id)
+            await queries.mark_race_scored(self.conn, id=race_id)
+        return RaceScoring(
+            race_id=race_id, cyclists_scored=cyclists, squads_scored=squads, standings_refreshed=standings
+        )
+
+    async def get_races_due_for_scoring(self, year: int) -> list[tuple[int, str]]:
+        rows = queries.get_races_due_for_scoring(self.conn, year=year)
+        return [(row["id"], row["name"]) async for row in rows]
+
+    async def get_cyclist_season_points(self, year: int) -> dict[int, int]:
+        rows = queries.get_cyclist_season_points(self.conn, year=year)
+        return {row["cyclist_id"]: row["points"] async for row in rows}
+
+    async def get_squad_score(self, squad_id: int) -> SquadScore:
+        try:
+            row = await queries.get_squad_score(self.conn, squad_id=squad_id)
+            score = SquadScore.model_validate(dict(row)) if row else SquadScore(squad_id=squad_id)
+            score.races = [
+                SquadRaceScore.model_validate(dict(row))
+                async for row in queries.get_squad_race_scores(self.conn, squad_id=squad_id)
+            ]
+            return score
+        except Exception as e:
+            raise Exception(f"Failed to get squad score: {str(e)}")
+
+
+def get_score_repository(
+    conn: LazyConnection = Depends(db.get_connection, scope="function"),
+) -> ScoreRepository:
+    return ScoreRepository(conn)
@@ -2,28 +2,34 @@ from asyncpg import Connection
 from fastapi import Depends
 from db.loader import queries
 from dataclasses import dataclass
-from db.database import db
-from models.selection import SelectionCyclist
+from db.database import db, LazyConnection
+from models.selection import CreateSquadSelection, SelectionUpdate
 
 @dataclass
 class SelectionRepository:
-    conn: Connection | None = None
+    conn: Connection | LazyConnection | None = None
 
-    async def get_squad_selection(self, squad_id: int) -> list[SelectionCyclist]:
+    async def get_squad_selection_json(self, squad_id: int) -> str:
         try:
-            rows = queries.get_squad_selection(self.conn, squad_id=squad_id)
-            if not rows:
-                return []
-            
-            return [SelectionCyclist.model_validate(dict(row)) async for row in rows]
+            return await queries.get_squad_selection_json(self.conn, squad_id=squad_id)
         except Exception as e:
             raise Exception(f"Failed to get squad selections: {str(e)}")
         
-    async def insert_squad_selection(self, squad_id: int, cyclist_id: int, is_leader: bool) -> None:
+    async def save_squad_selection(
+        self, squad_id: int, user_id: int, selection: list[CreateSquadSelection], selection_size: int
+    ) -> SelectionUpdate:
         try:
-            await queries.insert_squad_selection(self.conn, squad_id=squad_id, cyclist_id=cyclist_id, is_leader=is_leader)
+            row = await queries.save_squad_selection(
+                self.conn,
+                squad_id=squad_id,
+                user_id=user_id,
+                cyclist_ids=[cyclist.cyclist_id for cyclist in selection],
+                leaders=[cyclist.is_leader for cyclist in selection],
+                selection_size=selection_size,
+            )
+            return SelectionUpdate.model_validate(dict(row))
         except Exception as e:
-            raise Exception(f"Failed to insert squad selection: {str(e)}")
+            raise Exception(f"Failed to save squad selection: {str(e)}")
         
     async def delete_squad_selection_cyclist(self, squad_id: int, cyclist_id: int) -> None:
         try:
@@ -37,9 +43,35 @@ class SelectionRepository:
         
         except Exception as e:
             raise Exception(f"Failed to delete squad selection: {str(e)}")
-    
+
+    async def get_due_selection_deadlines(self) -> list[int]:
+        try:
+            rows = queries.get_due_selection_deadlines(self.conn)
+            return [row["id"] async for row in rows]
+        except Exception as e:
+            raise Exception(f"Failed to get due selection deadlines: {str(e)}")
+
+    async def freeze_race_selections(self, race_id: int) -> int:
+        try:
+            return await queries.freeze_race_selections(self.conn, race_id=race_id)
+        except Exception as e:
+            raise Exception(f"Failed to freeze race selections: {str(e)}")
+
+    async def get_selection_locked_race(self) -> int | None:
+        try:
+            return await queries.get_selection_locked_race(self.conn)
+        except Exception as e:
+            raise Exception(f"Failed to get selection locked race: {str(e)}")
+
+    async def get_competition_rosters(self, competition_id: int) -> list[tuple[int, list[int]]]:
+        try:
+            rows = queries.get_competition_rosters(self.conn, competition_id=competition_id)
+            return [(row["squad_id"], row["cyclist_ids"]) async for row in rows]
+        except Exception as e:
+            raise Exception(f"Failed to get competition rosters: {str(e)}")
+
 
 def get_selection_repository(
-    conn: Connection = Depends(db.get_connection)
+    conn: LazyConnection = Depends(db.get_connection, scope="function")
 ) -> SelectionRepository:
     return SelectionRepository(conn)
\ No newline at end of file
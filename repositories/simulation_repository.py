@@ -0,0 +1,46 @@
+from asyncpg import Connection
+from dataclasses import dataclass
+from fastapi import Depends
+from db.database import db, LazyConnection
+from db.loader import queries
+
+
+@dataclass
+class SimulationRepository:
+    conn: Connection | LazyConnection
+
+    # Plain tuples: these feed numpy arrays, models would only be thrown away
+
+    async def get_result_history(self) -> list[tuple[int, int]]:
+        rows = queries.get_result_history(self.conn)
+        return [(row["cyclist_id"], row["position"]) async for row in rows]
+
+    async def get_result_race_count(self) -> int:
+        return await queries.get_result_race_count(self.conn)
+
+    async def get_upcoming_races(self, year: int) -> list[tuple[int, str]]:
+        rows = queries.get_upcoming_races(self.conn, year=year)
+        return [(row["id"], row["category"]) async for row in rows]
+
+    async def get_startlists(self, race_ids: list[int]) -> list[tuple[int, int]]:
+        if not race_ids:
+            return []
+        rows = queries.get_startlists(self.conn, race_ids=race_ids)
+        return [(row["race_id"], row["cyclist_id"]) async for row in rows]
+
+    async def get_category_points(self) -> list[tuple[str, int, int]]:
+        rows = queries.get_category_points(self.conn)
+        return [(row["category"], row["position"], row["points"]) async for row in rows]
+
+    async def get_squad_projection_cyclists(self, squad_id: int) -> list[tuple[int, bool]]:
+        try:
+            rows = queries.get_squad_projection_cyclists(self.conn, squad_id=squad_id)
+            return [(row["cyclist_id"], row["is_leader"]) async for row in rows]
+        except Exception as e:
+            raise Exception(f"Failed to get squad cyclists: {str(e)}")
+
+
+def get_simulation_repository(
+    conn: LazyConnection = Depends(db.get_connection, scope="function"),
+) -> SimulationRepository:
+    return SimulationRepository(conn)
@@ -1,15 +1,15 @@
 from fastapi import HTTPException
-from db.database import db
+from db.database import db, LazyConnection
 from fastapi import Depends
 from db.loader import queries
-from models.squad import Squad
+from models.squad import Squad, SquadTransfer, SquadUpdate
 from models.cyclist import Cyclist
 from dataclasses import dataclass
 from asyncpg import Connection
 
 @dataclass
 class SquadRepository:
-    conn: Connection | None = None
+    conn: Connection | LazyConnection | None = None
 
     async def create_squad(self, squad_name: str, user_id: int) -> Squad:
         row = await queries.create_squad(self.conn, name=squad_name, user_id=user_id)
@@ -34,6 +34,12 @@ class SquadRepository:
         except Exception as e:
             raise Exception(f"Failed to get squad cyclists: {str(e)}")
 
+    async def get_squad_cyclists_json(self, squad_id: int, race_id: int | None = None) -> str:
+        try:
+            return await queries.get_squad_cyclists_json(self.conn, squad_id=squad_id, race_id=race_id)
+        except Exception as e:
+            raise Exception(f"Failed to get squad cyclists: {str(e)}")
+
     async def get_squad(self, squad_id: int) -> Squad:
         try:
             row = await queries.get_squad(self.conn, squad_id=squad_id)
@@ -53,9 +59,12 @@ class SquadRepository:
         except Exception as e:
             raise Exception(f"Failed to add cyclist: {str(e)}")
 
-    async def remove_cyclist(self, squad_id: int, cyclist_id: int):
+    async def remove_squad_cyclist(self, squad_id: int, user_id: int, cyclist_id: int) -> SquadUpdate:
         try:
-            await queries.remove_cyclist(self.conn, squad_id=squad_id, cyclist_id=cyclist_id)
+            row = await queries.remove_squad_cyclist(
+                self.conn, squad_id=squad_id, user_id=user_id, cyclist_id=cyclist_id
+            )
+            return SquadUpdate.model_validate(dict(row))
         except Exception as e:
             raise Exception(f"Failed to remove cyclist: {str(e)}")
 
@@ -66,6 +75,40 @@ class SquadRepository:
         except Exception as e:
             raise Exception(f"Failed to get squad price: {str(e)}")
 
+    async def replace_squad_cyclists(
+        self, squad_id: int, user_id: int, cyclist_ids: list[int], squad_size: int, budget: float, window_quota: int
+    ) -> SquadUpdate:
+        try:
+            row = await queries.replace_squad_cyclists(
+                self.conn,
+                squad_id=squad_id,
+                user_id=user_id,
+                cyclist_ids=cyclist_ids,
+                squad_size=squad_size,
+                budget=budget,
+                window_quota=window_quota,
+            )
+            return SquadUpdate.model_validate(dict(row))
+        except Exception as e:
+            raise Exception(f"Failed to replace squad cyclists: {str(e)}")
+
+    async def transfer_squad_cyclist(
+        self, squad_id: int, user_id: int, out_cyclist_id: int, in_cyclist_id: int, budget: float, window_quota: int
+    ) -> SquadTransfer:
+        try:
+            row = await queries.transfer_squad_cyclist(
+                self.conn,
+                squad_id=squad_id,
+                user_id=user_id,
+                out_cyclist_id=out_cyclist_id,
+                in_cyclist_id=in_cyclist_id,
+                budget=budget,
+                window_quota=window_quota,
+            )
+            return SquadTransfer.model_validate(dict(row))
+        except Exception as e:
+            raise Exception(f"Failed to transfer squad cyclist: {str(e)}")
+
     async def delete_squad(self, squad_id: int) -> None:
         try:
             return await queries.delete_squad(self.conn, squad_id=squad_id)
@@ -74,6 +117,6 @@ class SquadRepository:
             raise Exception(f"Failed to delete squad: {str(e)}")
 
 def get_squad_repository(
-    conn: Connection = Depends(db.get_connection),
+    conn: LazyConnection = Depends(db.get_connection, scope="function"),
 ) -> SquadRepository:
     return SquadRepository(conn)
@@ -1,6 +1,6 @@
 from asyncpg import Connection
 from dataclasses import dataclass
-from db.database import db
+from db.database import db, LazyConnection
 from db.loader import queries
 from fastapi import Depends
 from models.user import User, UserCreate
@@ -8,7 +8,7 @@ from models.user import User, UserCreate
 
 @dataclass
 class UserRepository:
-    conn: Connection | None = None
+    conn: Connection | LazyConnection | None = None
 
     async def insert_user(self, user: UserCreate, password_hash: str) -> int:
         return await queries.insert_user(
@@ -26,8 +26,13 @@ class UserRepository:
             return User.model_validate(dict(row))
         return None
 
+    async def update_user_password_hash(self, user_id: int, password_hash: str):
+        await queries.update_user_password_hash(
+            self.conn, id=user_id, password_hash=password_hash
+        )
+
 
 def get_user_repository(
-    conn: Connection = Depends(db.get_connection),
+    conn: LazyConnection = Depends(db.get_connection, scope="function"),
 ) -> UserRepository:
     return UserRepository(conn)
@@ -10,6 +10,10 @@ from services.auth_service import (
     get_password_hash,
     verify_password,
     get_current_user,
+    invalidate_cached_user,
+    password_needs_rehash,
+    user_cache,
+    user_token_claims,
 )
 from repositories.user_repository import UserRepository, get_user_repository
 from models.user import Token, UserCreate, User
@@ -28,8 +32,9 @@ async def register(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    password_hash = get_password_hash(user.password)
+    password_hash = await get_password_hash(user.password)
     user_id = await user_repo.insert_user(user, password_hash)
+    invalidate_cached_user(user.email)
     return User(
         id=user_id,
         username=user.username,
@@ -47,15 +52,20 @@ async def login_for_access_token(
     user_repo: Annotated[UserRepository, Depends(get_user_repository)],
 ):
     user = await user_repo.get_user_by_email(user_login.email)
-    if not user or not verify_password(user_login.password, user.password_hash):
+    if not user or not await verify_password(user_login.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Upgrade hashes made with a different cost while we have the plain password
+    if password_needs_rehash(user.password_hash):
+        password_hash = await get_password_hash(user_login.password)
+        await user_repo.update_user_password_hash(user.id, password_hash)
+        invalidate_cached_user(user.email)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=user_token_claims(user), expires_delta=access_token_expires
     )
     response.set_cookie(
         key="access_token",
@@ -72,3 +82,7 @@ async def logout(response: Response):
     response.delete_cookie(key="access_token")
     return {"message": "Logged out successfully"}
 
+
+@router.get("/auth/user-cache/stats", dependencies=[Depends(get_current_user)])
+async def get_user_cache_stats():
+    return user_cache.stats()
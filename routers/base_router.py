@@ -1,35 +1,40 @@
 from models.result import RaceResult
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from models.cyclist import Cyclist
 from models.race import Race
+from models.team import Team
 from repositories.base_repository import BaseRepository, get_base_repository
+from services.reference_cache import CYCLISTS, RACES, TEAMS, reference_cache
 
 router = APIRouter()
 
-@router.get(path="/cyclists", summary="Get all cyclists")
+@router.get(path="/cyclists", summary="Get all cyclists", response_model=list[Cyclist])
 async def get_cyclists(
+    request: Request,
     repository: BaseRepository = Depends(get_base_repository)
-) -> list[Cyclist]:
+) -> Response:
     try:
-        return await repository.get_cyclists()
+        return await reference_cache.respond(CYCLISTS, request, repository)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.get(path="/teams", summary="Get all teams")
+@router.get(path="/teams", summary="Get all teams", response_model=list[Team])
 async def get_teams(
+    request: Request,
     repository: BaseRepository = Depends(get_base_repository)
-):
+) -> Response:
     try:
-        return await repository.get_teams()
+        return await reference_cache.respond(TEAMS, request, repository)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.get(path="/races", summary="Get all races")
+@router.get(path="/races", summary="Get all races", response_model=list[Race])
 async def get_races(
+    request: Request,
     repository: BaseRepository = Depends(get_base_repository)
-) -> list[Race]:
+) -> Response:
     try:
-        return await repository.get_races()
+        return await reference_cache.respond(RACES, request, repository)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -58,8 +63,11 @@ async def get_next_race(
     repository: BaseRepository = Depends(get_base_repository)
 ) -> Race:
     try:
-        return await repository.get_next_race()
+        race = await repository.get_next_race()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
+        raise HTTPException(status_code=500, detail=str(e))
+    if race is None:
+        raise HTTPException(status_code=404, detail="No upcoming race")
+    return race
 
     
\ No newline at end of file
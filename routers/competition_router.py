@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from db.database import get_transaction
 from repositories.competition_repository import CompetitionRepository, get_competition_repository
-from models.competition import Competition
+from models.competition import Competition, Leaderboard
+from models.selection import SelectionRecommendation
+from repositories.base_repository import BaseRepository, get_base_repository
+from repositories.selection_repository import SelectionRepository, get_selection_repository
+from repositories.simulation_repository import SimulationRepository, get_simulation_repository
+from services.selection_recommender import get_competition_recommendations
+from models.user import CurrentUser
+from services.auth_service import get_current_user
 
 router = APIRouter(
     prefix="/competitions",
     tags=["competitions"]
 )
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(get_transaction)])
 async def create_competition(
     competition: Competition, 
     competition_repository: CompetitionRepository = Depends(get_competition_repository)
@@ -27,6 +35,62 @@ async def get_competitions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# The leaderboard JSON is built by Postgres, so no models are validated per request
+@router.get("/{id}/leaderboard", response_model=Leaderboard)
+async def get_leaderboard(
+    id: int,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=50, ge=1, le=200),
+    competition_repository: CompetitionRepository = Depends(get_competition_repository)
+) -> Response:
+    try:
+        leaderboard = await competition_repository.get_leaderboard_json(id, page, page_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=leaderboard, media_type="application/json")
+
+@router.get("/{id}/leaderboard/me", response_model=Leaderboard)
+async def get_leaderboard_around_me(
+    id: int,
+    radius: int = Query(default=5, ge=0, le=50),
+    competition_repository: CompetitionRepository = Depends(get_competition_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> Response:
+    try:
+        leaderboard = await competition_repository.get_leaderboard_around_user_json(id, user.id, radius)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if leaderboard is None:
+        raise HTTPException(status_code=404, detail="You have no squad in this competition")
+    return Response(content=leaderboard, media_type="application/json")
+
+@router.get("/{id}/recommendations")
+async def get_selection_recommendations(
+    id: int,
+    competition_repository: CompetitionRepository = Depends(get_competition_repository),
+    base_repository: BaseRepository = Depends(get_base_repository),
+    selection_repository: SelectionRepository = Depends(get_selection_repository),
+    simulation_repository: SimulationRepository = Depends(get_simulation_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> list[SelectionRecommendation]:
+    # Every squad of the competition scored against the next race in one pass
+    try:
+        is_member = await competition_repository.is_competition_member(id, user.id)
+        race = await base_repository.get_next_race()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not is_member:
+        raise HTTPException(status_code=403, detail="You have no squad in this competition")
+    if race is None:
+        raise HTTPException(status_code=404, detail="No upcoming race")
+
+    try:
+        return await get_competition_recommendations(
+            base_repository, simulation_repository, selection_repository, race, id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{name}")
 async def get_competition_by_name(
     name: str, 
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from db.database import get_transaction
 from models.cyclist import Cyclist
-from models.selection import CreateSquadSelection, SelectionCyclist
+from models.selection import CreateSquadSelection, SelectionCyclist, SelectionRecommendation, SelectionUpdateError
+from repositories.base_repository import BaseRepository, get_base_repository
 from repositories.selection_repository import SelectionRepository, get_selection_repository
+from repositories.simulation_repository import SimulationRepository, get_simulation_repository
 from repositories.squad_repository import SquadRepository, get_squad_repository
+from services.selection_recommender import get_race_outlook, recommend_selections
 from services.auth_service import get_current_user
 from config import settings
 from loguru import logger
@@ -12,61 +16,97 @@ router = APIRouter(
     tags=["selections"]
 )
 
-@router.get("/{squad_id}")
+# Serialized by Postgres, see get_squad_selection_json
+@router.get("/{squad_id}", response_model=list[SelectionCyclist])
 async def get_squad_selection(
     squad_id: int,
     selection_repository: SelectionRepository = Depends(get_selection_repository)
-) -> list[SelectionCyclist]:
+) -> Response:
     try:
-        return await selection_repository.get_squad_selection(squad_id=squad_id)
+        selection = await selection_repository.get_squad_selection_json(squad_id=squad_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=selection, media_type="application/json")
     
+@router.get("/{squad_id}/recommendation", summary="Best selection and leader for the next race")
+async def get_selection_recommendation(
+    squad_id: int,
+    base_repository: BaseRepository = Depends(get_base_repository),
+    simulation_repository: SimulationRepository = Depends(get_simulation_repository),
+    squad_repository: SquadRepository = Depends(get_squad_repository),
+    user = Depends(get_current_user)
+) -> SelectionRecommendation:
+    try:
+        squad = await squad_repository.get_squad(squad_id)
+        race = await base_repository.get_next_race()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if squad.user_id != user.id:
+        raise HTTPException(status_code=403, detail="You do not have permission to view this squad")
+    if race is None:
+        raise HTTPException(status_code=404, detail="No upcoming race")
+
+    try:
+        squad_cyclists = await squad_repository.get_squad_cyclists(squad_id, race_id=race.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not squad_cyclists:
+        raise HTTPException(status_code=400, detail="Squad has no cyclists")
+
+    try:
+        cyclists = await base_repository.get_cyclists()
+        outlook = await get_race_outlook(simulation_repository, [cyclist.id for cyclist in cyclists], race)
+        rosters = [(squad_id, [cyclist.id for cyclist in squad_cyclists])]
+        return recommend_selections(outlook, rosters, settings.SELECTION_SIZE, settings.LEADER_POINTS_MULTIPLIER)[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+SELECTION_UPDATE_ERRORS = {
+    SelectionUpdateError.SQUAD_NOT_FOUND: (404, "Squad not found"),
+    SelectionUpdateError.FORBIDDEN: (403, "You do not have permission to modify this squad"),
+    SelectionUpdateError.DUPLICATE_CYCLISTS: (400, "Cyclists appear more than once"),
+    SelectionUpdateError.WRONG_SELECTION_SIZE: (400, f"Squad selection must contain exactly {settings.SELECTION_SIZE} cyclists"),
+    SelectionUpdateError.LEADER_COUNT: (400, "Squad selection must contain exactly 1 leader"),
+    SelectionUpdateError.NOT_IN_SQUAD: (400, "Cyclists do not belong to the squad"),
+    SelectionUpdateError.SELECTION_LOCKED: (409, "Selections are locked while a race deadline is processed, try again shortly"),
+}
+
+SELECTION_LOCKED_DETAIL = {
+    "code": SelectionUpdateError.SELECTION_LOCKED,
+    "message": SELECTION_UPDATE_ERRORS[SelectionUpdateError.SELECTION_LOCKED][1],
+}
+
+# One statement that runs in its own transaction, so no get_transaction round trips
 @router.post("/{squad_id}")
 async def insert_squad_selection(
     squad_id: int,
     squad_selection: list[CreateSquadSelection],
     selection_repository: SelectionRepository = Depends(get_selection_repository),
-    squad_repository: SquadRepository = Depends(get_squad_repository),
     user = Depends(get_current_user)
 ):
     try:
-        # Check if squad_id belongs to the user
-        squad = await squad_repository.get_squad(squad_id)
-        if squad.user_id != user.id:
-            raise HTTPException(status_code=403, detail="You do not have permission to modify this squad")
-        
-        # Check if squad selection contains 12 cyclists and exactly 1 leader
-        if len(squad_selection) != settings.SELECTION_SIZE:
-            raise HTTPException(status_code=400, detail=f"Squad selection must contain exactly {settings.SELECTION_SIZE} cyclists")
-        
-        if sum(selection.is_leader for selection in squad_selection) != 1:
-            raise HTTPException(status_code=400, detail="Squad selection must contain exactly 1 leader")
-           
-        # First delete existing selections for the squad
-        await selection_repository.delete_squad_selection(squad_id=squad_id)
-        
-        # Get all cyclists of squad to check if the selected cyclists belong to the squad
-        squad_cyclists = await squad_repository.get_squad_cyclists(squad_id=squad_id)
-        squad_cyclist_ids = {cyclist.id for cyclist in squad_cyclists}
-        for selection in squad_selection:
-            if selection.cyclist_id not in squad_cyclist_ids:
-                raise HTTPException(status_code=400, detail=f"Cyclist with id {selection.cyclist_id} does not belong to the squad")
-        
-        # Then insert new selections
-        for selection in squad_selection:          
-            await selection_repository.insert_squad_selection(
-                squad_id=squad_id,
-                cyclist_id=selection.cyclist_id,
-                is_leader=selection.is_leader
-            )
-        return {"message": "Squad selection inserted successfully"}
-    
+        update = await selection_repository.save_squad_selection(
+            squad_id, user.id, squad_selection, settings.SELECTION_SIZE
+        )
     except Exception as e:
         logger.error(f"Error inserting squad selection: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+    if update.error:
+        status_code, message = SELECTION_UPDATE_ERRORS[update.error]
+        detail = {"code": update.error, "message": message}
+        if update.cyclist_ids:
+            detail["cyclist_ids"] = update.cyclist_ids
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    return {
+        "message": "Squad selection inserted successfully",
+        "added": update.added,
+        "removed": update.removed,
+        "updated": update.updated,
+    }
     
-@router.delete("/{squad_id}/cyclists/{cyclist_id}")
+@router.delete("/{squad_id}/cyclists/{cyclist_id}", dependencies=[Depends(get_transaction)])
 async def delete_squad_selection_cyclist(
     squad_id: int,
     cyclist_id: int,
@@ -74,6 +114,14 @@ async def delete_squad_selection_cyclist(
     squad_repository: SquadRepository = Depends(get_squad_repository),
     user = Depends(get_current_user)
 ):
+    # Selections are frozen when a race starts; outside the try so the 409 is kept
+    try:
+        locked_race = await selection_repository.get_selection_locked_race()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if locked_race is not None:
+        raise HTTPException(status_code=409, detail=SELECTION_LOCKED_DETAIL)
+
     try:
         # Check if squad_id belongs to the user
         squad = await squad_repository.get_squad(squad_id)
@@ -86,13 +134,21 @@ async def delete_squad_selection_cyclist(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.delete("/{squad_id}")
+@router.delete("/{squad_id}", dependencies=[Depends(get_transaction)])
 async def delete_squad_selection(
     squad_id: int,
     selection_repository: SelectionRepository = Depends(get_selection_repository),
     squad_repository: SquadRepository = Depends(get_squad_repository),
     user = Depends(get_current_user)
 ):
+    # Selections are frozen when a race starts; outside the try so the 409 is kept
+    try:
+        locked_race = await selection_repository.get_selection_locked_race()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if locked_race is not None:
+        raise HTTPException(status_code=409, detail=SELECTION_LOCKED_DETAIL)
+
     try:
         # Check if squad_id belongs to the user
         squad = await squad_repository.get_squad(squad_id)
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from config import settings
+from models.simulation import SeasonProjection, SquadProjection
+from models.user import CurrentUser
+from repositories.base_repository import BaseRepository, get_base_repository
+from repositories.simulation_repository import SimulationRepository, get_simulation_repository
+from repositories.squad_repository import SquadRepository, get_squad_repository
+from services.auth_service import get_current_user
+from services.season_simulator import get_season_simulation
+
+router = APIRouter(
+    prefix="/simulations",
+    tags=["simulations"]
+)
+
+# Year and run count are fixed, so every caller shares one cached simulation
+
+
+@router.get("/cyclists", summary="Expected points and variance per cyclist over the remaining races")
+async def get_cyclist_projections(
+    limit: int | None = Query(default=None, ge=1),
+    base_repository: BaseRepository = Depends(get_base_repository),
+    simulation_repository: SimulationRepository = Depends(get_simulation_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> SeasonProjection:
+    try:
+        cyclists = await base_repository.get_cyclists()
+        simulation = await get_season_simulation(
+            simulation_repository, cyclists, settings.YEAR, settings.SIMULATION_RUNS
+        )
+        return SeasonProjection(
+            year=settings.YEAR,
+            races=simulation.races,
+            simulations=settings.SIMULATION_RUNS,
+            cyclists=simulation.ranked(limit),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/squads/{id}", summary="Expected points and variance of a squad over the remaining races")
+async def get_squad_projection(
+    id: int,
+    base_repository: BaseRepository = Depends(get_base_repository),
+    simulation_repository: SimulationRepository = Depends(get_simulation_repository),
+    squad_repository: SquadRepository = Depends(get_squad_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> SquadProjection:
+    try:
+        squad = await squad_repository.get_squad(id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if squad.user_id != user.id:
+        raise HTTPException(status_code=403, detail="You do not have permission to view this squad")
+
+    try:
+        cyclists = await base_repository.get_cyclists()
+        simulation = await get_season_simulation(
+            simulation_repository, cyclists, settings.YEAR, settings.SIMULATION_RUNS
+        )
+        members = await simulation_repository.get_squad_projection_cyclists(id)
+        weights = [settings.LEADER_POINTS_MULTIPLIER if is_leader else 1 for _, is_leader in members]
+        expected, variance = simulation.squad([cyclist_id for cyclist_id, _ in members], weights)
+        return SquadProjection(
+            squad_id=id,
+            year=settings.YEAR,
+            races=simulation.races,
+            simulations=settings.SIMULATION_RUNS,
+            expected_points=expected,
+            variance=variance,
+            cyclists=[simulation.cyclist(cyclist_id, is_leader) for cyclist_id, is_leader in members],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
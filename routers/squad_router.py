@@ -1,21 +1,29 @@
 from loguru import logger
 from config import settings
-from models.user import User
+from models.user import CurrentUser
 from services.auth_service import get_current_user
 from fastapi import HTTPException
 from repositories.squad_repository import SquadRepository
 from repositories.squad_repository import get_squad_repository
-from fastapi import APIRouter, Depends
+from repositories.score_repository import ScoreRepository, get_score_repository
+from models.score import SquadScore
+from models.cyclist import Cyclist
+from models.squad import SquadSuggestion, SquadSuggestionRequest, SquadTransferRequest, SquadUpdateError
+from repositories.base_repository import BaseRepository, get_base_repository
+from repositories.simulation_repository import SimulationRepository, get_simulation_repository
+from services.squad_optimizer import suggest_squad
+from fastapi import APIRouter, Depends, Response
+from db.database import get_transaction
 
 
 router = APIRouter(prefix="/squads", tags=["squads"])
 
 
-@router.post(path="", summary="Create a new squad for user")
+@router.post(path="", summary="Create a new squad for user", dependencies=[Depends(get_transaction)])
 async def create_squad(
     squad_name: str, 
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     try:
         return await squad_repository.create_squad(squad_name, user.id)
@@ -26,73 +34,144 @@ async def create_squad(
 @router.get(path="", summary="Get all squads for current user")
 async def get_squads(
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     try:
         return await squad_repository.get_squads_by_user(user.id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get(path="/{id}/cyclists", summary="Get all cyclists for a squad")
+@router.post(path="/suggestion", summary="Suggest the highest-value squad within the size and budget limits")
+async def get_squad_suggestion(
+    request: SquadSuggestionRequest,
+    base_repository: BaseRepository = Depends(get_base_repository),
+    score_repository: ScoreRepository = Depends(get_score_repository),
+    simulation_repository: SimulationRepository = Depends(get_simulation_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> SquadSuggestion:
+    try:
+        cyclists = await base_repository.get_cyclists()
+        return await suggest_squad(request, cyclists, score_repository, simulation_repository)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Serialized by Postgres, see get_squad_cyclists_json
+@router.get(path="/{id}/cyclists", summary="Get all cyclists for a squad", response_model=list[Cyclist])
 async def get_squad_cyclists(
     id: int,
     race_id: int | None = None,
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
-):
+    user: CurrentUser = Depends(get_current_user)
+) -> Response:
     try:
         squad = await squad_repository.get_squad(id)
         if squad.user_id != user.id:
             raise HTTPException(status_code=403, detail="You do not have permission to view this squad")
         
-        return await squad_repository.get_squad_cyclists(id, race_id=race_id)
+        cyclists = await squad_repository.get_squad_cyclists_json(id, race_id=race_id)
     except Exception as e:  
         raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=cyclists, media_type="application/json")
 
-@router.post(path="/{id}/cyclists", summary="Add cyclists (list of cyclist ids) to a squad")
-async def add_cyclists(
+@router.get(path="/{id}/scores", summary="Get the season total and per-race points of a squad")
+async def get_squad_scores(
     id: int,
-    cyclist_ids: list[int],
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
-):
+    score_repository: ScoreRepository = Depends(get_score_repository),
+    user: CurrentUser = Depends(get_current_user)
+) -> SquadScore:
     try:
-        # check if squad belongs to user
         squad = await squad_repository.get_squad(id)
         if squad.user_id != user.id:
-            raise HTTPException(status_code=403, detail="You do not have permission to modify this squad")
-        # check length < max number of cyclists 
-        if len(cyclist_ids) > settings.SQUAD_SIZE:
-            raise HTTPException(status_code=400, detail="Squad size exceeds maximum limit")
-
-        # Check if squad price is within budget
-        squad_price = await squad_repository.get_squad_price(cyclist_ids)
-        logger.info(f"Squad price: {squad_price}")
-        if squad_price > settings.MAX_SQUAD_BUDGET:
-            raise HTTPException(status_code=400, detail="Squad price exceeds budget")   
-
-        # check if squad belongs to user
-        squad = await squad_repository.get_squad(id)
-        if squad.user_id != user.id:
-            raise HTTPException(status_code=403, detail="You do not have permission to modify this squad")
+            raise HTTPException(status_code=403, detail="You do not have permission to view this squad")
+
+        return await score_repository.get_squad_score(id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # delete previous squad cyclists
-        await squad_repository.remove_cyclists(id)
+SQUAD_UPDATE_ERRORS = {
+    SquadUpdateError.SQUAD_NOT_FOUND: (404, "Squad not found"),
+    SquadUpdateError.FORBIDDEN: (403, "You do not have permission to modify this squad"),
+    SquadUpdateError.DUPLICATE_CYCLISTS: (400, "Cyclists appear more than once"),
+    SquadUpdateError.TOO_MANY_CYCLISTS: (400, "Squad size exceeds maximum limit"),
+    SquadUpdateError.UNKNOWN_CYCLISTS: (400, "Unknown cyclists"),
+    SquadUpdateError.OVER_BUDGET: (400, "Squad price exceeds budget"),
+    SquadUpdateError.SELECTION_LOCKED: (409, "Selections are locked while a race deadline is processed, try again shortly"),
+    SquadUpdateError.SAME_CYCLIST: (400, "A cyclist cannot be transferred for themselves"),
+    SquadUpdateError.NOT_IN_SQUAD: (400, "Cyclist does not belong to the squad"),
+    SquadUpdateError.ALREADY_IN_SQUAD: (400, "Incoming cyclist already belongs to the squad"),
+    SquadUpdateError.TRANSFER_LIMIT: (429, "No transfers left in this transfer window"),
+}
+
+# One statement that runs in its own transaction, so no get_transaction round trips
+@router.post(path="/{id}/cyclists", summary="Replace the cyclists (list of cyclist ids) of a squad")
+async def add_cyclists(
+    id: int,
+    cyclist_ids: list[int],
+    squad_repository: SquadRepository = Depends(get_squad_repository),
+    user: CurrentUser = Depends(get_current_user)
+):
+    try:
+        update = await squad_repository.replace_squad_cyclists(
+            id, user.id, cyclist_ids, settings.SQUAD_SIZE, settings.MAX_SQUAD_BUDGET, settings.TRANSFERS_PER_WINDOW
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # add new squad cyclists
-        for cyclist_id in cyclist_ids:
-            await squad_repository.add_cyclist(id, cyclist_id)
+    if update.error:
+        status_code, message = SQUAD_UPDATE_ERRORS[update.error]
+        detail = {"code": update.error, "message": message}
+        if update.cyclist_ids:
+            detail["cyclist_ids"] = update.cyclist_ids
+        if update.error == SquadUpdateError.TOO_MANY_CYCLISTS:
+            detail["squad_size"] = settings.SQUAD_SIZE
+        if update.error == SquadUpdateError.OVER_BUDGET:
+            detail.update(price=update.price, budget=settings.MAX_SQUAD_BUDGET)
+        if update.error == SquadUpdateError.TRANSFER_LIMIT:
+            detail.update(transfers_used=update.transfers_used, transfers_per_window=settings.TRANSFERS_PER_WINDOW)
+        raise HTTPException(status_code=status_code, detail=detail)
 
-        return {"message": "Squad updated successfully"}
+    logger.info(f"Squad {id} updated: +{update.added} -{update.removed}, price {update.price}")
+    return {"message": "Squad updated successfully", "price": update.price, "added": update.added, "removed": update.removed}
 
+# Same single-call pattern as add_cyclists
+@router.post(path="/{id}/transfers", summary="Swap one cyclist out of a squad for another")
+async def transfer_cyclist(
+    id: int,
+    transfer: SquadTransferRequest,
+    squad_repository: SquadRepository = Depends(get_squad_repository),
+    user: CurrentUser = Depends(get_current_user)
+):
+    try:
+        result = await squad_repository.transfer_squad_cyclist(
+            id, user.id, transfer.out_cyclist_id, transfer.in_cyclist_id,
+            settings.MAX_SQUAD_BUDGET, settings.TRANSFERS_PER_WINDOW
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.delete(path="/{id}", summary="Delete a squad")
+    if result.error:
+        status_code, message = SQUAD_UPDATE_ERRORS[result.error]
+        detail = {"code": result.error, "message": message}
+        if result.error == SquadUpdateError.OVER_BUDGET:
+            detail.update(price=result.price, budget=settings.MAX_SQUAD_BUDGET)
+        if result.error == SquadUpdateError.TRANSFER_LIMIT:
+            detail.update(transfers_used=result.transfers_used, transfers_per_window=settings.TRANSFERS_PER_WINDOW)
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    logger.info(f"Squad {id} transfer {result.transfer_id}: {transfer.out_cyclist_id} -> {transfer.in_cyclist_id}")
+    return {
+        "message": "Transfer completed successfully",
+        "transfer_id": result.transfer_id,
+        "price": result.price,
+        "transfers_left": settings.TRANSFERS_PER_WINDOW - result.transfers_used,
+    }
+
+@router.delete(path="/{id}", summary="Delete a squad", dependencies=[Depends(get_transaction)])
 async def delete_squad(
     id: int,
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     try:
         squad = await squad_repository.get_squad(id)
@@ -106,18 +185,22 @@ async def delete_squad(
         logger.error(f"Error deleting squad: {e}")
         raise HTTPException(status_code=400, detail=str(e))
     
+# Same single-call pattern as add_cyclists
 @router.delete(path="/{squad_id}/cyclists/{cyclist_id}", summary="Delete a cyclist from a squad")
 async def delete_cyclist(
     squad_id: int,
     cyclist_id: int,
     squad_repository: SquadRepository = Depends(get_squad_repository),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        squad = await squad_repository.get_squad(squad_id)
-        if squad.user_id != user.id:
-            raise HTTPException(status_code=403, detail="You do not have permission to modify this squad")
-        await squad_repository.remove_cyclist(squad_id, cyclist_id)
-        return {"message": "Cyclist removed from squad successfully"}
+        update = await squad_repository.remove_squad_cyclist(squad_id, user.id, cyclist_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    if update.error:
+        status_code, message = SQUAD_UPDATE_ERRORS[update.error]
+        raise HTTPException(status_code=status_code, detail={"code": update.error, "message": message})
+
+    logger.info(f"Squad {squad_id} updated: -{cyclist_id}")
+    return {"message": "Cyclist removed from squad successfully"}
@@ -1,47 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from services.sync_service import SyncService, get_sync_service
+from db.database import db
+from models.job import Job, JobKind
 from services.auth_service import get_current_user
+from services.http_client import http_client
+from services.job_runner import JobAlreadyRunningError, JobFunc, job_runner
+from services.reference_cache import reference_cache
+from services.sync_jobs import races_job, results_job, scores_job, startlist_job, sync_job
 
 router = APIRouter(prefix="/sync", tags=["sync"], dependencies=[Depends(get_current_user)])
 
-@router.post("")
-async def sync_data(sync_service: SyncService = Depends(get_sync_service)):
+def submit_job(kind: JobKind, func: JobFunc, message: str, params: dict | None = None) -> dict:
     try:
-        await sync_service.sync()
-        return {"message": "Data synchronization completed successfully."}
+        job = job_runner.submit(kind, func, params)
+    except JobAlreadyRunningError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"message": message, "job_id": job.id, "status": job.status}
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def sync_data():
+    return submit_job(JobKind.SYNC, sync_job, "Data synchronization queued.")
     
-@router.post("/races/results")
+@router.post("/races/results", status_code=status.HTTP_202_ACCEPTED)
 async def sync_race_results(
     year: int,
-    sync_service: SyncService = Depends(get_sync_service)
+    concurrency: int | None = Query(default=None, ge=1, le=32),
 ):
-    try:
-        await sync_service.sync_race_results(year)
-        return {"message": f"Race results for year {year} synchronized successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job(
+        JobKind.RESULTS, 
+        results_job, 
+        f"Race results sync for year {year} queued.", 
+        {"year": year, "concurrency": concurrency},
+    )
     
-@router.post("/races")
-async def sync_pcs_races(
-    year: int,
-    sync_service: SyncService = Depends(get_sync_service)
-):
-    try:
-        await sync_service.sync_pcs_races(year)
-        return {"message": f"Races for year {year} synchronized successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
+@router.post("/races", status_code=status.HTTP_202_ACCEPTED)
+async def sync_pcs_races(year: int):
+    return submit_job(JobKind.RACES, races_job, f"Races sync for year {year} queued.", {"year": year})
 
-@router.post("/races/startlist")
+@router.post("/races/startlist", status_code=status.HTTP_202_ACCEPTED)
 async def sync_pcs_startlist(
     year: int,
-    sync_service: SyncService = Depends(get_sync_service)
+    concurrency: int | None = Query(default=None, ge=1, le=32),
 ):
-    try:
-        await sync_service.sync_startlist(year)
-        return {"message": "PCS startlist synchronized successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
+    return submit_job(
+        JobKind.STARTLIST, 
+        startlist_job, 
+        f"PCS startlist sync for year {year} queued.", 
+        {"year": year, "concurrency": concurrency},
+    )
+
+@router.post("/races/scores", status_code=status.HTTP_202_ACCEPTED)
+async def score_races(year: int):
+    return submit_job(JobKind.SCORES, scores_job, f"Scoring of finished races for year {year} queued.", {"year": year})
+
+@router.get("/jobs")
+async def get_jobs() -> list[Job]:
+    return job_runner.list()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Job:
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/http/stats")
+async def get_http_stats():
+    return http_client.stats.to_dict()
+
+@router.get("/db/stats")
+async def get_db_stats():
+    return db.pool_stats()
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return reference_cache.stats()
@@ -0,0 +1,174 @@
+"""Cost of turning DB rows into a JSON response: pydantic models vs. JSON built by Postgres.
+
+Without arguments it times model_validate / model_construct per row on
+synthetic rows shaped like `get_cyclists` / `get_races` output, so it needs
+no database. With --squad-id it also times the hot GET endpoints against the
+configured database: the rows mapped to models and dumped with pydantic
+against the `*_json` queries that the routers return as-is. Each figure is
+the best of REPEATS timings, since single runs on a busy machine vary by 30%
+or more. Run from the repository root:
+
+    python -m scripts.benchmark_row_mapping [--squad-id ID --competition-id ID]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timezone
+import asyncpg
+from pydantic import TypeAdapter
+from config import settings
+from db.loader import queries
+from models.competition import Leaderboard, LeaderboardEntry
+from models.cyclist import Cyclist
+from models.race import Race
+from models.selection import SelectionCyclist
+
+ROWS = 938
+ROUNDS = 20
+REPEATS = 7
+LEADERBOARD_SIZE = 50
+
+
+def cyclist_rows() -> list[dict]:
+    return [
+        {
+            "id": i,
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "team_id": i % 36 + 1,
+            "price": 1.5 + i % 10,
+            "birth_date": date(1995, i % 12 + 1, i % 28 + 1),
+            "nationality": "BE",
+            "image_url": f"https://example.com/{i}.png",
+            "team_name": f"Team {i % 36}",
+            "team_code": f"T{i % 36:02}",
+            "team_image_url": f"https://example.com/team/{i % 36}.png",
+        }
+        for i in range(ROWS)
+    ]
+
+
+def race_rows() -> list[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Race {i}",
+            "year": 2026,
+            "start_timestamp": datetime(2026, 3, i % 28 + 1, 10, tzinfo=timezone.utc),
+            "category": "world-tour",
+            "status": "planned",
+            "pcs_path": None,
+        }
+        for i in range(ROWS)
+    ]
+
+
+def rate(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return ROWS * ROUNDS / best
+
+
+async def async_rate(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await fn()
+        best = min(best, time.perf_counter() - start)
+    return ROUNDS / best
+
+
+def offline():
+    for model, rows in ((Cyclist, cyclist_rows()), (Race, race_rows())):
+        adapter = TypeAdapter(list[model])
+        results = {
+            "model_validate per row": rate(lambda: [model.model_validate(dict(row)) for row in rows]),
+            "model_construct per row": rate(lambda: [model.model_construct(**row) for row in rows]),
+            "model_validate + dump_json": rate(
+                lambda: adapter.dump_json([model.model_validate(dict(row)) for row in rows])
+            ),
+        }
+        print(f"{model.__name__} ({ROWS} rows x {ROUNDS})")
+        for name, rows_per_sec in results.items():
+            print(f"  {name:<28} {rows_per_sec:>12,.0f} rows/s")
+
+
+async def endpoints(squad_id: int, competition_id: int | None):
+    conn = await asyncpg.connect(settings.PGS_DSN)
+    try:
+        cyclists = TypeAdapter(list[Cyclist])
+        selection = TypeAdapter(list[SelectionCyclist])
+
+        async def squad_cyclists_models():
+            rows = queries.get_squad_cyclists(conn, squad_id=squad_id, race_id=None)
+            return cyclists.dump_json([Cyclist.model_validate(dict(row)) async for row in rows])
+
+        async def squad_selection_models():
+            rows = await conn.fetch(
+                "SELECT c.id, c.first_name, c.last_name, c.team_id, c.price, c.birth_date, c.nationality,"
+                " c.image_url, t.name AS team_name, t.code AS team_code, t.image_url AS team_image_url,"
+                " ss.is_leader FROM squad_selections ss JOIN cyclists c ON ss.cyclist_id = c.id"
+                " JOIN teams t ON c.team_id = t.id WHERE ss.squad_id = $1",
+                squad_id,
+            )
+            return selection.dump_json([SelectionCyclist.model_validate(dict(row)) for row in rows])
+
+        cases = {
+            "squad cyclists": (
+                squad_cyclists_models,
+                lambda: queries.get_squad_cyclists_json(conn, squad_id=squad_id, race_id=None),
+            ),
+            "squad selection": (
+                squad_selection_models,
+                lambda: queries.get_squad_selection_json(conn, squad_id=squad_id),
+            ),
+        }
+        if competition_id is not None:
+            async def leaderboard_models():
+                rows = await conn.fetch(
+                    "SELECT st.rank, st.position, st.squad_id, s.name AS squad_name, s.user_id, st.points,"
+                    " st.previous_rank, st.race_id, st.race_points FROM competition_standings st"
+                    " JOIN squads s ON s.id = st.squad_id WHERE st.competition_id = $1"
+                    " AND st.position BETWEEN 1 AND $2 ORDER BY st.position",
+                    competition_id, LEADERBOARD_SIZE,
+                )
+                total = await conn.fetchval(
+                    "SELECT COALESCE(MAX(position), 0) FROM competition_standings WHERE competition_id = $1",
+                    competition_id,
+                )
+                entries = [LeaderboardEntry.model_validate(dict(row)) for row in rows]
+                return Leaderboard(competition_id=competition_id, total=total, entries=entries).model_dump_json()
+
+            cases[f"leaderboard ({LEADERBOARD_SIZE})"] = (
+                leaderboard_models,
+                lambda: queries.get_competition_standings_json(
+                    conn, competition_id=competition_id, first_position=1, last_position=LEADERBOARD_SIZE
+                ),
+            )
+
+        for name, (models, json_query) in cases.items():
+            print(f"{name} ({ROUNDS} requests)")
+            print(f"  {'models + dump_json':<28} {await async_rate(models):>12,.0f} requests/s")
+            print(f"  {'json query':<28} {await async_rate(json_query):>12,.0f} requests/s")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--squad-id", type=int, help="time the squad endpoints against this squad")
+    parser.add_argument("--competition-id", type=int, help="also time the first leaderboard page")
+    args = parser.parse_args()
+
+    offline()
+    if args.squad_id is not None:
+        asyncio.run(endpoints(args.squad_id, args.competition_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Wall time of the Monte Carlo season simulation on a full-size synthetic season.
+
+Builds inputs shaped like the real tables (~900 riders, a season of races,
+a points table per category) so it needs no database. Run from the
+repository root:
+
+    python -m scripts.benchmark_season_simulator
+"""
+import time
+import numpy as np
+from services.season_simulator import build_inputs, expected_race_points, simulate
+
+CYCLISTS = 900
+PAST_RACES = 40
+RACES = 40
+STARTERS = 150
+RUNS = 1000
+CATEGORIES = {"grand-tour": 30, "monument": 25, "world-tour": 20, "pro-series": 10}
+
+
+def synthetic_inputs(rng: np.random.Generator):
+    cyclist_ids = list(range(1, CYCLISTS + 1))
+    history = [
+        (int(cyclist_id), int(position))
+        for _ in range(PAST_RACES)
+        for position, cyclist_id in enumerate(rng.choice(cyclist_ids, STARTERS, replace=False), start=1)
+    ]
+    categories = list(CATEGORIES)
+    races = [(race_id, categories[race_id % len(categories)]) for race_id in range(1, RACES + 1)]
+    # Half of the races already have a startlist
+    startlists = [
+        (race_id, int(cyclist_id))
+        for race_id, _ in races[::2]
+        for cyclist_id in rng.choice(cyclist_ids, STARTERS, replace=False)
+    ]
+    category_points = [
+        (category, position, (depth - position + 1) * 10)
+        for category, depth in CATEGORIES.items()
+        for position in range(1, depth + 1)
+    ]
+    return build_inputs(cyclist_ids, history, PAST_RACES, races, startlists, category_points)
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<24} {(time.perf_counter() - start) * 1000:>10,.1f} ms")
+    return result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{CYCLISTS} cyclists x {RACES} races x {RUNS} runs")
+    inputs = timed("build_inputs", lambda: synthetic_inputs(rng))
+    expected = timed("expected_race_points", lambda: expected_race_points(inputs))
+    totals = timed("simulate", lambda: simulate(inputs, RUNS, seed=0))
+    # The Monte Carlo mean should land on the exact expectation, within a few standard errors
+    standard_error = np.maximum(totals.std(axis=0), 1e-9) / np.sqrt(RUNS)
+    z = np.abs(totals.mean(axis=0) - expected.sum(axis=0)) / standard_error
+    print(f"  max |simulated - exact|  {z.max():>10,.2f} standard errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Latency of the squad optimizer over a full-size synthetic rider pool.
+
+Prices follow the real distribution (mostly 2-4, a few stars up to 14) and
+values grow with price plus noise, so it needs no database. Each round
+locks and excludes a few random riders. Run from the repository root:
+
+    python -m scripts.benchmark_squad_optimizer
+"""
+import time
+import numpy as np
+from services.squad_optimizer import optimize_squad
+
+CYCLISTS = 938
+SQUAD_SIZE = 20
+BUDGET = 100
+ROUNDS = 50
+PRICES = [2, 3, 4, 5, 6, 7, 8, 10, 12, 14]
+PRICE_WEIGHTS = [524, 233, 111, 37, 16, 8, 3, 2, 2, 2]
+
+
+def greedy(prices, values, size, budget, locked, excluded) -> float:
+    # Locked riders, then best value first while it fits, keeping room for the cheapest riders after it
+    cheapest = prices.min()
+    total, spent, picked = values[locked].sum(), prices[locked].sum(), len(locked)
+    for i in np.argsort(-values):
+        if picked == size:
+            break
+        if i in locked or i in excluded:
+            continue
+        if spent + prices[i] + (size - picked - 1) * cheapest <= budget:
+            total += values[i]
+            spent += prices[i]
+            picked += 1
+    return total
+
+
+def main():
+    rng = np.random.default_rng(0)
+    ids = list(range(1, CYCLISTS + 1))
+    weights = np.asarray(PRICE_WEIGHTS) / sum(PRICE_WEIGHTS)
+    timings, candidates, gains = [], [], []
+    for _ in range(ROUNDS):
+        prices = rng.choice(PRICES, CYCLISTS, p=weights).astype(float)
+        values = np.maximum(prices * 40 + rng.normal(0, 60, CYCLISTS), 0)
+        locked = [int(i) for i in rng.choice(ids, 2, replace=False)]
+        excluded = [int(i) for i in rng.choice(list(set(ids) - set(locked)), 5, replace=False)]
+        start = time.perf_counter()
+        solution = optimize_squad(ids, list(prices), list(values), SQUAD_SIZE, BUDGET, locked, excluded, time_budget=5.0)
+        timings.append((time.perf_counter() - start) * 1000)
+        candidates.append(solution.candidates)
+        baseline = greedy(prices, values, SQUAD_SIZE, BUDGET, [i - 1 for i in locked], {i - 1 for i in excluded})
+        gains.append(solution.value / baseline)
+    print(f"{CYCLISTS} cyclists, squad of {SQUAD_SIZE}, budget {BUDGET}, {ROUNDS} rounds")
+    print(f"  candidates after pruning  median {np.median(candidates):>8,.0f}   max {max(candidates):>8,}")
+    print(f"  solve time                median {np.median(timings):>8,.1f}   max {max(timings):>8,.1f} ms")
+    print(f"  value vs. greedy          median {np.median(gains):>8,.3f}x  min {min(gains):>8,.3f}x")
+
+
+if __name__ == "__main__":
+    main()
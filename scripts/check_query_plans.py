@@ -0,0 +1,622 @@
+"""Fail when an aiosql query in db/queries plans a sequential scan over a large table.
+
+Creates a scratch database next to the configured one, applies the yoyo
+migrations, seeds a realistic dataset (ten seasons of races, full
+startlists and results, 20k squads with rosters, selections, scores and
+competitions), VACUUM ANALYZEs it and EXPLAINs every query with sample
+parameters. Queries that call a plpgsql function only show a Function Scan,
+so the statements inside those functions are EXPLAINed from
+INNER_STATEMENTS, after checking that each one still appears in the
+function body the migrations created. The scratch database is dropped
+afterwards unless --keep is given.
+
+This is a manual check, not part of a test suite: it needs a role with
+CREATEDB and takes about a minute. Run from the repository root:
+
+    python -m scripts.check_query_plans
+
+A Seq Scan counts as a failure when the scanned table holds at least
+--min-rows rows; smaller tables are cheaper to scan than to index. Queries
+that read whole tables by design are listed in FULL_SCANS. Plans are costed
+with --random-page-cost (1.1, the usual SSD setting, by default): with the
+spinning-disk default of 4 the planner prefers hashing a whole 20k-row
+table over a few hundred index probes.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from datetime import date, datetime, timezone
+import asyncpg
+from yoyo import get_backend, read_migrations
+from config import settings
+from db.loader import queries
+
+# Whole-table reads by design: reference data, model inputs and per-race work on every squad
+FULL_SCANS = {
+    "get_cyclists": "all cyclists",
+    "get_cyclists_version": "hash over all cyclists",
+    "get_cyclist_aliases": "alias map for the matcher",
+    "get_teams": "all teams",
+    "get_category_points": "all points tables",
+    "get_result_history": "simulation input, every result",
+    "get_result_race_count": "simulation input, every result",
+    "score_race_squads": "scores every squad's selection",
+    "freeze_race_selections": "snapshots every squad's selection",
+    "refresh_competition_standings": "re-ranks every affected competition",
+}
+
+# Staging tables only exist inside a bulk sync transaction
+SKIPPED = {
+    "merge_teams_stage",
+    "merge_cyclists_stage",
+    "merge_races_stage",
+    "merge_race_category_points_stage",
+}
+
+# Statements of the plpgsql and SQL functions, copied from the latest
+# migration that defines each one. A Function Scan hides them from EXPLAIN,
+# so they are checked here; a copy that no longer appears in the function
+# body in the database, or a function without an entry, fails the check.
+INNER_STATEMENTS = {
+    "replace_squad_cyclists": [
+        """
+        SELECT s.user_id, s.created_on INTO v_owner, v_created_on
+        FROM squads s
+        WHERE s.id = p_squad_id
+        FOR UPDATE
+        """,
+        """
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted)
+        """,
+        """
+        SELECT w.id FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (SELECT 1 FROM cyclists c WHERE c.id = w.id)
+        """,
+        """
+        SELECT COALESCE(MAX(r.start_timestamp), '-infinity') INTO v_window_start
+        FROM races r
+        WHERE r.start_timestamp <= CURRENT_TIMESTAMP
+        """,
+        """
+        SELECT COUNT(*) INTO v_used
+        FROM squad_transfers st
+        WHERE st.squad_id = p_squad_id AND st.transfer_timestamp >= v_window_start
+        """,
+        """
+        SELECT COUNT(*) INTO v_added
+        FROM unnest(v_wanted) w(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = w.id
+        )
+        """,
+        """
+        SELECT COALESCE(SUM(c.price), 0) INTO v_price
+        FROM cyclists c
+        WHERE c.id = ANY(v_wanted)
+        """,
+        """
+        UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id
+        """,
+        """
+        DELETE FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(v_wanted)
+        """,
+        """
+        WITH removed_rows AS (
+            DELETE FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id <> ALL(v_wanted)
+            RETURNING sc.cyclist_id
+        ),
+        added_rows AS (
+            INSERT INTO squad_cyclists (squad_id, cyclist_id)
+            SELECT p_squad_id, w.id FROM unnest(v_wanted) w(id)
+            ON CONFLICT (squad_id, cyclist_id) DO NOTHING
+            RETURNING squad_cyclists.cyclist_id
+        ),
+        transfers AS (
+            INSERT INTO squad_transfers (squad_id, out_cyclist_id, in_cyclist_id)
+            SELECT p_squad_id, o.cyclist_id, i.cyclist_id
+            FROM (SELECT a.cyclist_id, ROW_NUMBER() OVER (ORDER BY a.cyclist_id) AS n FROM added_rows a) i
+            LEFT JOIN (SELECT r.cyclist_id, ROW_NUMBER() OVER (ORDER BY r.cyclist_id) AS n FROM removed_rows r) o
+                ON o.n = i.n
+            WHERE v_counted
+            RETURNING 1
+        )
+        SELECT NULL::VARCHAR, v_price, v_wanted,
+            (SELECT COUNT(*) FROM added_rows)::INTEGER,
+            (SELECT COUNT(*) FROM removed_rows)::INTEGER,
+            v_used + (SELECT COUNT(*) FROM transfers)::INTEGER
+        """,
+    ],
+    "save_squad_selection": [
+        """
+        SELECT s.user_id INTO v_owner
+        FROM squads s
+        WHERE s.id = p_squad_id
+        FOR UPDATE
+        """,
+        """
+        SELECT w.id FROM unnest(p_cyclist_ids) w(id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = w.id
+        )
+        """,
+        """
+        WITH demoted AS (
+            UPDATE squad_selections ss SET is_leader = FALSE
+            WHERE ss.squad_id = p_squad_id AND ss.is_leader AND ss.cyclist_id <> v_leader
+            RETURNING ss.cyclist_id
+        )
+        SELECT COUNT(*) FILTER (WHERE d.cyclist_id = ANY(p_cyclist_ids)) INTO v_demoted
+        FROM demoted d
+        """,
+        """
+        WITH wanted AS (
+            SELECT w.id, w.is_leader
+            FROM unnest(p_cyclist_ids, p_is_leader) w(id, is_leader)
+        ),
+        changes AS (
+            SELECT w.id, w.is_leader, ss.cyclist_id IS NULL AS is_new
+            FROM wanted w
+            LEFT JOIN squad_selections ss ON ss.squad_id = p_squad_id AND ss.cyclist_id = w.id
+            WHERE ss.cyclist_id IS NULL OR ss.is_leader <> w.is_leader
+        ),
+        removed_rows AS (
+            DELETE FROM squad_selections ss
+            WHERE ss.squad_id = p_squad_id AND ss.cyclist_id <> ALL(p_cyclist_ids)
+            RETURNING 1
+        ),
+        written AS (
+            INSERT INTO squad_selections (squad_id, cyclist_id, is_leader)
+            SELECT p_squad_id, c.id, c.is_leader FROM changes c
+            ON CONFLICT (squad_id, cyclist_id) DO UPDATE SET is_leader = EXCLUDED.is_leader
+        )
+        SELECT NULL::VARCHAR, p_cyclist_ids,
+            (SELECT COUNT(*) FROM changes WHERE is_new)::INTEGER,
+            (SELECT COUNT(*) FROM removed_rows)::INTEGER,
+            (SELECT COUNT(*) FROM changes WHERE NOT is_new)::INTEGER + v_demoted
+        """,
+    ],
+    "selection_locked_race": [
+        """
+        SELECT r.id
+        FROM races r
+        WHERE r.selections_frozen_at IS NULL AND r.start_timestamp <= CURRENT_TIMESTAMP
+        ORDER BY r.start_timestamp
+        LIMIT 1
+        """,
+    ],
+    "transfer_squad_cyclist": [
+        """
+        SELECT s.user_id INTO v_owner
+        FROM squads s
+        WHERE s.id = p_squad_id
+        FOR UPDATE
+        """,
+        """
+        SELECT c.price INTO v_out_price
+        FROM squad_cyclists sc
+        JOIN cyclists c ON c.id = sc.cyclist_id
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_out_cyclist_id
+        """,
+        """
+        SELECT c.price INTO v_in_price
+        FROM cyclists c
+        WHERE c.id = p_in_cyclist_id
+        """,
+        """
+        SELECT 1 FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_in_cyclist_id
+        """,
+        """
+        SELECT COALESCE(MAX(r.start_timestamp), '-infinity') INTO v_window_start
+        FROM races r
+        WHERE r.start_timestamp <= CURRENT_TIMESTAMP
+        """,
+        """
+        SELECT COUNT(*) INTO v_used
+        FROM squad_transfers st
+        WHERE st.squad_id = p_squad_id AND st.transfer_timestamp >= v_window_start
+        """,
+        """
+        SELECT COALESCE(SUM(c.price), 0) + v_in_price - v_out_price INTO v_price
+        FROM squad_cyclists sc
+        JOIN cyclists c ON c.id = sc.cyclist_id
+        WHERE sc.squad_id = p_squad_id
+        """,
+        """
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_out_cyclist_id
+        """,
+        """
+        UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id
+        """,
+        """
+        UPDATE squad_cyclists sc SET cyclist_id = p_in_cyclist_id
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_out_cyclist_id
+        """,
+        """
+        UPDATE squad_selections ss SET cyclist_id = p_in_cyclist_id
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_out_cyclist_id
+        """,
+        """
+        INSERT INTO squad_transfers (squad_id, out_cyclist_id, in_cyclist_id)
+        VALUES (p_squad_id, p_out_cyclist_id, p_in_cyclist_id)
+        RETURNING id INTO v_transfer_id
+        """,
+    ],
+    "remove_squad_cyclist": [
+        """
+        SELECT s.user_id INTO v_owner
+        FROM squads s
+        WHERE s.id = p_squad_id
+        FOR UPDATE
+        """,
+        """
+        SELECT 1 FROM squad_cyclists sc
+        WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_cyclist_id
+        """,
+        """
+        SELECT 1 FROM squad_selections ss
+        WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_cyclist_id
+        """,
+        """
+        UPDATE squads SET updated_on = CURRENT_TIMESTAMP WHERE id = p_squad_id
+        """,
+        """
+        WITH unselected AS (
+            DELETE FROM squad_selections ss
+            WHERE ss.squad_id = p_squad_id AND ss.cyclist_id = p_cyclist_id
+        ),
+        removed_rows AS (
+            DELETE FROM squad_cyclists sc
+            WHERE sc.squad_id = p_squad_id AND sc.cyclist_id = p_cyclist_id
+            RETURNING 1
+        )
+        SELECT NULL::VARCHAR, (SELECT COUNT(*) FROM removed_rows)::INTEGER
+        """,
+    ],
+}
+
+# Function arguments and locals as (sample parameter, type)
+VARIABLES = {
+    "p_squad_id": ("squad_id", "INTEGER"),
+    "p_cyclist_id": ("cyclist_id", "INTEGER"),
+    "p_cyclist_ids": ("cyclist_ids", "INTEGER[]"),
+    "p_is_leader": ("leaders", "BOOLEAN[]"),
+    "p_out_cyclist_id": ("out_cyclist_id", "INTEGER"),
+    "p_in_cyclist_id": ("in_cyclist_id", "INTEGER"),
+    "v_wanted": ("cyclist_ids", "INTEGER[]"),
+    "v_leader": ("cyclist_id", "INTEGER"),
+    "v_window_start": ("window_start", "TIMESTAMP WITH TIME ZONE"),
+    "v_counted": ("counted", "BOOLEAN"),
+    "v_price": ("price", "FLOAT"),
+    "v_in_price": ("price", "FLOAT"),
+    "v_out_price": ("price", "FLOAT"),
+    "v_used": ("transfers_used", "INTEGER"),
+    "v_demoted": ("transfers_used", "INTEGER"),
+}
+
+FUNCTIONS = """
+SELECT p.proname, p.prosrc
+FROM pg_proc p
+JOIN pg_namespace n ON n.oid = p.pronamespace
+JOIN pg_language l ON l.oid = p.prolang
+WHERE n.nspname = 'public' AND l.lanname IN ('plpgsql', 'sql')
+"""
+
+VARIABLE = re.compile(r"\b[pv]_\w+\b")
+INTO = re.compile(r"\s+INTO\s+v_\w+(\s*,\s*v_\w+)*")
+
+
+def normalized(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def bound(sql: str) -> tuple[str, list[str]]:
+    """A function statement as a query: INTO dropped, variables as typed $n."""
+    names = []
+
+    def parameter(match: re.Match) -> str:
+        name, sql_type = VARIABLES[match[0]]
+        names.append(name)
+        return f"CAST(${len(names)} AS {sql_type})"
+
+    return VARIABLE.sub(parameter, INTO.sub("", sql)), names
+
+
+SEED = """
+INSERT INTO teams (code, name, image_url)
+SELECT 'pc' || n, 'Plan check team ' || n, ''
+FROM generate_series(1, 40) n;
+
+INSERT INTO cyclists (first_name, last_name, team_id, price, birth_date, nationality, image_url, pcs_path)
+SELECT 'Rider', 'Plan check ' || n, t.id, 2 + n % 12, DATE '1990-01-01' + n, 'BE', '', 'rider/pc-' || n
+FROM generate_series(1, 3000) n
+JOIN teams t ON t.code = 'pc' || (n % 40 + 1);
+
+CREATE TEMP TABLE pc_cyclists AS
+SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n
+FROM cyclists WHERE last_name LIKE 'Plan check %';
+
+INSERT INTO races (name, year, start_timestamp, category, pcs_path, status, results_synced_at, scored_at)
+SELECT 'Plan check race ' || n, 2017 + n / 150,
+    make_timestamptz(2017 + n / 150, 1, 1, 8, 0, 0) + (n % 150) * INTERVAL '2 days',
+    (ARRAY['world-tour', 'monument', 'other'])[n % 3 + 1], 'race/pc-' || n,
+    CASE WHEN n < 1400 THEN 'finished' ELSE 'planned' END,
+    CASE WHEN n < 1400 THEN NOW() END,
+    CASE WHEN n < 1400 THEN NOW() END
+FROM generate_series(0, 1499) n;
+
+CREATE TEMP TABLE pc_races AS
+SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n
+FROM races WHERE name LIKE 'Plan check race %';
+
+CREATE TEMP TABLE pc_entries AS
+SELECT r.id AS race_id, r.n AS race_n, c.id AS cyclist_id, k + 1 AS position
+FROM pc_races r
+CROSS JOIN generate_series(0, 149) k
+JOIN pc_cyclists c ON c.n = (r.n * 37 + k * 19) % 3000;
+
+INSERT INTO race_cyclists (race_id, cyclist_id)
+SELECT race_id, cyclist_id FROM pc_entries;
+
+INSERT INTO race_results (race_id, cyclist_id, position, info, cyclist_full_name)
+SELECT race_id, cyclist_id, position, NULL, 'Plan check'
+FROM pc_entries WHERE race_n < 1400;
+
+INSERT INTO cyclist_race_points (race_id, cyclist_id, position, points)
+SELECT race_id, cyclist_id, position, (31 - position) * 10
+FROM pc_entries WHERE race_n < 1400 AND position <= 30;
+
+INSERT INTO cyclist_aliases (alias, cyclist_id, score, cyclists_version)
+SELECT 'plan check ' || n, id, 100, 'plan-check'
+FROM pc_cyclists;
+
+INSERT INTO users (username, first_name, last_name, email, password_hash)
+SELECT 'pc-user-' || n, 'Plan', 'Check', 'pc-' || n || '@plan.check', ''
+FROM generate_series(0, 19999) n;
+
+INSERT INTO squads (user_id, name)
+SELECT id, 'pc-squad-' || id
+FROM users WHERE email LIKE '%@plan.check';
+
+CREATE TEMP TABLE pc_squads AS
+SELECT id, user_id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n
+FROM squads WHERE name LIKE 'pc-squad-%';
+
+CREATE TEMP TABLE pc_rosters AS
+SELECT s.id AS squad_id, s.n AS squad_n, c.id AS cyclist_id, k
+FROM pc_squads s
+CROSS JOIN generate_series(0, 19) k
+JOIN pc_cyclists c ON c.n = (s.n * 7 + k * 131) % 3000;
+
+INSERT INTO squad_cyclists (squad_id, cyclist_id)
+SELECT squad_id, cyclist_id FROM pc_rosters;
+
+INSERT INTO squad_selections (squad_id, cyclist_id, is_leader)
+SELECT squad_id, cyclist_id, k = 0 FROM pc_rosters WHERE k < 12;
+
+INSERT INTO squad_race_selections (squad_id, race_id, cyclist_id, is_leader)
+SELECT ro.squad_id, r.id, ro.cyclist_id, ro.k = 0
+FROM pc_rosters ro
+JOIN pc_races r ON r.n IN (1398, 1399)
+WHERE ro.k < 12;
+
+INSERT INTO squad_race_scores (squad_id, race_id, points, leader_bonus)
+SELECT s.id, r.id, (s.n + r.n) % 400, 0
+FROM pc_squads s
+JOIN pc_races r ON r.n BETWEEN 1390 AND 1399;
+
+INSERT INTO squad_scores (squad_id, points, races_scored)
+SELECT squad_id, SUM(points), COUNT(*)
+FROM squad_race_scores
+WHERE squad_id IN (SELECT id FROM pc_squads)
+GROUP BY squad_id;
+
+INSERT INTO squad_transfers (squad_id, out_cyclist_id, in_cyclist_id)
+SELECT ro.squad_id, ro.cyclist_id, c.id
+FROM pc_rosters ro
+JOIN pc_cyclists c ON c.n = (ro.squad_n * 11 + 1) % 3000
+WHERE ro.k < 3;
+
+INSERT INTO competitions (invite_id, name, created_by)
+SELECT gen_random_uuid(), 'pc-comp-' || n, (SELECT MIN(user_id) FROM pc_squads)
+FROM generate_series(0, 199) n;
+
+CREATE TEMP TABLE pc_competitions AS
+SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS n
+FROM competitions WHERE name LIKE 'pc-comp-%';
+
+INSERT INTO competition_squads (competition_id, squad_id)
+SELECT c.id, s.id
+FROM pc_squads s
+JOIN pc_competitions c ON c.n IN (s.n % 200, (s.n + 1) % 200);
+
+INSERT INTO competition_standings (competition_id, squad_id, rank, position, points)
+SELECT cs.competition_id, cs.squad_id,
+    RANK() OVER w, ROW_NUMBER() OVER w, COALESCE(ss.points, 0)
+FROM competition_squads cs
+JOIN pc_competitions c ON c.id = cs.competition_id
+LEFT JOIN squad_scores ss ON ss.squad_id = cs.squad_id
+WINDOW w AS (PARTITION BY cs.competition_id ORDER BY COALESCE(ss.points, 0) DESC, cs.squad_id);
+"""
+
+SAMPLE_IDS = """
+SELECT
+    (SELECT id FROM pc_races WHERE n = 1399) AS race_id,
+    (SELECT id FROM pc_squads WHERE n = 42) AS squad_id,
+    (SELECT user_id FROM pc_squads WHERE n = 42) AS user_id,
+    (SELECT id FROM pc_competitions WHERE n = 42) AS competition_id,
+    (SELECT id FROM pc_cyclists WHERE n = 42) AS cyclist_id,
+    (SELECT MIN(id) FROM teams WHERE code LIKE 'pc%') AS team_id,
+    (SELECT ARRAY_AGG(id) FROM pc_cyclists WHERE n < 150) AS cyclist_ids,
+    (SELECT ARRAY_AGG(id) FROM pc_races WHERE n >= 1400) AS race_ids,
+    (SELECT ARRAY_AGG(id) FROM pc_squads WHERE n < 20) AS squad_ids
+"""
+
+
+def sample_parameters(ids) -> dict:
+    return {
+        "race_id": ids["race_id"],
+        "squad_id": ids["squad_id"],
+        "user_id": ids["user_id"],
+        "competition_id": ids["competition_id"],
+        "cyclist_id": ids["cyclist_id"],
+        "team_id": ids["team_id"],
+        "created_by": ids["user_id"],
+        "id": ids["race_id"],
+        "cyclist_ids": ids["cyclist_ids"],
+        "race_ids": ids["race_ids"],
+        "squad_ids": ids["squad_ids"],
+        "positions": list(range(1, 151)),
+        "infos": [None] * 150,
+        "cyclist_full_names": ["Plan check"] * 150,
+        "year": settings.YEAR,
+        "retry_after_minutes": 60,
+        "leader_multiplier": 2,
+        "first_position": 1,
+        "last_position": 50,
+        "position": 1,
+        "points": 10,
+        "price": 2.0,
+        "score": 100.0,
+        "is_leader": True,
+        "leaders": [True] + [False] * (len(ids["cyclist_ids"]) - 1),
+        "squad_size": settings.SQUAD_SIZE,
+        "selection_size": settings.SELECTION_SIZE,
+        "budget": settings.MAX_SQUAD_BUDGET,
+        "out_cyclist_id": ids["cyclist_id"],
+        "in_cyclist_id": ids["cyclist_id"],
+        "window_quota": settings.TRANSFERS_PER_WINDOW,
+        "name": "pc-comp-42",
+        "email": "pc-42@plan.check",
+        "username": "pc-user-42",
+        "first_name": "Plan",
+        "last_name": "Check",
+        "password_hash": "",
+        "alias": "plan check 42",
+        "cyclists_version": "plan-check",
+        "category": "world-tour",
+        "status": "planned",
+        "code": "pc1",
+        "image_url": "",
+        "nationality": "BE",
+        "pcs_path": "race/pc-1",
+        "info": None,
+        "cyclist_full_name": "Plan check",
+        "birth_date": date(1990, 1, 1),
+        "start_timestamp": datetime(settings.YEAR, 1, 1, 8, tzinfo=timezone.utc),
+        "window_start": datetime(settings.YEAR, 1, 1, 8, tzinfo=timezone.utc),
+        "counted": True,
+        "transfers_used": 0,
+    }
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+async def check(conn: asyncpg.Connection, min_rows: int) -> list[str]:
+    start = time.perf_counter()
+    async with conn.transaction():
+        await conn.execute(SEED)
+    await conn.execute("VACUUM ANALYZE")
+    print(f"Seeded in {time.perf_counter() - start:.1f} s")
+    parameters = sample_parameters(await conn.fetchrow(SAMPLE_IDS))
+    table_rows = {
+        row["relname"]: row["reltuples"]
+        for row in await conn.fetch("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+    }
+
+    failures = []
+
+    async def explain(name: str, sql: str, args: list):
+        explained = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+        plan = json.loads(explained)[0]["Plan"]
+        large = sorted({table for table in seq_scans(plan) if table_rows.get(table, 0) >= min_rows})
+        if not large:
+            status = "ok"
+        elif name in FULL_SCANS:
+            status = f"full scan ({FULL_SCANS[name]})"
+        else:
+            status = "SEQ SCAN on " + ", ".join(f"{table} ({table_rows[table]:,.0f} rows)" for table in large)
+            failures.append(name)
+        print(f"  {name:<56} {status}")
+
+    for name in sorted(queries.available_queries):
+        query = getattr(queries, name)
+        if name.endswith("_cursor") or query.parameters is None or name in SKIPPED:
+            continue
+        # Same $n order aiosql binds with
+        await explain(name, query.sql, queries.driver_adapter.maybe_order_params(name, parameters))
+
+    bodies = {row["proname"]: normalized(row["prosrc"]) for row in await conn.fetch(FUNCTIONS)}
+    for function in sorted(bodies.keys() - INNER_STATEMENTS.keys()):
+        print(f"  {function:<56} NO STATEMENTS in INNER_STATEMENTS")
+        failures.append(function)
+    for function, statements in INNER_STATEMENTS.items():
+        for number, statement in enumerate(statements, 1):
+            name = f"{function} #{number}"
+            if normalized(statement) not in bodies.get(function, ""):
+                print(f"  {name:<56} NOT FOUND in the function body, copy it again from the migration")
+                failures.append(name)
+                continue
+            sql, names = bound(statement)
+            await explain(name, sql, [parameters[key] for key in names])
+    return failures
+
+
+def apply_migrations(dsn: str):
+    backend = get_backend(dsn)
+    try:
+        with backend.lock():
+            backend.apply_migrations(backend.to_apply(read_migrations("db/migrations")))
+    finally:
+        backend.connection.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10_000)
+    parser.add_argument("--random-page-cost", type=float, default=1.1)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    database = f"{settings.PGS_DB}_plan_check"
+    dsn = settings.PGS_DSN.rsplit("/", 1)[0] + f"/{database}"
+    admin = await asyncpg.connect(settings.PGS_DSN)
+    try:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{database}"')
+        await admin.execute(f'CREATE DATABASE "{database}"')
+        try:
+            apply_migrations(dsn)
+            conn = await asyncpg.connect(dsn)
+            try:
+                await conn.execute(f"SET random_page_cost = {args.random_page_cost}")
+                failures = await check(conn, args.min_rows)
+            finally:
+                await conn.close()
+        finally:
+            if not args.keep:
+                await admin.execute(f'DROP DATABASE IF EXISTS "{database}"')
+    finally:
+        await admin.close()
+
+    if failures:
+        print(f"{len(failures)} queries fall back to a sequential scan: {', '.join(failures)}")
+        sys.exit(1)
+    print("No sequential scans over large tables.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
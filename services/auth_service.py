@@ -1,13 +1,14 @@
-import bcrypt
 from datetime import datetime, timedelta, timezone
-from typing import Annotated
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from config import settings
-from repositories.user_repository import UserRepository, get_user_repository
-from models.user import User
+from db.database import db, LazyConnection
+from repositories.user_repository import UserRepository
+from models.user import CurrentUser
+from services.password_hasher import PasswordHasherBusyError, password_hasher
+from services.ttl_cache import TTLCache
 
 # Secret key for JWT encoding/decoding
 SECRET_KEY = settings.SECRET_KEY
@@ -16,15 +17,33 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Resolved users keyed by token subject (email)
+user_cache: TTLCache[CurrentUser] = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
 
-def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-    )
+
+password_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many login attempts in progress, try again shortly",
+    headers={"Retry-After": "1"},
+)
+
+
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusyError:
+        raise password_busy_exception
+
+
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusyError:
+        raise password_busy_exception
 
 
-def get_password_hash(password):
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def password_needs_rehash(hashed_password) -> bool:
+    return password_hasher.needs_rehash(hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -38,9 +57,25 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def user_token_claims(user: CurrentUser) -> dict:
+    claims = {"sub": user.email}
+    if settings.AUTH_USER_CLAIMS_IN_TOKEN:
+        claims.update(
+            uid=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+        )
+    return claims
+
+
+def invalidate_cached_user(email: str):
+    user_cache.invalidate(email)
+
+
 async def get_current_user(
-    request: Request, user_repo: Annotated[UserRepository, Depends(get_user_repository)]
-) -> User:
+    request: Request, conn: LazyConnection = Depends(db.get_connection, scope="function")
+) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -64,7 +99,24 @@ async def get_current_user(
     except jwt.PyJWTError:
         raise credentials_exception
 
-    user = await user_repo.get_user_by_email(email)
+    # Tokens that carry the user claims need no lookup at all
+    if settings.AUTH_USER_CLAIMS_IN_TOKEN and "uid" in payload:
+        return CurrentUser(
+            id=payload["uid"],
+            username=payload["username"],
+            first_name=payload["first_name"],
+            last_name=payload["last_name"],
+            email=email,
+        )
+
+    user = user_cache.get(email)
+    if user:
+        return user
+
+    # Only a cache miss touches the request's (lazily acquired) connection
+    user = await UserRepository(conn).get_user_by_email(email)
     if user is None:
         raise credentials_exception
+    user = CurrentUser.model_validate(user.model_dump(exclude={"password_hash"}))
+    user_cache.set(email, user)
     return user
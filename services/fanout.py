@@ -0,0 +1,75 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+import httpx
+from loguru import logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+@dataclass
+class FanOutResult:
+    total: int = 0
+    done: int = 0
+    failed: list[Any] = field(default_factory=list)
+
+
+async def fan_out(
+    items: Iterable[T],
+    fetch: Callable[[T], Awaitable[R]],
+    on_result: Callable[[T, R], Awaitable[None]],
+    concurrency: int = 4,
+    retries: int = 3,
+    backoff: float = 1.0,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> FanOutResult:
+    """Run `fetch` for every item with at most `concurrency` in flight.
+
+    Retryable errors are retried with exponential backoff and jitter.
+    `on_result` is called as soon as an item completes; calls are serialized
+    so they can safely share a single database connection. `on_progress`
+    receives (finished, total) after every item, failed or not.
+    """
+    items = list(items)
+    summary = FanOutResult(total=len(items))
+    if on_progress:
+        on_progress(0, summary.total)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    write_lock = asyncio.Lock()
+
+    async def fetch_with_retry(item: T) -> R:
+        for attempt in range(retries + 1):
+            try:
+                return await fetch(item)
+            except Exception as e:
+                if attempt >= retries or not is_retryable(e):
+                    raise
+                delay = backoff * 2**attempt + random.uniform(0, backoff)
+                logger.warning(f"Retrying {item} in {delay:.1f}s after error: {e}")
+                await asyncio.sleep(delay)
+
+    async def run(item: T):
+        try:
+            async with semaphore:
+                value = await fetch_with_retry(item)
+            async with write_lock:
+                await on_result(item, value)
+            summary.done += 1
+        except Exception as e:
+            logger.error(f"Failed to process {item}: {e}")
+            summary.failed.append(item)
+        if on_progress:
+            on_progress(summary.done + len(summary.failed), summary.total)
+
+    await asyncio.gather(*(run(item) for item in items))
+    return summary
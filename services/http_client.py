@@ -0,0 +1,71 @@
+from dataclasses import dataclass, asdict
+import httpx
+from loguru import logger
+from config import settings
+from services.rate_limiter import TokenBucket
+
+# PCS often blocks scripts without a User-Agent, so we mimic a browser
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+@dataclass
+class HttpClientStats:
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "reused_connections": self.reused_connections}
+
+
+class HttpClient:
+    """Long-lived, pooled HTTP client shared by everything that talks to PCS."""
+
+    def __init__(self):
+        self.client: httpx.AsyncClient | None = None
+        self.stats = HttpClientStats()
+        self.limiter = TokenBucket(settings.PCS_REQUESTS_PER_SECOND, settings.PCS_REQUEST_BURST)
+
+    async def connect(self):
+        limits = httpx.Limits(
+            max_connections=settings.PCS_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PCS_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.PCS_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(settings.PCS_TIMEOUT, connect=settings.PCS_CONNECT_TIMEOUT)
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            http2=settings.PCS_HTTP2,
+            limits=limits,
+            timeout=timeout,
+        )
+        logger.info("HTTP client created successfully.")
+
+    async def disconnect(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+            logger.info(f"HTTP client closed successfully. Stats: {self.stats.to_dict()}")
+
+    async def _trace(self, event_name: str, info: dict):
+        # httpcore only emits connect_tcp when it has to open a new socket,
+        # every other request went over a pooled (or multiplexed) connection
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        if not self.client:
+            raise Exception("HTTP client is not initialized.")
+        await self.limiter.acquire()
+        self.stats.requests += 1
+        extensions = {**kwargs.pop("extensions", {}), "trace": self._trace}
+        return await self.client.get(url, extensions=extensions, **kwargs)
+
+
+http_client = HttpClient()
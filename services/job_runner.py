@@ -0,0 +1,101 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+from loguru import logger
+from config import settings
+from models.job import Job, JobKind, JobStatus
+
+JobFunc = Callable[[Job], Awaitable[Any]]
+
+MAX_FINISHED_JOBS = 100
+
+
+class JobAlreadyRunningError(Exception):
+    def __init__(self, job: Job):
+        super().__init__(f"A {job.kind} job is already {job.status} (id {job.id})")
+        self.job = job
+
+
+class JobRunner:
+    """In-process job queue drained by a fixed number of asyncio worker tasks.
+
+    At most one job of each kind is queued or running at any time.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.queue: asyncio.Queue[tuple[Job, JobFunc]] | None = None
+        self.tasks: list[asyncio.Task] = []
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job runner started with {self.workers} workers.")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        logger.info("Job runner stopped.")
+
+    def active_job(self, kind: JobKind) -> Job | None:
+        for job in self.jobs.values():
+            if job.kind == kind and job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                return job
+        return None
+
+    def submit(self, kind: JobKind, func: JobFunc, params: dict[str, Any] | None = None) -> Job:
+        if not self.queue:
+            raise Exception("Job runner is not started.")
+        active = self.active_job(kind)
+        if active:
+            raise JobAlreadyRunningError(active)
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            params=params or {},
+            created_at=datetime.now(timezone.utc),
+        )
+        self.jobs[job.id] = job
+        self._prune()
+        self.queue.put_nowait((job, func))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        return list(reversed(self.jobs.values()))
+
+    def _prune(self):
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        ]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job, func = await self.queue.get()
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            try:
+                job.result = await func(job)
+                job.status = JobStatus.SUCCEEDED
+            except Exception as e:
+                logger.error(f"Job {job.kind} {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                self.queue.task_done()
+
+
+job_runner = JobRunner(settings.JOB_WORKERS)
@@ -0,0 +1,118 @@
+from loguru import logger
+from rapidfuzz import fuzz, process, utils
+from models.cyclist import Cyclist, CyclistAlias
+from repositories.base_repository import BaseRepository
+
+MATCH_THRESHOLD = 80
+
+
+def name_key(name: str) -> str:
+    # Normalised, token-sorted form of a name. fuzz.ratio on these keys is
+    # exactly fuzz.token_sort_ratio with utils.default_process on the raw names.
+    return " ".join(sorted(utils.default_process(name).split()))
+
+
+class CyclistNameIndex:
+    """Pre-normalised cyclist names for matching PCS rider names in bulk."""
+
+    def __init__(self, cyclists: list[Cyclist], version: str | None = None, threshold: int = MATCH_THRESHOLD):
+        self.version = version
+        self.threshold = threshold
+        self.cyclists = cyclists
+        self.by_id = {c.id: c for c in cyclists}
+        self.keys = [name_key(c.full_name) for c in cyclists]
+        self.exact: dict[str, Cyclist] = {}
+        for key, cyclist in zip(self.keys, cyclists):
+            self.exact.setdefault(key, cyclist)
+        # Raw query -> resolved cyclist (or None), shared across races
+        self.resolved: dict[str, Cyclist | None] = {}
+        # Resolutions not yet persisted to cyclist_aliases
+        self.new_aliases: list[CyclistAlias] = []
+
+    def load_aliases(self, aliases: list[CyclistAlias]):
+        for alias in aliases:
+            if alias.cyclist_id is None:
+                self.resolved[alias.alias] = None
+            elif alias.cyclist_id in self.by_id:
+                self.resolved[alias.alias] = self.by_id[alias.cyclist_id]
+
+    def drain_new_aliases(self) -> list[CyclistAlias]:
+        aliases, self.new_aliases = self.new_aliases, []
+        return aliases
+
+    def _resolve(self, query: str, cyclist: Cyclist | None, score: float):
+        self.resolved[query] = cyclist
+        self.new_aliases.append(
+            CyclistAlias(
+                alias=query,
+                cyclist_id=cyclist.id if cyclist else None,
+                score=score,
+                cyclists_version=self.version,
+            )
+        )
+
+    def match(self, search_query: str) -> Cyclist | None:
+        return self.match_many([search_query])[0]
+
+    def match_many(self, search_queries: list[str]) -> list[Cyclist | None]:
+        pending: dict[str, str] = {}
+        for query in search_queries:
+            if query in self.resolved or query in pending:
+                continue
+            key = name_key(query)
+            cyclist = self.exact.get(key)
+            if cyclist:
+                self._resolve(query, cyclist, 100.0)
+            else:
+                pending[query] = key
+
+        if pending and self.keys:
+            queries = list(pending)
+            scores = process.cdist(
+                [pending[q] for q in queries],
+                self.keys,
+                scorer=fuzz.ratio,
+                processor=None,
+                workers=-1,
+            )
+            best = scores.argmax(axis=1)
+            for row, (query, index) in enumerate(zip(queries, best)):
+                score = float(scores[row, index])
+                cyclist = self.cyclists[index]
+                if score < self.threshold:
+                    logger.warning(f"Low confidence match for search query '{query}': '{cyclist.full_name}' (Score: {score})")
+                    self._resolve(query, None, score)
+                else:
+                    logger.debug(f"Search: {query} | Matched: {cyclist.full_name} (Score: {score})")
+                    self._resolve(query, cyclist, score)
+        else:
+            for query in pending:
+                logger.warning(f"No match found for search query: {query}")
+                self.resolved[query] = None
+
+        return [self.resolved[query] for query in search_queries]
+
+
+_cached_index: CyclistNameIndex | None = None
+
+
+async def get_cyclist_name_index(repository: BaseRepository) -> CyclistNameIndex:
+    """Return the shared index, rebuilding it only if the cyclists table changed.
+
+    Persisted aliases are loaded on every call so names resolved by other
+    workers are picked up before any fuzzy scoring.
+    """
+    global _cached_index
+    version = await repository.get_cyclists_version()
+    if _cached_index is None or _cached_index.version != version:
+        cyclists = await repository.get_cyclists()
+        _cached_index = CyclistNameIndex(cyclists, version=version)
+        logger.info(f"Built cyclist name index ({len(cyclists)} cyclists).")
+    _cached_index.load_aliases(await repository.get_cyclist_aliases(version))
+    return _cached_index
+
+
+async def save_new_aliases(repository: BaseRepository, index: CyclistNameIndex):
+    aliases = index.drain_new_aliases()
+    if aliases:
+        await repository.upsert_cyclist_aliases(aliases)
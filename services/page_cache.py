@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from loguru import logger
+from config import settings
+from services.http_client import HttpClient
+
+MAX_PARSED_ENTRIES = 256
+
+
+class PageNotCachedError(Exception):
+    pass
+
+
+@dataclass
+class CachedPage:
+    url: str
+    content_hash: str
+    fetched_at: float
+    size: int
+    etag: str | None = None
+    last_modified: str | None = None
+    body: bytes = b""
+
+    def to_meta(self) -> dict:
+        meta = asdict(self)
+        meta.pop("body")
+        return meta
+
+
+class PageCache:
+    """On-disk cache of PCS pages keyed by URL, revalidated with conditional GETs.
+
+    Parsed output is memoised per content hash, so a 304 or an unchanged
+    body skips parsing entirely.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fresh_seconds: int,
+        ttl_seconds: int,
+        max_bytes: int,
+        offline: bool = False,
+        enabled: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.fresh_seconds = fresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.enabled = enabled
+        self.parsed: OrderedDict[tuple, object] = OrderedDict()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.html"
+
+    def _load(self, url: str) -> CachedPage | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            page = CachedPage(**meta, body=body_path.read_bytes())
+        except (OSError, ValueError, TypeError):
+            return None
+        if time.time() - page.fetched_at > self.ttl_seconds:
+            return None
+        return page
+
+    def _store(self, page: CachedPage, write_body: bool = True):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(page.url)
+        if write_body:
+            body_path.write_bytes(page.body)
+        meta_path.write_text(json.dumps(page.to_meta()))
+
+    def _evict(self):
+        # Drop expired entries, then the least recently fetched until under max_bytes
+        entries = []
+        now = time.time()
+        for meta_path in self.directory.glob("*.json"):
+            body_path = meta_path.with_suffix(".html")
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                meta = {"fetched_at": 0, "size": 0}
+            if now - meta["fetched_at"] > self.ttl_seconds:
+                meta_path.unlink(missing_ok=True)
+                body_path.unlink(missing_ok=True)
+                continue
+            entries.append((meta["fetched_at"], meta["size"], meta_path, body_path))
+
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, meta_path, body_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            total -= size
+
+    async def fetch(self, http: HttpClient, url: str) -> CachedPage:
+        if not self.enabled:
+            response = await http.get(url)
+            response.raise_for_status()
+            body = response.content
+            return CachedPage(url, hashlib.sha256(body).hexdigest(), time.time(), len(body), body=body)
+
+        cached = await asyncio.to_thread(self._load, url)
+        if self.offline:
+            if cached is None:
+                raise PageNotCachedError(f"Offline mode: {url} is not cached")
+            return cached
+
+        if cached and time.time() - cached.fetched_at < self.fresh_seconds:
+            return cached
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        response = await http.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            logger.debug(f"Not modified: {url}")
+            cached.fetched_at = time.time()
+            await asyncio.to_thread(self._store, cached, False)
+            return cached
+        response.raise_for_status()
+
+        body = response.content
+        content_hash = hashlib.sha256(body).hexdigest()
+        unchanged = cached is not None and cached.content_hash == content_hash
+        page = CachedPage(
+            url=url,
+            content_hash=content_hash,
+            fetched_at=time.time(),
+            size=len(body),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            body=body,
+        )
+        await asyncio.to_thread(self._store, page, not unchanged)
+        if not unchanged:
+            await asyncio.to_thread(self._evict)
+        return page
+
+    def get_parsed(self, key: tuple):
+        if key in self.parsed:
+            self.parsed.move_to_end(key)
+            return self.parsed[key]
+        return None
+
+    def set_parsed(self, key: tuple, value):
+        self.parsed[key] = value
+        self.parsed.move_to_end(key)
+        while len(self.parsed) > MAX_PARSED_ENTRIES:
+            self.parsed.popitem(last=False)
+
+
+page_cache = PageCache(
+    directory=settings.PCS_CACHE_DIR,
+    fresh_seconds=settings.PCS_CACHE_FRESH_SECONDS,
+    ttl_seconds=settings.PCS_CACHE_TTL_SECONDS,
+    max_bytes=settings.PCS_CACHE_MAX_BYTES,
+    offline=settings.PCS_OFFLINE,
+    enabled=settings.PCS_CACHE_ENABLED,
+)
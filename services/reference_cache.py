@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from fastapi import Request, Response
+from loguru import logger
+from pydantic import TypeAdapter
+from config import settings
+from models.cyclist import Cyclist
+from models.race import Race
+from models.team import Team
+from repositories.base_repository import BaseRepository
+
+CYCLISTS = "cyclists"
+TEAMS = "teams"
+RACES = "races"
+
+_loaders = {
+    CYCLISTS: (BaseRepository.get_cyclists, TypeAdapter(list[Cyclist])),
+    TEAMS: (BaseRepository.get_teams, TypeAdapter(list[Team])),
+    RACES: (BaseRepository.get_races, TypeAdapter(list[Race])),
+}
+
+
+@dataclass
+class CachedPayload:
+    version: int
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class ReferenceCache:
+    """Serialized JSON for the reference data endpoints, rebuilt after a sync or every `ttl` seconds.
+
+    Each entry carries a version that `invalidate` bumps; a rebuild that
+    raced with an invalidation is not stored. Invalidation only reaches the
+    process that ran the sync, so the TTL bounds how long other workers
+    serve stale data. Concurrent misses share a single rebuild, so a
+    refresh storm after a sync costs one query.
+    """
+
+    def __init__(self, ttl: float = settings.REFERENCE_CACHE_SECONDS):
+        self.ttl = ttl
+        self.versions = {name: 0 for name in _loaders}
+        self.payloads: dict[str, CachedPayload] = {}
+        self.locks = {name: asyncio.Lock() for name in _loaders}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, *names: str):
+        for name in names or tuple(_loaders):
+            self.versions[name] += 1
+            self.payloads.pop(name, None)
+
+    async def _load(self, name: str, repository: BaseRepository) -> CachedPayload:
+        version = self.versions[name]
+        load, adapter = _loaders[name]
+        body = adapter.dump_json(await load(repository))
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        payload = CachedPayload(version=version, body=body, etag=etag, expires_at=time.monotonic() + self.ttl)
+        if self.versions[name] == version:
+            self.payloads[name] = payload
+        return payload
+
+    def _fresh(self, name: str) -> CachedPayload | None:
+        payload = self.payloads.get(name)
+        if payload and payload.expires_at > time.monotonic():
+            return payload
+        return None
+
+    async def get(self, name: str, repository: BaseRepository) -> CachedPayload:
+        payload = self._fresh(name)
+        if payload:
+            self.hits += 1
+            return payload
+        async with self.locks[name]:
+            payload = self._fresh(name)
+            if payload:
+                self.hits += 1
+                return payload
+            self.misses += 1
+            return await self._load(name, repository)
+
+    async def warm(self, repository: BaseRepository):
+        for name in _loaders:
+            await self.get(name, repository)
+        logger.info("Reference data cache warmed.")
+
+    async def respond(self, name: str, request: Request, repository: BaseRepository) -> Response:
+        payload = await self.get(name, repository)
+        headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or payload.etag in if_none_match:
+            return Response(status_code=304, headers=headers)
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "versions": self.versions,
+            "cached": sorted(self.payloads),
+        }
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,207 @@
+import asyncio
+from dataclasses import dataclass
+import numpy as np
+from loguru import logger
+from config import settings
+from models.cyclist import Cyclist
+from models.simulation import CyclistProjection
+from repositories.simulation_repository import SimulationRepository
+from services.ttl_cache import TTLCache
+
+SIMULATION_CHUNK = 128
+
+
+@dataclass
+class SeasonInputs:
+    cyclist_ids: np.ndarray        # (C,)
+    finishes: np.ndarray           # (C, K) historical positions, padded; 0 = unclassified
+    finish_counts: np.ndarray      # (C,) number of real entries per row of finishes
+    race_ids: np.ndarray           # (R,)
+    race_points: np.ndarray        # (R, P) points by position; column 0 and the last column are 0
+    start_probability: np.ndarray  # (R, C)
+
+
+def build_inputs(
+    cyclist_ids: list[int],
+    history: list[tuple[int, int]],
+    result_races: int,
+    races: list[tuple[int, str]],
+    startlists: list[tuple[int, int]],
+    category_points: list[tuple[str, int, int]],
+) -> SeasonInputs:
+    """Turn query output into dense arrays indexed by (race, cyclist)."""
+    ids = np.asarray(cyclist_ids, dtype=np.int64)
+    column = {cyclist_id: i for i, cyclist_id in enumerate(cyclist_ids)}
+    n_cyclists, n_races = len(ids), len(races)
+
+    # Points table per race; positions past the table land on a trailing zero column
+    max_position = max((position for _, position, _ in category_points), default=0)
+    width = max_position + 2
+    by_category: dict[str, np.ndarray] = {}
+    for category, position, points in category_points:
+        by_category.setdefault(category, np.zeros(width, dtype=np.float32))[position] = points
+    race_points = np.zeros((n_races, width), dtype=np.float32)
+    for row, (_, category) in enumerate(races):
+        if category in by_category:
+            race_points[row] = by_category[category]
+
+    # Ragged per-rider histories packed into a padded (C, K) array
+    known = [(column[cyclist_id], min(position, width - 1)) for cyclist_id, position in history if cyclist_id in column]
+    if known:
+        riders, positions = np.asarray(known, dtype=np.int64).T
+    else:
+        riders = positions = np.zeros(0, dtype=np.int64)
+    order = np.argsort(riders, kind="stable")
+    riders, positions = riders[order], positions[order]
+    appearances = np.bincount(riders, minlength=n_cyclists)
+    offsets = np.concatenate(([0], np.cumsum(appearances)[:-1]))
+    slot = np.arange(len(riders)) - offsets[riders]
+    finishes = np.zeros((n_cyclists, max(int(appearances.max(initial=0)), 1)), dtype=np.int64)
+    finishes[riders, slot] = positions
+    # Riders without history get a single unclassified finish, i.e. no points
+    finish_counts = np.maximum(appearances, 1)
+
+    # On the startlist means starting; without a startlist use the historical start rate
+    start_rate = np.minimum(appearances / max(result_races, 1), 1.0).astype(np.float32)
+    start_probability = np.tile(start_rate, (n_races, 1))
+    race_row = {race_id: row for row, (race_id, _) in enumerate(races)}
+    listed = [(race_row[race_id], column[cyclist_id]) for race_id, cyclist_id in startlists if cyclist_id in column]
+    if listed:
+        rows, cols = np.asarray(listed, dtype=np.int64).T
+        has_startlist = np.unique(rows)
+        start_probability[has_startlist] = 0.0
+        start_probability[rows, cols] = 1.0
+
+    return SeasonInputs(
+        cyclist_ids=ids,
+        finishes=finishes,
+        finish_counts=finish_counts,
+        race_ids=np.asarray([race_id for race_id, _ in races], dtype=np.int64),
+        race_points=race_points,
+        start_probability=start_probability,
+    )
+
+
+def expected_race_points(inputs: SeasonInputs) -> np.ndarray:
+    """Exact expected points per (race, cyclist) under the same model as `simulate`."""
+    k = inputs.finishes.shape[1]
+    valid = np.arange(k)[None, :] < inputs.finish_counts[:, None]
+    points = inputs.race_points[:, inputs.finishes]  # (R, C, K)
+    mean = (points * valid).sum(axis=2) / inputs.finish_counts
+    return mean * inputs.start_probability
+
+
+def simulate(inputs: SeasonInputs, runs: int, seed: int | None = None) -> np.ndarray:
+    """Monte Carlo season totals, shape (runs, C).
+
+    Each rider's finish in each race is drawn from their own historical
+    finishes and only counts if they start. Both come from one uniform draw
+    u: u < p starts, and u * count / p picks the finish; u >= p lands past
+    the rider's finishes on zero-point padding. Riders are drawn
+    independently, so two can share a position within a run, which does
+    not change the expectation. Runs are processed in chunks to bound
+    memory, each chunk is one array expression over races x runs x riders.
+    """
+    rng = np.random.default_rng(seed)
+    n_races, n_cyclists = inputs.start_probability.shape
+    totals = np.zeros((runs, n_cyclists), dtype=np.float32)
+    if n_races == 0 or n_cyclists == 0:
+        return totals
+    k = inputs.finishes.shape[1]
+    starts = inputs.start_probability > 0
+    # Points of every historical finish per (race, rider), plus a zero slot at k
+    finish_points = np.zeros((n_races, n_cyclists, k + 1), dtype=np.float32)
+    finish_points[:, :, :k] = inputs.race_points[:, inputs.finishes] * starts[:, :, None]
+    finish_points = finish_points.reshape(-1)
+    offsets = (np.arange(n_races * n_cyclists, dtype=np.int32) * (k + 1)).reshape(n_races, 1, n_cyclists)
+    scale = inputs.finish_counts / np.where(starts, inputs.start_probability, 1.0)
+    scale = scale.astype(np.float32)[:, None, :]
+    for start in range(0, runs, SIMULATION_CHUNK):
+        size = min(SIMULATION_CHUNK, runs - start)
+        draw = rng.random((n_races, size, n_cyclists), dtype=np.float32)
+        draw *= scale
+        slot = draw.astype(np.int32)
+        np.minimum(slot, k, out=slot)
+        slot += offsets
+        totals[start:start + size] = finish_points.take(slot).sum(axis=0)
+    return totals
+
+
+@dataclass
+class SeasonSimulation:
+    year: int
+    runs: int
+    inputs: SeasonInputs
+    totals: np.ndarray
+    cyclists: dict[int, Cyclist]
+
+    def __post_init__(self):
+        self.column = {int(cyclist_id): i for i, cyclist_id in enumerate(self.inputs.cyclist_ids)}
+        self.expected = self.totals.mean(axis=0)
+        self.variance = self.totals.var(axis=0)
+
+    @property
+    def races(self) -> int:
+        return len(self.inputs.race_ids)
+
+    def cyclist(self, cyclist_id: int, is_leader: bool = False) -> CyclistProjection:
+        cyclist = self.cyclists[cyclist_id]
+        column = self.column[cyclist_id]
+        return CyclistProjection(
+            cyclist_id=cyclist_id,
+            full_name=cyclist.full_name,
+            team_name=cyclist.team_name,
+            price=cyclist.price,
+            expected_points=float(self.expected[column]),
+            variance=float(self.variance[column]),
+            is_leader=is_leader,
+        )
+
+    def ranked(self, limit: int | None = None) -> list[CyclistProjection]:
+        order = np.argsort(-self.expected, kind="stable")[:limit]
+        return [self.cyclist(int(self.inputs.cyclist_ids[column])) for column in order]
+
+    def squad(self, cyclist_ids: list[int], weights: list[float]) -> tuple[float, float]:
+        # Totals per run keep the spread of the whole squad, not just the sum of rider variances
+        columns = [self.column[cyclist_id] for cyclist_id in cyclist_ids]
+        squad_totals = self.totals[:, columns] @ np.asarray(weights, dtype=np.float32)
+        return float(squad_totals.mean()), float(squad_totals.var())
+
+
+_simulations: TTLCache[SeasonSimulation] = TTLCache(8, settings.SIMULATION_CACHE_SECONDS)
+_simulation_lock = asyncio.Lock()
+
+
+async def load_season_inputs(repository: SimulationRepository, cyclists: list[Cyclist], year: int) -> SeasonInputs:
+    races = await repository.get_upcoming_races(year)
+    return build_inputs(
+        cyclist_ids=[cyclist.id for cyclist in cyclists],
+        history=await repository.get_result_history(),
+        result_races=await repository.get_result_race_count(),
+        races=races,
+        startlists=await repository.get_startlists([race_id for race_id, _ in races]),
+        category_points=await repository.get_category_points(),
+    )
+
+
+async def get_season_simulation(
+    repository: SimulationRepository, cyclists: list[Cyclist], year: int, runs: int
+) -> SeasonSimulation:
+    """Simulated remaining season, cached for SIMULATION_CACHE_SECONDS."""
+    key = (year, runs)
+    async with _simulation_lock:
+        simulation = _simulations.get(key)
+        if simulation:
+            return simulation
+        inputs = await load_season_inputs(repository, cyclists, year)
+        totals = await asyncio.to_thread(simulate, inputs, runs, settings.SIMULATION_SEED)
+        simulation = SeasonSimulation(
+            year=year,
+            runs=runs,
+            inputs=inputs,
+            totals=totals,
+            cyclists={cyclist.id: cyclist for cyclist in cyclists},
+        )
+        logger.info(f"Simulated {runs} runs of {simulation.races} races for {len(cyclists)} cyclists")
+        _simulations.set(key, simulation)
+        return simulation
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timezone
+from loguru import logger
+from config import settings
+from db.database import db
+from repositories.base_repository import BaseRepository
+from repositories.selection_repository import SelectionRepository
+
+MIN_SLEEP_SECONDS = 0.5
+
+
+class SelectionDeadline:
+    """Freezes every squad's selection into squad_race_selections when a race starts.
+
+    A single task sleeps until the next race's start_timestamp, then freezes
+    every race whose deadline has passed with one INSERT ... SELECT each.
+    Between a deadline and its freeze the database refuses selection edits,
+    so a late wake-up never lets an edit into the snapshot. Sleeps are capped
+    at `poll_seconds` to pick up races added or moved by a sync. Freezing is
+    idempotent, so several app instances can run this side by side.
+    """
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self.task: asyncio.Task | None = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+        logger.info("Selection deadline watcher started.")
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        logger.info("Selection deadline watcher stopped.")
+
+    async def freeze_due(self) -> dict[int, int]:
+        """Freeze all races past their deadline; frozen rows per race."""
+        frozen = {}
+        async with db.acquire() as conn:
+            repository = SelectionRepository(conn)
+            for race_id in await repository.get_due_selection_deadlines():
+                frozen[race_id] = await repository.freeze_race_selections(race_id)
+                logger.info(f"Froze {frozen[race_id]} selection rows for race {race_id}")
+        return frozen
+
+    async def seconds_until_next_deadline(self) -> float:
+        async with db.acquire() as conn:
+            race = await BaseRepository(conn).get_next_race()
+        if race is None:
+            return self.poll_seconds
+        return (race.start_timestamp - datetime.now(timezone.utc)).total_seconds()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.freeze_due()
+                delay = await self.seconds_until_next_deadline()
+            except Exception as e:
+                logger.error(f"Selection deadline check failed: {e}")
+                delay = self.poll_seconds
+            await asyncio.sleep(min(max(delay, MIN_SLEEP_SECONDS), self.poll_seconds))
+
+
+selection_deadline = SelectionDeadline(settings.SELECTION_DEADLINE_POLL_SECONDS)
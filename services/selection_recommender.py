@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+import numpy as np
+from config import settings
+from models.race import Race
+from models.selection import SelectionRecommendation
+from repositories.base_repository import BaseRepository
+from repositories.selection_repository import SelectionRepository
+from repositories.simulation_repository import SimulationRepository
+from services.season_simulator import build_inputs, expected_race_points
+from services.ttl_cache import TTLCache
+
+
+@dataclass
+class RaceOutlook:
+    race: Race
+    cyclist_ids: np.ndarray     # (C,)
+    expected: np.ndarray        # (C,) expected points in this race
+    participating: np.ndarray   # (C,) on the startlist
+    startlist: bool
+
+
+async def get_race_outlook(repository: SimulationRepository, cyclist_ids: list[int], race: Race) -> RaceOutlook:
+    """Expected points of every cyclist in one race, same model as the season simulation."""
+    startlists = await repository.get_startlists([race.id])
+    inputs = build_inputs(
+        cyclist_ids=cyclist_ids,
+        history=await repository.get_result_history(),
+        result_races=await repository.get_result_race_count(),
+        races=[(race.id, race.category)],
+        startlists=startlists,
+        category_points=await repository.get_category_points(),
+    )
+    startlist = bool(startlists)
+    return RaceOutlook(
+        race=race,
+        cyclist_ids=inputs.cyclist_ids,
+        expected=expected_race_points(inputs)[0],
+        participating=inputs.start_probability[0] == 1.0 if startlist else np.zeros(len(cyclist_ids), dtype=bool),
+        startlist=startlist,
+    )
+
+
+def _pack_rosters(outlook: RaceOutlook, rosters: list[tuple[int, list[int]]]) -> tuple[np.ndarray, np.ndarray]:
+    # Squad ids and a (S, N) matrix of cyclist columns, -1 padded
+    column = {int(cyclist_id): i for i, cyclist_id in enumerate(outlook.cyclist_ids)}
+    width = max((len(cyclist_ids) for _, cyclist_ids in rosters), default=0)
+    roster = np.full((len(rosters), width), -1, dtype=np.int64)
+    for row, (_, cyclist_ids) in enumerate(rosters):
+        roster[row, :len(cyclist_ids)] = [column[cyclist_id] for cyclist_id in cyclist_ids]
+    return np.asarray([squad_id for squad_id, _ in rosters], dtype=np.int64), roster
+
+
+def rank_selections(
+    expected: np.ndarray, participating: np.ndarray, roster: np.ndarray, size: int
+) -> np.ndarray:
+    """Best `size` starters per squad, best first, -1 where a squad runs short.
+
+    Only riders on the startlist are candidates, so a race without a startlist
+    recommends nobody. Ranked by expected points; the first pick is the
+    leader. One argsort over all squads.
+    """
+    if roster.size == 0:
+        return np.full((len(roster), size), -1, dtype=np.int64)
+    columns = np.where(roster >= 0, roster, 0)
+    key = np.where((roster >= 0) & participating[columns], expected[columns], -np.inf)
+    order = np.argsort(-key, axis=1, kind="stable")[:, :size]
+    starts = np.take_along_axis(key, order, axis=1) > -np.inf
+    picks = np.where(starts, np.take_along_axis(roster, order, axis=1), -1)
+    if picks.shape[1] < size:
+        picks = np.pad(picks, ((0, 0), (0, size - picks.shape[1])), constant_values=-1)
+    return picks
+
+
+def recommend_selections(
+    outlook: RaceOutlook, rosters: list[tuple[int, list[int]]], size: int, leader_multiplier: int
+) -> list[SelectionRecommendation]:
+    squad_ids, roster = _pack_rosters(outlook, rosters)
+    picks = rank_selections(outlook.expected, outlook.participating, roster, size)
+    picked = picks >= 0
+    columns = np.where(picked, picks, 0)
+    points = np.where(picked, outlook.expected[columns], 0.0)
+    totals = points.sum(axis=1) + (leader_multiplier - 1) * points[:, 0]
+
+    # Plain Python values, so each model validates without numpy scalars
+    cyclist_ids = outlook.cyclist_ids[columns].tolist()
+    participating = outlook.participating[columns].tolist()
+    return [
+        SelectionRecommendation.model_validate({
+            "squad_id": squad_id,
+            "race_id": outlook.race.id,
+            "race_name": outlook.race.name,
+            "startlist": outlook.startlist,
+            "expected_points": total,
+            "cyclists": [
+                {
+                    "cyclist_id": cyclist_id,
+                    "expected_points": value,
+                    "is_participating": starts,
+                    "is_leader": slot == 0,
+                }
+                for slot, (cyclist_id, value, starts, valid) in enumerate(
+                    zip(squad_cyclists, squad_points, squad_participating, squad_picked)
+                )
+                if valid
+            ],
+        })
+        for squad_id, total, squad_cyclists, squad_points, squad_participating, squad_picked in zip(
+            squad_ids.tolist(), totals.tolist(), cyclist_ids, points.tolist(), participating, picked.tolist()
+        )
+    ]
+
+
+_competition_recommendations: TTLCache[list[SelectionRecommendation]] = TTLCache(
+    settings.RECOMMENDATION_CACHE_MAX_SIZE, settings.RECOMMENDATION_CACHE_SECONDS
+)
+
+
+async def get_competition_recommendations(
+    base_repository: BaseRepository,
+    simulation_repository: SimulationRepository,
+    selection_repository: SelectionRepository,
+    race: Race,
+    competition_id: int,
+) -> list[SelectionRecommendation]:
+    """Recommendations for every squad of a competition, cached per (race, competition).
+
+    Cached for RECOMMENDATION_CACHE_SECONDS, so a roster change shows up
+    within that time rather than on the next request.
+    """
+    key = (race.id, competition_id)
+    recommendations = _competition_recommendations.get(key)
+    if recommendations is not None:
+        return recommendations
+    cyclists = await base_repository.get_cyclists()
+    outlook = await get_race_outlook(simulation_repository, [cyclist.id for cyclist in cyclists], race)
+    rosters = await selection_repository.get_competition_rosters(competition_id)
+    recommendations = recommend_selections(outlook, rosters, settings.SELECTION_SIZE, settings.LEADER_POINTS_MULTIPLIER)
+    _competition_recommendations.set(key, recommendations)
+    return recommendations
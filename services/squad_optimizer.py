@@ -0,0 +1,201 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+import numpy as np
+from config import settings
+from models.cyclist import Cyclist
+from models.squad import SquadSuggestion, SquadSuggestionRequest, SquadValueMetric, SuggestedCyclist
+from repositories.score_repository import ScoreRepository
+from repositories.simulation_repository import SimulationRepository
+from services.season_simulator import get_season_simulation
+
+PRICE_SCALES = (1, 2, 4, 10, 100)
+
+
+class SquadOptimizerError(Exception):
+    pass
+
+
+@dataclass
+class SquadSolution:
+    cyclist_ids: list[int]
+    value: float
+    price: float
+    optimal: bool
+    candidates: int
+    elapsed_ms: float
+
+
+def _price_scale(prices: np.ndarray) -> int:
+    # Smallest scale that makes every price a whole number of units
+    for scale in PRICE_SCALES:
+        scaled = prices * scale
+        if np.allclose(scaled, np.round(scaled)):
+            return scale
+    return PRICE_SCALES[-1]
+
+
+def prune_dominated(prices: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """Indexes of riders that can be part of an optimal squad of `size`.
+
+    A rider is dominated when at least `size` others are no more expensive
+    and worth at least as much: any squad holding them leaves one of those
+    out, and swapping it in never costs budget or value. Ties are broken by
+    index so equal riders do not all dominate each other away.
+    """
+    n = len(prices)
+    if n <= size:
+        return np.arange(n)
+    order = np.arange(n)
+    cheaper = prices[None, :] <= prices[:, None]
+    better = values[None, :] >= values[:, None]
+    strictly = (prices[None, :] < prices[:, None]) | (values[None, :] > values[:, None]) | (order[None, :] < order[:, None])
+    dominators = (cheaper & better & strictly).sum(axis=1)
+    return np.flatnonzero(dominators < size)
+
+
+def optimize_squad(
+    cyclist_ids: list[int],
+    prices: list[float],
+    values: list[float],
+    size: int,
+    budget: float,
+    locked: list[int] | None = None,
+    excluded: list[int] | None = None,
+    time_budget: float = 0.5,
+) -> SquadSolution:
+    """Highest-value squad of exactly `size` riders within `budget`.
+
+    Locked riders are always in, excluded riders never. The rest is a
+    cardinality-constrained 0/1 knapsack: dominated riders are pruned, then
+    a dynamic program over (riders picked, budget used) runs one vectorised
+    step per remaining rider, best riders first. If `time_budget` runs out
+    the squad is the optimum over the riders seen so far, flagged as not
+    optimal.
+    """
+    start = time.perf_counter()
+    locked, excluded = set(locked or ()), set(excluded or ())
+    if locked & excluded:
+        raise SquadOptimizerError(f"Cyclists both locked and excluded: {sorted(locked & excluded)}")
+    index = {cyclist_id: i for i, cyclist_id in enumerate(cyclist_ids)}
+    unknown = (locked | excluded) - index.keys()
+    if unknown:
+        raise SquadOptimizerError(f"Unknown cyclists: {sorted(unknown)}")
+    if len(locked) > size:
+        raise SquadOptimizerError(f"{len(locked)} locked cyclists exceed the squad size of {size}")
+
+    ids = np.asarray(cyclist_ids, dtype=np.int64)
+    price = np.asarray(prices, dtype=np.float64)
+    value = np.asarray(values, dtype=np.float64)
+    scale = _price_scale(price)
+    units = np.ceil(price * scale - 1e-9).astype(np.int64)
+
+    locked_rows = np.asarray([index[cyclist_id] for cyclist_id in locked], dtype=np.int64)
+    slots = size - len(locked_rows)
+    capacity = math.floor(budget * scale + 1e-9) - int(units[locked_rows].sum())
+    if capacity < 0:
+        raise SquadOptimizerError("Locked cyclists exceed the budget")
+
+    pool = np.asarray(
+        [i for i in range(len(ids)) if int(ids[i]) not in locked and int(ids[i]) not in excluded], dtype=np.int64
+    )
+    pool = pool[prune_dominated(units[pool], value[pool], slots)]
+    pool = pool[np.argsort(-value[pool], kind="stable")]
+
+    # best[k, b]: highest value of k riders costing at most b units
+    best = np.full((slots + 1, capacity + 1), -np.inf)
+    best[0] = 0.0
+    taken = np.zeros((len(pool), slots + 1, capacity + 1), dtype=bool)
+    optimal = True
+    for step, row in enumerate(pool):
+        if slots == 0:
+            break
+        if step % 16 == 0 and time.perf_counter() - start > time_budget:
+            optimal = False
+            pool = pool[:step]
+            break
+        cost = units[row]
+        if cost > capacity:
+            continue
+        candidate = np.full_like(best, -np.inf)
+        candidate[1:, cost:] = best[:-1, :capacity + 1 - cost] + value[row]
+        better = candidate > best
+        taken[step] = better
+        np.maximum(best, candidate, out=best)
+
+    if not np.isfinite(best[slots, capacity]):
+        if optimal:
+            raise SquadOptimizerError(f"No squad of {size} cyclists fits within the budget")
+        raise SquadOptimizerError("No squad found within the time budget")
+
+    chosen = list(locked_rows)
+    k, b = slots, capacity
+    for step in range(len(pool) - 1, -1, -1):
+        if k == 0:
+            break
+        if taken[step, k, b]:
+            row = pool[step]
+            chosen.append(row)
+            k -= 1
+            b -= units[row]
+
+    chosen = np.asarray(chosen, dtype=np.int64)
+    return SquadSolution(
+        cyclist_ids=[int(cyclist_id) for cyclist_id in ids[chosen]],
+        value=float(value[chosen].sum()),
+        price=float(price[chosen].sum()),
+        optimal=optimal,
+        candidates=len(pool),
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+async def suggest_squad(
+    request: SquadSuggestionRequest,
+    cyclists: list[Cyclist],
+    score_repository: ScoreRepository,
+    simulation_repository: SimulationRepository,
+) -> SquadSuggestion:
+    if request.metric == SquadValueMetric.HISTORICAL:
+        points = await score_repository.get_cyclist_season_points(settings.YEAR)
+        values = [float(points.get(cyclist.id, 0)) for cyclist in cyclists]
+    else:
+        simulation = await get_season_simulation(
+            simulation_repository, cyclists, settings.YEAR, settings.SIMULATION_RUNS
+        )
+        values = [float(simulation.expected[simulation.column[cyclist.id]]) for cyclist in cyclists]
+
+    solution = await asyncio.to_thread(
+        optimize_squad,
+        [cyclist.id for cyclist in cyclists],
+        [cyclist.price for cyclist in cyclists],
+        values,
+        settings.SQUAD_SIZE,
+        settings.MAX_SQUAD_BUDGET,
+        request.locked,
+        request.excluded,
+        settings.SQUAD_OPTIMIZER_TIME_BUDGET,
+    )
+    by_id = {cyclist.id: (cyclist, value) for cyclist, value in zip(cyclists, values)}
+    picked = sorted((by_id[cyclist_id] for cyclist_id in solution.cyclist_ids), key=lambda pick: -pick[1])
+    return SquadSuggestion(
+        metric=request.metric,
+        value=solution.value,
+        price=solution.price,
+        budget=settings.MAX_SQUAD_BUDGET,
+        optimal=solution.optimal,
+        candidates=solution.candidates,
+        elapsed_ms=solution.elapsed_ms,
+        cyclists=[
+            SuggestedCyclist(
+                cyclist_id=cyclist.id,
+                full_name=cyclist.full_name,
+                team_name=cyclist.team_name,
+                price=cyclist.price,
+                value=value,
+                locked=cyclist.id in request.locked,
+            )
+            for cyclist, value in picked
+        ],
+    )
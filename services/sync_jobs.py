@@ -0,0 +1,56 @@
+from models.job import Job
+from services.fanout import FanOutResult
+from services.sync_service import sync_service_session
+
+
+def _progress(job: Job):
+    def report(done: int, total: int):
+        job.progress_done = done
+        job.progress_total = total
+    return report
+
+
+def _summary(summary: FanOutResult) -> dict:
+    return {
+        "races": summary.total,
+        "synced": summary.done,
+        "failed": [race.name for race in summary.failed],
+    }
+
+
+async def sync_job(job: Job):
+    async with sync_service_session() as sync_service:
+        results = await sync_service.sync()
+    return [result.model_dump() for result in results]
+
+
+async def races_job(job: Job):
+    async with sync_service_session() as sync_service:
+        result = await sync_service.sync_pcs_races(job.params["year"])
+    return result.model_dump()
+
+
+async def results_job(job: Job):
+    async with sync_service_session() as sync_service:
+        summary = await sync_service.sync_race_results(
+            job.params["year"],
+            concurrency=job.params.get("concurrency"),
+            progress=_progress(job),
+        )
+    return _summary(summary)
+
+
+async def startlist_job(job: Job):
+    async with sync_service_session() as sync_service:
+        summary = await sync_service.sync_startlist(
+            job.params["year"],
+            concurrency=job.params.get("concurrency"),
+            progress=_progress(job),
+        )
+    return _summary(summary)
+
+
+async def scores_job(job: Job):
+    async with sync_service_session() as sync_service:
+        scorings = await sync_service.score_races(job.params["year"])
+    return [scoring.model_dump() for scoring in scorings]
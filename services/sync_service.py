@@ -1,18 +1,29 @@
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from typing import AsyncIterator, Callable
+from datetime import datetime, timedelta, timezone
 import json
 from config import settings
 from fastapi import Depends
 from models.cyclist import Cyclist, CyclistCreate
-from models.race import PcsRace, RaceCategoryPointsCreate, RaceCreate, RaceStatus
-from models.result import RaceResultCreate
+from models.race import PcsRace, Race, RaceCategoryPointsCreate, RaceCreate, RaceStatus
+from models.result import PcsResult, RaceResultCreate
+from models.score import RaceScoring
+from models.sync import IngestResult
 from models.team import TeamCreate
 from repositories.base_repository import BaseRepository, get_base_repository
 from loguru import logger
 from zoneinfo import ZoneInfo
-from rapidfuzz import process, fuzz, utils
 from repositories.result_repository import ResultRepository, get_result_repository
-from services.pcs_service import PcsService, RaceCircuit, RaceClass
+from repositories.score_repository import ScoreRepository, get_score_repository
+from services.fanout import FanOutResult, fan_out
+from services.name_index import CyclistNameIndex, get_cyclist_name_index, save_new_aliases
+from db.database import db
+from services.http_client import http_client
+from services.page_cache import page_cache
+from services.pcs_parser import parser_pool
+from services.pcs_service import PcsService, RaceCircuit, RaceClass, get_pcs_service
+from services.reference_cache import RACES, reference_cache
 
 
 
@@ -20,14 +31,21 @@ from services.pcs_service import PcsService, RaceCircuit, RaceClass
 class SyncService:
     base_repo: BaseRepository | None = None
     result_repo: ResultRepository | None = None
+    pcs: PcsService | None = None
+    score_repo: ScoreRepository | None = None
     
-    async def sync(self):
-        await self.sync_teams()
-        await self.sync_cyclists()
-        await self.sync_races()
-        await self.sync_race_category_points()
+    async def sync(self) -> list[IngestResult]:
+        async with self.base_repo.transaction():
+            results = [
+                await self.sync_teams(),
+                await self.sync_cyclists(),
+                await self.sync_races(),
+                await self.sync_race_category_points(),
+            ]
+        reference_cache.invalidate()
+        return [result for result in results if result]
     
-    async def sync_cyclists(self):
+    async def sync_cyclists(self) -> IngestResult | None:
         try:
             path = "data/cyclists.json"
             with open(path, "r") as f:
@@ -48,6 +66,7 @@ class SyncService:
             teams = await self.base_repo.get_teams()
             team_dict = {team.code: team.id for team in teams}
             
+            cyclists_create: list[CyclistCreate] = []
             for cyclist in cyclists:
                 first_name = cyclist.get("firstName")
                 last_name = cyclist.get("lastName")
@@ -69,14 +88,18 @@ class SyncService:
                     image_url=image_url
                 )
                 
-                await self.base_repo.insert_cyclist(c)
+                cyclists_create.append(c)
+            
+            result = await self.base_repo.bulk_insert_cyclists(cyclists_create)
+            logger.info(f"Synced cyclists: {result.inserted} inserted, {result.skipped} skipped")
+            return result
                 
         except Exception as e:
             message = f"Error syncing cyclists data: {e}"
             logger.error(message)
             raise Exception(message)
             
-    async def sync_teams(self):
+    async def sync_teams(self) -> IngestResult | None:
         try:
             with open("data/cyclists.json", "r") as f:
                 data = json.load(f)
@@ -92,6 +115,7 @@ class SyncService:
             return
         
         try:
+            teams_create: list[TeamCreate] = []
             for team in teams:
                 name = team.get("name")
                 code = team.get("shortName")
@@ -103,14 +127,18 @@ class SyncService:
                     image_url=image_url
                 )
                 
-                await self.base_repo.insert_team(t)
+                teams_create.append(t)
+            
+            result = await self.base_repo.bulk_insert_teams(teams_create)
+            logger.info(f"Synced teams: {result.inserted} inserted, {result.skipped} skipped")
+            return result
         
         except Exception as e:
             message = f"Error syncing teams data: {e}"
             logger.error(message)
             raise Exception(message)
         
-    async def sync_races(self):
+    async def sync_races(self) -> IngestResult:
         try:
             path = "data/races.json"
             with open(path, "r") as f:
@@ -122,6 +150,7 @@ class SyncService:
             raise Exception(message)
 
         try:
+            races_create: list[RaceCreate] = []
             for race in data:
                 name = race.get("name")
                 start = race.get("start_timestamp")
@@ -134,13 +163,17 @@ class SyncService:
                     category=category,
                     year=year
                 )
-                await self.base_repo.insert_race(r)
+                races_create.append(r)
+            
+            result = await self.base_repo.bulk_insert_races(races_create)
+            logger.info(f"Synced races: {result.inserted} inserted, {result.skipped} skipped")
+            return result
         except Exception as e:
             message = f"Error syncing races data: {e}"
             logger.error(message)
             raise Exception(message)
         
-    async def sync_race_category_points(self):
+    async def sync_race_category_points(self) -> IngestResult:
         try:
             path = "data/points.json"
             with open(path, "r") as f:
@@ -151,6 +184,7 @@ class SyncService:
             raise Exception(message)
         
         try:
+            points_create: list[RaceCategoryPointsCreate] = []
             for item in data:
                 category = item.get("category")
                 position = item.get("position")
@@ -162,72 +196,95 @@ class SyncService:
                     points=points
                 )
                 
-                await self.base_repo.insert_race_category_points(rcp)
+                points_create.append(rcp)
+            
+            result = await self.base_repo.bulk_insert_race_category_points(points_create)
+            logger.info(f"Synced race category points: {result.inserted} inserted, {result.skipped} skipped")
+            return result
         except Exception as e:
             message = f"Error syncing race category points data: {e}"
             logger.error(message)
             raise Exception(message)
     
-    async def sync_race_results(self, year: int):
-        pcs = PcsService()
-        races = await self.base_repo.get_pcs_races(year)
-        cyclists = await self.base_repo.get_cyclists()
+    async def sync_race_results(
+        self, 
+        year: int, 
+        concurrency: int | None = None, 
+        progress: Callable[[int, int], None] | None = None,
+    ) -> FanOutResult:
+        # Only started races without stored results, so a nightly run is a handful of requests
+        races = await self.base_repo.get_races_due_for_results(year, settings.SYNC_RESULTS_RETRY_MINUTES)
+        logger.info(f"{len(races)} races due for result sync")
+        index = await get_cyclist_name_index(self.base_repo)
         
-        for race in races:
-            result = await pcs.fetch_race_results(race.pcs_path, race.year)
-            
-            if not result:
-                logger.warning(f"No results found for race: {race.name}")
-                await self.base_repo.update_race_status(race.id, RaceStatus.CANCELED)
-                continue
+        async def fetch(race: Race) -> list[PcsResult] | None:
+            return await self.pcs.fetch_race_results(race.pcs_path, race.year)
+        
+        async def store(race: Race, result: list[PcsResult] | None):
+            async with self.base_repo.transaction():
+                if not result:
+                    cancel_after = race.start_timestamp + timedelta(days=settings.SYNC_CANCEL_AFTER_DAYS)
+                    if datetime.now(timezone.utc) > cancel_after:
+                        logger.warning(f"No results found for race {race.name}, marking as canceled")
+                        await self.base_repo.update_race_status(race.id, RaceStatus.CANCELED)
+                    else:
+                        logger.warning(f"No results found yet for race: {race.name}")
+                        await self.base_repo.record_race_sync_attempt(race.id)
+                    return
             
-            for r in result:
-                search_query = r.cyclist_name
-                cyclist = self.find_cyclist_match(search_query, cyclists)
-                cyclist_id = cyclist.id if cyclist else None
-                race_result = RaceResultCreate(
-                    cyclist_id=cyclist_id,
-                    race_id=race.id,
-                    position=r.position,
-                    cyclist_full_name=r.cyclist_name,
-                    info=r.info
-                )
-                    
-                await self.result_repo.insert_race_result(race_result)
-                
-    def find_cyclist_match(self, search_query: str, cyclists: list[Cyclist]) -> Cyclist | None:
-        rider_map = {r.full_name: r for r in cyclists}
+                matches = index.match_many([r.cyclist_name for r in result])
+                await save_new_aliases(self.base_repo, index)
+                race_results = [
+                    RaceResultCreate(
+                        cyclist_id=cyclist.id if cyclist else None,
+                        race_id=race.id,
+                        position=r.position,
+                        cyclist_full_name=r.cyclist_name,
+                        info=r.info
+                    )
+                    for r, cyclist in zip(result, matches)
+                ]
+                inserted = await self.result_repo.insert_race_results(race.id, race_results)
+                logger.info(f"Stored {inserted} results for race: {race.name}")
+                await self.base_repo.mark_race_results_synced(race.id)
+                scoring = await self.score_repo.score_race(race.id)
+                logger.info(f"Scored race {race.name}: {scoring.squads_scored} squads")
         
-        match = process.extractOne(
-            search_query, 
-            rider_map.keys(), 
-            scorer=fuzz.token_sort_ratio,
-            processor=utils.default_process
+        summary = await fan_out(
+            races,
+            fetch,
+            store,
+            concurrency=concurrency or settings.SYNC_CONCURRENCY,
+            retries=settings.SYNC_MAX_RETRIES,
+            backoff=settings.SYNC_RETRY_BACKOFF,
+            on_progress=progress,
         )
+        # Statuses and sync timestamps moved, even for races without results yet
+        if summary.done:
+            reference_cache.invalidate(RACES)
+        logger.info(f"Synced results for {summary.done}/{summary.total} races ({len(summary.failed)} failed)")
+        return summary
+                
+    async def score_races(self, year: int) -> list[RaceScoring]:
+        # Backfill or re-score finished races whose results changed since they were scored
+        races = await self.score_repo.get_races_due_for_scoring(year)
+        logger.info(f"{len(races)} races due for scoring")
+        scorings = []
+        for race_id, name in races:
+            scoring = await self.score_repo.score_race(race_id)
+            logger.info(f"Scored race {name}: {scoring.cyclists_scored} cyclists, {scoring.squads_scored} squads")
+            scorings.append(scoring)
+        return scorings
+
+    def find_cyclist_match(self, search_query: str, index: CyclistNameIndex) -> Cyclist | None:
+        return index.match(search_query)
         
-        if match:
-            matched_name, score, index = match
-            
-            if score < 80:  # Threshold for acceptable match
-                logger.warning(f"Low confidence match for search query '{search_query}': '{matched_name}' (Score: {score})")
-                return None
-            
-            else:
-                logger.info(f"Search: {search_query} | Matched: {matched_name} (Score: {score})")
-                found_rider = rider_map[matched_name]
-                return found_rider
-            
-        else:
-            logger.warning(f"No match found for search query: {search_query}")
-            return None
-        
-    async def sync_pcs_races(self, year: int):
-        pcs = PcsService()
+    async def sync_pcs_races(self, year: int) -> IngestResult:
         races: list[PcsRace] = []
         # fetch lists and extend the combined list
         logger.info(f"Fetching PCS races for year {year}...")
-        wt = await pcs.fetch_races_list(year, RaceCircuit.WORLD_TOUR, RaceClass.WORLD_TOUR)
-        ps = await pcs.fetch_races_list(year, RaceCircuit.PRO_SERIES, RaceClass.PRO_SERIES)
+        wt = await self.pcs.fetch_races_list(year, RaceCircuit.WORLD_TOUR, RaceClass.WORLD_TOUR)
+        ps = await self.pcs.fetch_races_list(year, RaceCircuit.PRO_SERIES, RaceClass.PRO_SERIES)
         if wt:
             races.extend(wt)
         if ps:
@@ -235,32 +292,76 @@ class SyncService:
         
         logger.info(races)
         
-        for race in races:
-            r = RaceCreate(
+        races_create = [
+            RaceCreate(
                 name = race.name,
                 year = race.year,
                 start_timestamp = race.start_timestamp,
                 category = race.category,
                 pcs_path = race.pcs_path
             )
-            
-            await self.base_repo.insert_race(r)
+            for race in races
+        ]
+        
+        result = await self.base_repo.bulk_insert_races(races_create)
+        reference_cache.invalidate(RACES)
+        logger.info(f"Synced PCS races: {result.inserted} inserted, {result.skipped} skipped")
+        return result
 
-    async def sync_startlist(self, year: int):  
+    async def sync_startlist(
+        self, 
+        year: int, 
+        concurrency: int | None = None, 
+        progress: Callable[[int, int], None] | None = None,
+    ) -> FanOutResult:
         races = await self.base_repo.get_pcs_races(year)
-        cyclists = await self.base_repo.get_cyclists()
-        pcs = PcsService()  
-        for race in races:
-            await self.base_repo.delete_race_cyclists(race.id)
-            startlist = await pcs.fetch_startlist(race.pcs_path, race.year)
-            logger.info(startlist)
-            for rider_name in startlist:
-                cyclist = self.find_cyclist_match(rider_name, cyclists)
-                if cyclist:
-                    await self.base_repo.insert_race_cyclist(race.id, cyclist.id)
+        index = await get_cyclist_name_index(self.base_repo)
+        
+        async def fetch(race: Race) -> list[str]:
+            return await self.pcs.fetch_startlist(race.pcs_path, race.year)
+        
+        async def store(race: Race, startlist: list[str]):
+            async with self.base_repo.transaction():
+                if not startlist:
+                    # Keep the stored startlist rather than wiping it on an empty page
+                    logger.warning(f"No startlist found for race: {race.name}")
+                    return
+            
+                matches = index.match_many(startlist)
+                await save_new_aliases(self.base_repo, index)
+                cyclist_ids = [cyclist.id for cyclist in matches if cyclist]
+                added, removed = await self.base_repo.replace_race_cyclists(race.id, cyclist_ids)
+                logger.info(f"Startlist for race {race.name}: {added} added, {removed} removed")
+        
+        summary = await fan_out(
+            races,
+            fetch,
+            store,
+            concurrency=concurrency or settings.SYNC_CONCURRENCY,
+            retries=settings.SYNC_MAX_RETRIES,
+            backoff=settings.SYNC_RETRY_BACKOFF,
+            on_progress=progress,
+        )
+        logger.info(f"Synced startlists for {summary.done}/{summary.total} races ({len(summary.failed)} failed)")
+        return summary
                 
 def get_sync_service(
     base_repo: BaseRepository = Depends(get_base_repository),
-    result_repo: ResultRepository = Depends(get_result_repository)
+    result_repo: ResultRepository = Depends(get_result_repository),
+    pcs: PcsService = Depends(get_pcs_service),
+    score_repo: ScoreRepository = Depends(get_score_repository),
 ) -> SyncService:
-    return SyncService(base_repo, result_repo)
\ No newline at end of file
+    return SyncService(base_repo, result_repo, pcs, score_repo)
+
+
+@asynccontextmanager
+async def sync_service_session() -> AsyncIterator[SyncService]:
+    """SyncService on its own pooled connection for background jobs.
+
+    The connection is not wrapped in a transaction; each sync step opens its
+    own short one.
+    """
+    async with db.acquire() as conn:
+        base_repo = BaseRepository(conn)
+        pcs = PcsService(base_repo, http_client, parser_pool, page_cache)
+        yield SyncService(base_repo, ResultRepository(conn), pcs, ScoreRepository(conn))
@@ -1,10 +1,13 @@
 from services.pcs_service import PcsService, RaceCircuit, RaceClass
+from services.http_client import http_client
 
 async def main():
-    s = PcsService()
+    await http_client.connect()
+    s = PcsService(http=http_client)
     races = await s.fetch_startlist("2026")
     for race in races:
         print(race)
+    await http_client.disconnect()
         
 if __name__ == "__main__":
     import asyncio